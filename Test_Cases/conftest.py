@@ -3,7 +3,7 @@ Pytest configuration and fixtures for testing.
 """
 import pytest
 import asyncio
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from fastapi.testclient import TestClient
@@ -11,12 +11,14 @@ from datetime import datetime, timezone
 from decimal import Decimal
 
 from app.database import Base, get_db, get_async_session_local
+from app.cache import entity_cache
 from app.main import app
 from app.models.order import Order, OrderItem, OrderStatus
 from app.models.return_model import Return, ReturnItem, ReturnStatus, ReturnReason
 from app.models.payment import Payment, PaymentStatus, PaymentMethod
 from app.models.invoice import Invoice, InvoiceType
 from app.config import settings
+from app.query_stats import instrument_engine, query_stats
 
 
 # Test database URL (in-memory SQLite for fast tests)
@@ -32,6 +34,7 @@ test_async_engine = create_async_engine(
     connect_args={"check_same_thread": False},
     echo=False,
 )
+instrument_engine(test_async_engine)
 TestAsyncSessionLocal = async_sessionmaker(
     test_async_engine,
     class_=AsyncSession,
@@ -57,6 +60,9 @@ async def async_db_session():
     async with test_async_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     
+    # IDs restart with every fresh database, so cached entities must not leak between tests
+    await entity_cache.clear()
+    
     async with TestAsyncSessionLocal() as session:
         yield session
     
@@ -79,6 +85,41 @@ def client(async_db_session):
     app.dependency_overrides.clear()
 
 
+class QueryRecorder:
+    """Collects SQL statements executed on an engine."""
+    
+    WRITE_VERBS = ("INSERT", "UPDATE", "DELETE")
+    
+    def __init__(self):
+        self.statements = []
+    
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement.lstrip().upper())
+    
+    def clear(self):
+        self.statements.clear()
+    
+    def count(self, verb: str) -> int:
+        """Count recorded statements starting with the given SQL verb."""
+        return sum(1 for statement in self.statements if statement.startswith(verb))
+    
+    def selects_after_write(self) -> int:
+        """Count SELECTs issued after the first write (i.e. post-write re-selects)."""
+        for position, statement in enumerate(self.statements):
+            if statement.startswith(self.WRITE_VERBS):
+                return sum(1 for s in self.statements[position:] if s.startswith("SELECT"))
+        return 0
+
+
+@pytest.fixture
+def sql_queries():
+    """Record every SQL statement executed on the async test engine."""
+    recorder = QueryRecorder()
+    event.listen(test_async_engine.sync_engine, "before_cursor_execute", recorder)
+    yield recorder
+    event.remove(test_async_engine.sync_engine, "before_cursor_execute", recorder)
+
+
 @pytest.fixture
 def sample_order_data():
     """Sample order data for testing."""
@@ -252,3 +293,38 @@ def sample_invoice(db_session, sample_order):
     db_session.refresh(invoice)
     return invoice
 
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--query-budget",
+        type=int,
+        default=None,
+        help="Fail any test whose API requests issue more SQL queries than this",
+    )
+
+
+@pytest.fixture(autouse=True)
+def _query_budget(request):
+    """
+    Enforce a per-request SQL query budget on API calls made by the test.
+    Set it per test with @pytest.mark.query_budget(n) or for the whole run with --query-budget n.
+    """
+    marker = request.node.get_closest_marker("query_budget")
+    budget = marker.args[0] if marker else request.config.getoption("--query-budget")
+    if budget is None:
+        yield
+        return
+    
+    exceeded = []
+    
+    def check(route, stats):
+        if stats.count > budget:
+            exceeded.append(f"{route} issued {stats.count} queries")
+    
+    query_stats.add_observer(check)
+    try:
+        yield
+    finally:
+        query_stats.remove_observer(check)
+    if exceeded:
+        pytest.fail(f"Query budget of {budget} exceeded: " + "; ".join(exceeded))
@@ -0,0 +1,91 @@
+"""
+Unit tests for the entity cache.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.cache import EntityCache, LRUCache, NullCache, entity_cache
+
+
+@pytest.mark.asyncio
+async def test_lru_cache_evicts_least_recently_used():
+    """Test the LRU cache evicts the oldest unused entry when full."""
+    cache = LRUCache(max_entries=2, ttl_seconds=60)
+    await cache.set("a", 1)
+    await cache.set("b", 2)
+    assert await cache.get("a") == 1  # "a" is now most recently used
+    
+    await cache.set("c", 3)
+    
+    assert await cache.get("b") is None
+    assert await cache.get("a") == 1
+    assert await cache.get("c") == 3
+
+
+@pytest.mark.asyncio
+async def test_lru_cache_expires_entries():
+    """Test entries are dropped once their TTL has passed."""
+    cache = LRUCache(max_entries=10, ttl_seconds=-1)
+    await cache.set("a", 1)
+    
+    assert await cache.get("a") is None
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_entity_cache_read_through_and_invalidate():
+    """Test the loader only runs on a miss and invalidation forces a reload."""
+    cache = EntityCache(LRUCache(max_entries=10, ttl_seconds=60))
+    loads = []
+    
+    async def loader():
+        loads.append(1)
+        return {"id": 1, "version": len(loads)}
+    
+    assert (await cache.get_or_load("order", 1, loader))["version"] == 1
+    assert (await cache.get_or_load("order", 1, loader))["version"] == 1
+    await cache.invalidate("order", 1)
+    assert (await cache.get_or_load("order", 1, loader))["version"] == 2
+    
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_entity_cache_backend_errors_are_misses():
+    """Test a failing backend never fails the request."""
+    class BrokenBackend(NullCache):
+        async def get(self, key):
+            raise ConnectionError("redis down")
+    
+    cache = EntityCache(BrokenBackend())
+    
+    async def loader():
+        return {"id": 1}
+    
+    assert await cache.get_or_load("order", 1, loader) == {"id": 1}
+    assert cache.stats()["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_order_is_cached_and_invalidated(client: TestClient, sample_order_data):
+    """Test GET /orders/{id} is served from cache until the order is written."""
+    order_id = client.post("/api/v1/orders", json=sample_order_data).json()["id"]
+    
+    assert client.get(f"/api/v1/orders/{order_id}").status_code == 200
+    hits_before = entity_cache.hits
+    assert client.get(f"/api/v1/orders/{order_id}").json()["status"] == "pending"
+    assert entity_cache.hits == hits_before + 1
+    
+    client.post(f"/api/v1/orders/{order_id}/state", json={"action": "confirm"})
+    
+    assert client.get(f"/api/v1/orders/{order_id}").json()["status"] == "confirmed"
+
+
+@pytest.mark.asyncio
+async def test_cache_stats_endpoint(client: TestClient):
+    """Test cache counters are exposed."""
+    response = client.get("/cache/stats")
+    
+    assert response.status_code == 200
+    assert {"hits", "misses", "hit_ratio"} <= set(response.json())
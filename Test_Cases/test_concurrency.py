@@ -0,0 +1,193 @@
+"""
+Concurrency tests: optimistic versioning of orders, returns and payments.
+
+Each stress test loads the same row in many sessions, waits until every task
+holds its (soon stale) copy, then fires the same write from all of them at
+once against a file-backed SQLite database. Exactly one write may win; the
+others must fail with ConcurrentUpdateError instead of applying twice.
+"""
+import asyncio
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.database import Base, apply_sqlite_pragmas
+from app.models.order import Order, OrderStatus
+from app.models.payment import Payment, PaymentStatus, PaymentMethod
+from app.models.return_model import Return, ReturnStatus, ReturnReason
+from app.schemas.order import OrderCreate
+from app.schemas.payment import PaymentCreate, RefundRequest
+from app.services.concurrency import ConcurrentUpdateError
+from app.services.order_service import OrderService
+from app.services.payment_service import PaymentService
+from app.services.return_service import ReturnService
+
+TASKS = 20
+
+
+@pytest.fixture
+async def file_sessionmaker(tmp_path):
+    """Sessions on a file-backed SQLite database, so each task gets its own connection."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'concurrency.db'}", pool_size=TASKS)
+    apply_sqlite_pragmas(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def hammer(sessionmaker, load, write, tasks: int = TASKS):
+    """Run `write` from `tasks` sessions that all loaded the row before anyone wrote."""
+    barrier = asyncio.Barrier(tasks)
+    
+    async def worker():
+        async with sessionmaker() as db:
+            entity = await load(db)
+            await barrier.wait()
+            try:
+                await write(db, entity)
+                return "ok"
+            except ConcurrentUpdateError:
+                return "conflict"
+            except ValueError:
+                return "rejected"
+    
+    return await asyncio.gather(*(worker() for _ in range(tasks)))
+
+
+async def _create_order(sessionmaker, sample_order_data) -> int:
+    async with sessionmaker() as db:
+        order = await OrderService.create_order(db, OrderCreate(**sample_order_data))
+        return order.id
+
+
+@pytest.mark.asyncio
+async def test_concurrent_order_transitions_apply_once(file_sessionmaker, sample_order_data):
+    """Test many concurrent confirms of one order: one wins, the rest get a conflict."""
+    order_id = await _create_order(file_sessionmaker, sample_order_data)
+    
+    outcomes = await hammer(
+        file_sessionmaker,
+        lambda db: OrderService.get_order(db, order_id),
+        lambda db, order: OrderService.transition_order_state(db, order, "confirm"),
+    )
+    
+    assert outcomes.count("ok") == 1
+    assert outcomes.count("conflict") == TASKS - 1
+    
+    async with file_sessionmaker() as db:
+        order = await db.get(Order, order_id)
+        assert order.status == OrderStatus.CONFIRMED
+        assert order.version == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_return_transitions_apply_once(file_sessionmaker, sample_order_data):
+    """Test many concurrent approvals of one return: one wins, the rest get a conflict."""
+    order_id = await _create_order(file_sessionmaker, sample_order_data)
+    async with file_sessionmaker() as db:
+        return_obj = Return(
+            return_number="RET-CONCURRENT-001",
+            order_id=order_id,
+            status=ReturnStatus.INITIATED,
+            reason=ReturnReason.DEFECTIVE,
+            refund_amount=Decimal("50.00"),
+        )
+        db.add(return_obj)
+        await db.commit()
+        return_id = return_obj.id
+    
+    outcomes = await hammer(
+        file_sessionmaker,
+        lambda db: ReturnService.get_return(db, return_id),
+        lambda db, return_obj: ReturnService.transition_return_state(db, return_obj, "approve"),
+    )
+    
+    assert outcomes.count("ok") == 1
+    assert outcomes.count("conflict") == TASKS - 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_refunds_do_not_overdraw(file_sessionmaker, sample_order_data):
+    """Test concurrent refunds of the same balance are applied once."""
+    order_id = await _create_order(file_sessionmaker, sample_order_data)
+    async with file_sessionmaker() as db:
+        payment = Payment(
+            payment_number="PAY-CONCURRENT-001",
+            order_id=order_id,
+            status=PaymentStatus.COMPLETED,
+            method=PaymentMethod.CREDIT_CARD,
+            amount=Decimal("100.00"),
+            refunded_amount=Decimal("0.00"),
+        )
+        db.add(payment)
+        await db.commit()
+        payment_id = payment.id
+    
+    outcomes = await hammer(
+        file_sessionmaker,
+        lambda db: PaymentService.get_payment(db, payment_id),
+        lambda db, payment: PaymentService.process_refund(db, payment, RefundRequest(amount=Decimal("100.00"))),
+    )
+    
+    assert outcomes.count("ok") == 1
+    assert outcomes.count("conflict") == TASKS - 1
+    
+    async with file_sessionmaker() as db:
+        payment = await db.get(Payment, payment_id)
+        assert payment.refunded_amount == Decimal("100.00")
+        assert payment.status == PaymentStatus.REFUNDED
+
+
+@pytest.mark.asyncio
+async def test_transition_on_stale_order_returns_409(client: TestClient, async_db_session, sample_order_data):
+    """Test the API maps a lost race to 409 Conflict."""
+    order = await OrderService.create_order(async_db_session, OrderCreate(**sample_order_data))
+    
+    # Another writer bumps the row behind the session's back, leaving its copy stale
+    async with async_db_session.bind.connect() as conn:
+        await conn.execute(text("UPDATE orders SET version = version + 1 WHERE id = :id"), {"id": order.id})
+        await conn.commit()
+    
+    response = client.post(f"/api/v1/orders/{order.id}/state", json={"action": "confirm"})
+    
+    assert response.status_code == 409
+    assert "modified by a concurrent request" in response.json()["detail"]
+
+
+async def _bump_version(async_db_session, table: str, row_id: int) -> None:
+    """Simulate another writer updating the row behind the session's back."""
+    async with async_db_session.bind.connect() as conn:
+        await conn.execute(text(f"UPDATE {table} SET version = version + 1 WHERE id = :id"), {"id": row_id})
+        await conn.commit()
+
+
+@pytest.mark.asyncio
+async def test_update_on_stale_order_returns_409(client: TestClient, async_db_session, sample_order_data):
+    """Test PATCH /orders/{id} on a row changed concurrently returns 409 rather than 500."""
+    order = await OrderService.create_order(async_db_session, OrderCreate(**sample_order_data))
+    await _bump_version(async_db_session, "orders", order.id)
+    
+    response = client.patch(f"/api/v1/orders/{order.id}", json={"notes": "leave at the door"})
+    
+    assert response.status_code == 409
+    assert "modified by a concurrent request" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_process_stale_payment_returns_409(client: TestClient, async_db_session, sample_order_data):
+    """Test processing a payment changed concurrently returns 409 and does not complete it."""
+    order = await OrderService.create_order(async_db_session, OrderCreate(**sample_order_data))
+    payment = await PaymentService.create_payment(
+        async_db_session, PaymentCreate(order_id=order.id, method=PaymentMethod.CREDIT_CARD, amount=order.total)
+    )
+    await _bump_version(async_db_session, "payments", payment.id)
+    
+    response = client.post(f"/api/v1/payments/{payment.id}/process")
+    
+    assert response.status_code == 409
+    await async_db_session.refresh(payment)
+    assert payment.status == PaymentStatus.PENDING
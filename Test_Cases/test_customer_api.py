@@ -0,0 +1,131 @@
+"""
+Tests for the customer order history endpoint.
+"""
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from app.models.order import Order
+from app.schemas.order import ORDER_SUMMARY_FIELDS
+from app.services.order_service import OrderService
+
+
+def create_orders(client: TestClient, order_data: dict, count: int, customer_id: int = 1) -> list:
+    order_data = {**order_data, "customer_id": customer_id}
+    return [client.post("/api/v1/orders", json=order_data).json() for _ in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_customer_orders_with_aggregates(client: TestClient, sample_order_data):
+    """Test the page comes newest first with the count and lifetime spend, excluding cancelled orders."""
+    orders = create_orders(client, sample_order_data, 3)
+    create_orders(client, sample_order_data, 1, customer_id=2)
+    client.post(f"/api/v1/orders/{orders[0]['id']}/state", json={"action": "cancel"})
+    
+    response = client.get("/api/v1/customers/1/orders")
+    
+    assert response.status_code == 200
+    assert [order["id"] for order in response.json()] == [order["id"] for order in reversed(orders)]
+    assert response.headers["X-Total-Count"] == "3"
+    spend = sum(Decimal(str(order["total"])) for order in orders[1:])
+    assert response.headers["X-Lifetime-Spend"] == f"USD {spend:.2f}"
+    assert "X-Next-Cursor" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_customer_orders_keyset_pages(client: TestClient, sample_order_data):
+    """Test following X-Next-Cursor walks every order once while the aggregates stay the same."""
+    orders = create_orders(client, sample_order_data, 5)
+    
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/v1/customers/1/orders", params=params)
+        assert response.status_code == 200
+        assert response.headers["X-Total-Count"] == "5"
+        seen += [order["id"] for order in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    
+    assert seen == [order["id"] for order in reversed(orders)]
+    assert client.get("/api/v1/customers/1/orders", params={"cursor": "garbage"}).status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_customer_orders_status_filter(client: TestClient, sample_order_data):
+    """Test `status` filters the page and the count but not the lifetime spend."""
+    orders = create_orders(client, sample_order_data, 2)
+    client.post(f"/api/v1/orders/{orders[0]['id']}/state", json={"action": "confirm"})
+    
+    response = client.get("/api/v1/customers/1/orders", params={"status": "confirmed"})
+    
+    assert [order["id"] for order in response.json()] == [orders[0]["id"]]
+    assert response.headers["X-Total-Count"] == "1"
+    spend = sum(Decimal(str(order["total"])) for order in orders)
+    assert response.headers["X-Lifetime-Spend"] == f"USD {spend:.2f}"
+
+
+@pytest.mark.asyncio
+async def test_customer_lifetime_spend_is_per_currency(client: TestClient, async_db_session, sample_order_data):
+    """Test orders in different currencies are totalled separately rather than added together."""
+    orders = create_orders(client, sample_order_data, 3)
+    await async_db_session.execute(update(Order).where(Order.id == orders[0]["id"]).values(currency="EUR"))
+    await async_db_session.commit()
+    
+    response = client.get("/api/v1/customers/1/orders")
+    
+    assert response.headers["X-Total-Count"] == "3"
+    eur = Decimal(str(orders[0]["total"]))
+    usd = sum(Decimal(str(order["total"])) for order in orders[1:])
+    assert response.headers["X-Lifetime-Spend"] == f"EUR {eur:.2f}, USD {usd:.2f}"
+
+
+@pytest.mark.asyncio
+async def test_customer_lifetime_spend_is_exact(client: TestClient, async_db_session, sample_order_data):
+    """Test fractional totals are summed as decimals and orders without a currency count as USD."""
+    orders = create_orders(client, sample_order_data, 4)
+    for order, total, currency in zip(orders, ("10.10", "20.20", "0.10", "0.20"), ("EUR", "EUR", "USD", "USD")):
+        await async_db_session.execute(
+            update(Order).where(Order.id == order["id"]).values(total=Decimal(total), currency=currency)
+        )
+    await async_db_session.commit()
+    
+    response = client.get("/api/v1/customers/1/orders")
+    
+    assert response.headers["X-Total-Count"] == "4"
+    assert response.headers["X-Lifetime-Spend"] == "EUR 30.30, USD 0.30"
+    
+    await async_db_session.execute(update(Order).where(Order.id == orders[3]["id"]).values(currency=None))
+    _, order_count, spend = await OrderService.list_customer_orders(async_db_session, 1)
+    
+    assert order_count == 4
+    assert spend == {"EUR": Decimal("30.30"), "USD": Decimal("0.30")}
+
+
+@pytest.mark.asyncio
+async def test_customer_without_orders(client: TestClient):
+    """Test a customer with no orders gets an empty page and zero aggregates."""
+    response = client.get("/api/v1/customers/424242/orders")
+    
+    assert response.status_code == 200
+    assert response.json() == []
+    assert response.headers["X-Total-Count"] == "0"
+    assert "X-Lifetime-Spend" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_customer_orders_summary_queries(client: TestClient, sample_order_data, sql_queries):
+    """Test view=summary returns the page and count from one SELECT and the spend from another, without items."""
+    create_orders(client, sample_order_data, 3)
+    sql_queries.clear()
+    
+    response = client.get("/api/v1/customers/1/orders", params={"view": "summary"})
+    
+    assert response.status_code == 200
+    assert set(response.json()[0]) == set(ORDER_SUMMARY_FIELDS)
+    assert response.headers["X-Total-Count"] == "3"
+    assert len(sql_queries.statements) == 2
+    assert not any("ORDER_ITEMS" in statement for statement in sql_queries.statements)
@@ -0,0 +1,114 @@
+"""
+Unit tests for database engine configuration and pool metrics.
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import settings
+from app.database import TimedQueuePool, apply_sqlite_pragmas, pool_stats
+
+
+def test_timed_pool_records_checkouts():
+    """Test the timed pool reports occupancy and wait statistics."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+    )
+    first = engine.connect()
+    second = engine.connect()
+    first.execute(text("SELECT 1"))
+    
+    stats = pool_stats(engine.pool)
+    assert stats["checked_out"] == 2
+    assert stats["overflow_in_use"] == 1
+    assert stats["max_overflow"] == 1
+    assert stats["checkouts"] == 2
+    assert stats["wait_seconds_max"] >= 0
+    
+    first.close()
+    second.close()
+    engine.dispose()
+
+
+def test_timed_pool_counts_timeouts():
+    """Test checkouts that time out are counted."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.01,
+    )
+    held = engine.connect()
+    
+    with pytest.raises(Exception):
+        engine.connect()
+    
+    assert engine.pool.wait_stats.timeouts == 1
+    held.close()
+    engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_db_pool_metrics_endpoint(client: TestClient):
+    """Test pool metrics are exposed."""
+    response = client.get("/metrics/db")
+    
+    assert response.status_code == 200
+    assert "pool_class" in response.json()["sync"]
+
+
+def test_sqlite_pragmas_applied_to_sync_engine(tmp_path):
+    """Test the SQLite performance profile is set on new sync connections."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'sync.db'}")
+    apply_sqlite_pragmas(engine)
+    
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == settings.SQLITE_BUSY_TIMEOUT_MS
+        assert conn.execute(text("PRAGMA foreign_keys")).scalar() == 1
+    engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_pragmas_applied_to_async_engine(tmp_path):
+    """Test the SQLite performance profile is set on new aiosqlite connections."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+    apply_sqlite_pragmas(engine)
+    
+    async with engine.connect() as conn:
+        assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+        assert (await conn.execute(text("PRAGMA busy_timeout"))).scalar() == settings.SQLITE_BUSY_TIMEOUT_MS
+    await engine.dispose()
+
+
+def test_worker_engine_shared_and_disposed(tmp_path, monkeypatch):
+    """Test Celery task modules share one worker engine that is replaced on init and dropped on shutdown."""
+    from app.tasks import invoice_tasks, order_tasks, return_tasks, worker_db
+    
+    monkeypatch.setattr(settings, "DATABASE_URL", f"sqlite:///{tmp_path / 'worker.db'}")
+    worker_db.dispose_worker_engine()
+    
+    # Every task module opens sessions through the same factory
+    assert order_tasks.SessionLocal is return_tasks.SessionLocal is invoice_tasks.SessionLocal is worker_db.SessionLocal
+    
+    # Created lazily outside a worker
+    session = worker_db.SessionLocal()
+    first_engine = worker_db.get_worker_engine()
+    assert session.get_bind() is first_engine
+    assert session.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+    session.close()
+    
+    # worker_process_init replaces any engine inherited from the parent
+    worker_db._on_worker_process_init()
+    assert worker_db.get_worker_engine() is not first_engine
+    
+    worker_db._on_worker_process_shutdown()
+    assert worker_db._engine is None
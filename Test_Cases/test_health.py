@@ -0,0 +1,113 @@
+"""
+Tests for the liveness and readiness probes.
+"""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.health import ReadinessChecker, readiness
+from app.invoice_store import LocalInvoiceStore
+
+
+async def ok():
+    return None
+
+
+async def failing():
+    raise ConnectionError("connection refused")
+
+
+@pytest.fixture
+def fake_readiness(monkeypatch):
+    """Replace the readiness checks with controllable ones."""
+    calls = []
+    
+    async def counted():
+        calls.append(1)
+    
+    monkeypatch.setattr(readiness, "checks", {"database": counted, "broker": ok})
+    readiness.clear()
+    yield calls
+    readiness.clear()
+
+
+def test_liveness_does_not_check_dependencies(client: TestClient, fake_readiness):
+    """Test /health/live answers without running any readiness check."""
+    response = client.get("/health/live")
+    
+    assert response.status_code == 200
+    assert response.json() == {"status": "alive"}
+    assert fake_readiness == []
+
+
+def test_readiness_is_cached(client: TestClient, fake_readiness):
+    """Test repeated probes within HEALTH_CACHE_SECONDS reuse one check."""
+    first = client.get("/health/ready")
+    second = client.get("/health/ready")
+    
+    assert first.status_code == second.status_code == 200
+    assert first.json()["checks"]["database"]["ok"] is True
+    assert second.json() == first.json()
+    assert len(fake_readiness) == 1
+
+
+def test_readiness_fails_when_a_dependency_fails(client: TestClient, monkeypatch):
+    """Test a failing check makes /health/ready return 503 with the error."""
+    monkeypatch.setattr(readiness, "checks", {"database": ok, "broker": failing})
+    readiness.clear()
+    
+    response = client.get("/health/ready")
+    readiness.clear()
+    
+    assert response.status_code == 503
+    body = response.json()
+    assert body["status"] == "not_ready"
+    assert body["checks"]["database"]["ok"] is True
+    assert body["checks"]["broker"] == {
+        "ok": False,
+        "ms": body["checks"]["broker"]["ms"],
+        "error": "ConnectionError: connection refused",
+    }
+
+
+@pytest.mark.asyncio
+async def test_slow_checks_time_out(monkeypatch):
+    """Test a check slower than HEALTH_CHECK_TIMEOUT_SECONDS fails instead of blocking the probe."""
+    monkeypatch.setattr(settings, "HEALTH_CHECK_TIMEOUT_SECONDS", 0.05)
+    
+    async def hangs():
+        await asyncio.sleep(10)
+    
+    result = await ReadinessChecker({"database": hangs}).check()
+    
+    assert result["status"] == "not_ready"
+    assert "timed out" in result["checks"]["database"]["error"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_probes_share_one_check():
+    """Test probes arriving while a check is running wait for it instead of starting another."""
+    calls = []
+    
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+    
+    checker = ReadinessChecker({"database": slow})
+    results = await asyncio.gather(*(checker.check() for _ in range(20)))
+    
+    assert len(calls) == 1
+    assert all(result["status"] == "ready" for result in results)
+
+
+def test_local_store_check_requires_writable_root(tmp_path):
+    """Test the invoice store check fails when its root cannot be written."""
+    LocalInvoiceStore(str(tmp_path / "invoices")).check()
+    assert list((tmp_path / "invoices").iterdir()) == []
+    
+    blocker = tmp_path / "not_a_directory"
+    blocker.write_bytes(b"")
+    with pytest.raises(OSError):
+        LocalInvoiceStore(str(blocker / "invoices")).check()
@@ -0,0 +1,246 @@
+"""
+Tests for Idempotency-Key handling on order, payment and refund creation.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select, text, update
+
+from app.api.idempotency import run_idempotent
+from app.config import settings
+from app.models.idempotency import IdempotencyKey
+from app.models.order import Order
+from app.models.payment import Payment
+from app.schemas.order import OrderCreate, OrderResponse
+from app.services.idempotency_service import IdempotencyService
+from app.services.order_service import OrderService
+
+
+def _completed_payment(client: TestClient, order_data: dict) -> dict:
+    order = client.post("/api/v1/orders", json=order_data).json()
+    payment = client.post(
+        "/api/v1/payments",
+        json={"order_id": order["id"], "method": "credit_card", "amount": order["total"]},
+    ).json()
+    return client.post(f"/api/v1/payments/{payment['id']}/process").json()
+
+
+@pytest.mark.asyncio
+async def test_repeated_order_key_returns_original_order(client: TestClient, async_db_session, sample_order_data):
+    """Test a retried POST /orders with the same key creates one order and replays the response."""
+    headers = {"Idempotency-Key": "order-retry-1"}
+    
+    first = client.post("/api/v1/orders", json=sample_order_data, headers=headers)
+    second = client.post("/api/v1/orders", json=sample_order_data, headers=headers)
+    
+    assert first.status_code == 201
+    assert second.status_code == 201
+    assert second.json() == first.json()
+    assert second.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+    
+    count = await async_db_session.scalar(select(func.count()).select_from(Order))
+    assert count == 1
+
+
+def test_orders_without_key_are_not_deduplicated(client: TestClient, sample_order_data):
+    """Test requests without the header behave as before."""
+    first = client.post("/api/v1/orders", json=sample_order_data)
+    second = client.post("/api/v1/orders", json=sample_order_data)
+    
+    assert first.json()["id"] != second.json()["id"]
+
+
+def test_key_reused_with_different_body_is_rejected(client: TestClient, sample_order_data):
+    """Test reusing a key for a different request returns 422."""
+    headers = {"Idempotency-Key": "order-retry-2"}
+    client.post("/api/v1/orders", json=sample_order_data, headers=headers)
+    
+    changed = dict(sample_order_data, customer_name="Someone Else")
+    response = client.post("/api/v1/orders", json=changed, headers=headers)
+    
+    assert response.status_code == 422
+
+
+def test_repeated_refund_key_refunds_once(client: TestClient, sample_order_data):
+    """Test a retried partial refund is applied only once."""
+    payment = _completed_payment(client, sample_order_data)
+    url = f"/api/v1/payments/{payment['id']}/refund"
+    headers = {"Idempotency-Key": "refund-1"}
+    
+    first = client.post(url, json={"amount": 10}, headers=headers)
+    second = client.post(url, json={"amount": 10}, headers=headers)
+    
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["idempotent-replayed"] == "true"
+    fetched = client.get(f"/api/v1/payments/{payment['id']}").json()
+    assert float(fetched["refunded_amount"]) == 10.0
+
+
+def test_failed_request_releases_key(client: TestClient, sample_order_data):
+    """Test a key whose request failed can be retried."""
+    order = client.post("/api/v1/orders", json=sample_order_data).json()
+    payment = client.post(
+        "/api/v1/payments",
+        json={"order_id": order["id"], "method": "credit_card", "amount": order["total"]},
+    ).json()
+    url = f"/api/v1/payments/{payment['id']}/refund"
+    headers = {"Idempotency-Key": "refund-before-capture"}
+    
+    # Pending payments cannot be refunded
+    assert client.post(url, json={}, headers=headers).status_code == 400
+    
+    client.post(f"/api/v1/payments/{payment['id']}/process")
+    response = client.post(url, json={}, headers=headers)
+    
+    assert response.status_code == 200
+    assert response.json()["status"] == "refunded"
+
+
+@pytest.mark.asyncio
+async def test_stale_refund_returns_409_and_releases_key(client: TestClient, async_db_session, sample_order_data):
+    """Test a refund that loses a race returns 409 and leaves its key free for the retry."""
+    payment = _completed_payment(client, sample_order_data)
+    # Keep the row in the session's identity map, then change it behind the session's back
+    loaded = await async_db_session.get(Payment, payment["id"])
+    async with async_db_session.bind.connect() as conn:
+        await conn.execute(text("UPDATE payments SET version = version + 1 WHERE id = :id"), {"id": payment["id"]})
+        await conn.commit()
+    url = f"/api/v1/payments/{payment['id']}/refund"
+    headers = {"Idempotency-Key": "refund-stale-1"}
+    
+    response = client.post(url, json={"amount": 10}, headers=headers)
+    assert response.status_code == 409
+    assert await async_db_session.get(IdempotencyKey, (f"payments.refund:{payment['id']}", "refund-stale-1")) is None
+    
+    retry = client.post(url, json={"amount": 10}, headers=headers)
+    assert retry.status_code == 200
+    assert "idempotent-replayed" not in retry.headers
+    assert float(retry.json()["refunded_amount"]) == 10.0
+    assert loaded.refunded_amount == 10
+
+
+@pytest.mark.asyncio
+async def test_in_progress_key_conflicts(client: TestClient, async_db_session, sample_order_data):
+    """Test a key claimed by a request that has not finished yet returns 409."""
+    payload = {"order_id": 1, "method": "credit_card", "amount": "10.00", "currency": "USD",
+               "transaction_id": None, "meta_data": None}
+    await IdempotencyService.begin(
+        async_db_session, "payments.create", "payment-1", IdempotencyService.request_hash(payload)
+    )
+    
+    client.post("/api/v1/orders", json=sample_order_data)
+    response = client.post(
+        "/api/v1/payments",
+        json={"order_id": 1, "method": "credit_card", "amount": "10.00"},
+        headers={"Idempotency-Key": "payment-1"},
+    )
+    
+    assert response.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_expired_key_runs_request_again(client: TestClient, async_db_session, sample_order_data):
+    """Test keys past their TTL are ignored and the request runs again."""
+    headers = {"Idempotency-Key": "order-retry-3"}
+    first = client.post("/api/v1/orders", json=sample_order_data, headers=headers).json()
+    
+    record = await async_db_session.get(IdempotencyKey, ("orders.create", "order-retry-3"))
+    record.expires_at = datetime.utcnow() - timedelta(seconds=1)
+    await async_db_session.commit()
+    
+    second = client.post("/api/v1/orders", json=sample_order_data, headers=headers)
+    
+    assert second.status_code == 201
+    assert second.json()["id"] != first["id"]
+    assert "idempotent-replayed" not in second.headers
+
+
+def test_purge_expired_removes_only_expired_keys(db_session):
+    """Test the purge used by the periodic task."""
+    now = datetime.utcnow()
+    for key, expires_at in (("old", now - timedelta(hours=1)), ("fresh", now + timedelta(hours=1))):
+        db_session.add(IdempotencyKey(
+            scope="orders.create", key=key, request_hash="0" * 64,
+            created_at=now - timedelta(days=1), expires_at=expires_at,
+        ))
+    db_session.commit()
+    
+    assert IdempotencyService.purge_expired(db_session, now=now) == 1
+    assert [row.key for row in db_session.query(IdempotencyKey).all()] == ["fresh"]
+
+
+@pytest.mark.asyncio
+async def test_failure_while_storing_response_leaves_nothing_behind(
+    client: TestClient, async_db_session, sample_order_data, monkeypatch
+):
+    """Test a failure after the order is written but before its response is stored rolls both back, so a retry works."""
+    headers = {"Idempotency-Key": "order-crash-1"}
+    
+    async def fail(*args, **kwargs):
+        raise ConnectionError("database connection lost")
+    
+    monkeypatch.setattr(IdempotencyService, "complete", fail)
+    assert client.post("/api/v1/orders", json=sample_order_data, headers=headers).status_code == 400
+    assert await async_db_session.scalar(select(func.count()).select_from(Order)) == 0
+    
+    monkeypatch.undo()
+    retry = client.post("/api/v1/orders", json=sample_order_data, headers=headers)
+    replay = client.post("/api/v1/orders", json=sample_order_data, headers=headers)
+    
+    assert retry.status_code == 201
+    assert "idempotent-replayed" not in retry.headers
+    assert replay.json() == retry.json()
+    assert replay.headers["idempotent-replayed"] == "true"
+    assert await async_db_session.scalar(select(func.count()).select_from(Order)) == 1
+
+
+@pytest.mark.asyncio
+async def test_abandoned_claim_is_taken_over_after_lease(client: TestClient, async_db_session, sample_order_data):
+    """Test a claim left unfinished (e.g. the process died) blocks retries only for IDEMPOTENCY_LEASE_SECONDS."""
+    order = client.post("/api/v1/orders", json=sample_order_data).json()
+    body = {"order_id": order["id"], "method": "credit_card", "amount": "10.00"}
+    payload = {**body, "currency": "USD", "transaction_id": None, "meta_data": None}
+    claim = await IdempotencyService.begin(
+        async_db_session, "payments.create", "payment-crash-1", IdempotencyService.request_hash(payload)
+    )
+    headers = {"Idempotency-Key": "payment-crash-1"}
+    assert client.post("/api/v1/payments", json=body, headers=headers).status_code == 409
+    
+    claim.created_at = datetime.utcnow() - timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS + 1)
+    await async_db_session.commit()
+    response = client.post("/api/v1/payments", json=body, headers=headers)
+    
+    assert response.status_code == 201
+    assert client.post("/api/v1/payments", json=body, headers=headers).json() == response.json()
+
+
+@pytest.mark.asyncio
+async def test_taken_over_request_rolls_back(async_db_session, sample_order_data):
+    """Test a request whose claim was taken over by a retry does not commit its changes."""
+    payload = dict(sample_order_data)
+    claim = await IdempotencyService.begin(
+        async_db_session, "orders.create", "order-slow-1", IdempotencyService.request_hash(payload)
+    )
+    
+    async def create_while_retry_takes_over():
+        order = await OrderService.create_order(async_db_session, OrderCreate(**sample_order_data), commit=False)
+        await async_db_session.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key == "order-slow-1")
+            .values(created_at=datetime.utcnow() + timedelta(seconds=1))
+        )
+        return order
+    
+    with pytest.raises(HTTPException) as excinfo:
+        await run_idempotent(
+            async_db_session, "orders.create", "order-slow-1", payload,
+            create_while_retry_takes_over, OrderResponse, 201,
+        )
+    
+    assert excinfo.value.status_code == 409
+    assert await async_db_session.scalar(select(func.count()).select_from(Order)) == 0
@@ -51,3 +51,193 @@ async def test_get_invoice_not_found(client: TestClient):
     
     assert response.status_code == 404
 
+
+
+@pytest.fixture
+async def stored_invoice(async_db_session, tmp_path):
+    """Create an invoice row backed by a real file, without a stored content hash."""
+    from app.models.invoice import Invoice
+    
+    file_path = tmp_path / "stored_invoice.pdf"
+    file_path.write_bytes(b"%PDF-1.4 " + bytes(range(256)) * 8)
+    invoice = Invoice(
+        invoice_number="INV-TEST-STORED",
+        invoice_type=InvoiceType.ORDER,
+        file_path=str(file_path),
+        file_name="stored_invoice.pdf",
+        file_size=file_path.stat().st_size,
+    )
+    async_db_session.add(invoice)
+    await async_db_session.commit()
+    return invoice
+
+
+@pytest.mark.asyncio
+async def test_download_invoice_sets_etag_and_cache_headers(client: TestClient, stored_invoice):
+    """Test a full download returns the file with a content-hash ETag and immutable caching."""
+    import hashlib
+    from pathlib import Path
+    
+    content = Path(stored_invoice.file_path).read_bytes()
+    response = client.get(f"/api/v1/invoices/{stored_invoice.id}/download")
+    
+    assert response.status_code == 200
+    assert response.content == content
+    assert response.headers["etag"] == f'"{hashlib.sha256(content).hexdigest()}"'
+    assert "immutable" in response.headers["cache-control"]
+    assert response.headers["accept-ranges"] == "bytes"
+    
+    # The hash is backfilled onto the row
+    assert client.get(f"/api/v1/invoices/{stored_invoice.id}").json()["content_hash"] == hashlib.sha256(content).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_download_invoice_if_none_match(client: TestClient, stored_invoice):
+    """Test a matching If-None-Match returns 304 with no body."""
+    etag = client.get(f"/api/v1/invoices/{stored_invoice.id}/download").headers["etag"]
+    
+    response = client.get(
+        f"/api/v1/invoices/{stored_invoice.id}/download",
+        headers={"If-None-Match": f'W/"other", {etag}'},
+    )
+    
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+@pytest.mark.asyncio
+async def test_download_invoice_range(client: TestClient, stored_invoice):
+    """Test byte ranges return 206 partial content and unsatisfiable ranges 416."""
+    from pathlib import Path
+    
+    content = Path(stored_invoice.file_path).read_bytes()
+    url = f"/api/v1/invoices/{stored_invoice.id}/download"
+    
+    response = client.get(url, headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == content[10:20]
+    assert response.headers["content-range"] == f"bytes 10-19/{len(content)}"
+    
+    response = client.get(url, headers={"Range": "bytes=-5"})
+    assert response.status_code == 206
+    assert response.content == content[-5:]
+    
+    response = client.get(url, headers={"Range": f"bytes={len(content)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(content)}"
+    
+    # A stale If-Range falls back to the full file
+    response = client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == content
+
+
+@pytest.mark.asyncio
+async def test_download_invoice_ignores_malformed_range(client: TestClient, stored_invoice):
+    """Test a Range header that is not a valid byte range is ignored (200, full file) rather than 416."""
+    from pathlib import Path
+    
+    content = Path(stored_invoice.file_path).read_bytes()
+    url = f"/api/v1/invoices/{stored_invoice.id}/download"
+    
+    for header in ("bytes=abc", "bytes=5", "bytes=1-x", "bytes=-", "bytes=9-3", "bytes=+1-2"):
+        response = client.get(url, headers={"Range": header})
+        assert response.status_code == 200, header
+        assert response.content == content
+        assert "content-range" not in response.headers
+    
+    # Well-formed but unsatisfiable is still 416
+    assert client.get(url, headers={"Range": "bytes=-0"}).status_code == 416
+
+
+@pytest.mark.asyncio
+async def test_download_invoice_missing_file(client: TestClient, stored_invoice):
+    """Test a download whose file is gone returns 404."""
+    from pathlib import Path
+    
+    Path(stored_invoice.file_path).unlink()
+    response = client.get(f"/api/v1/invoices/{stored_invoice.id}/download")
+    
+    assert response.status_code == 404
+
+
+@pytest.fixture
+async def exportable_invoices(async_db_session, tmp_path, monkeypatch):
+    """Create stored invoices in and around January 2024, one with a missing file."""
+    from datetime import datetime
+    from app.invoice_store import LocalInvoiceStore, invoice_store
+    from app.models.invoice import Invoice
+    
+    if not isinstance(invoice_store, LocalInvoiceStore):
+        pytest.skip("application is configured with a non-local invoice store")
+    monkeypatch.setattr(invoice_store, "root", tmp_path)
+    
+    specs = [
+        ("INV-JAN-1", InvoiceType.ORDER, datetime(2024, 1, 5, 9, 0), b"%PDF-1.4 january one"),
+        ("CM-JAN-2", InvoiceType.RETURN, datetime(2024, 1, 31, 23, 59), b"%PDF-1.4 january credit"),
+        ("INV-JAN-3", InvoiceType.ORDER, datetime(2024, 1, 20, 12, 0), None),
+        ("INV-FEB-1", InvoiceType.ORDER, datetime(2024, 2, 1, 0, 0), b"%PDF-1.4 february"),
+    ]
+    for number, invoice_type, created_at, content in specs:
+        if content is not None:
+            stored = invoice_store.put(content)
+            file_path, content_hash = stored.key, stored.content_hash
+        else:
+            file_path, content_hash = str(tmp_path / "missing.pdf"), None
+        async_db_session.add(Invoice(
+            invoice_number=number,
+            invoice_type=invoice_type,
+            file_path=file_path,
+            file_name=f"{number}.pdf",
+            content_hash=content_hash,
+            created_at=created_at,
+        ))
+    await async_db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_export_invoices_zip(client: TestClient, exportable_invoices):
+    """Test the export streams a ZIP of PDFs in the date range plus a CSV manifest."""
+    import csv
+    import io
+    import zipfile
+    
+    response = client.get("/api/v1/invoices/export", params={"from": "2024-01-01", "to": "2024-01-31"})
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    assert "invoices_2024-01-01_2024-01-31.zip" in response.headers["content-disposition"]
+    
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.namelist() == ["order/INV-JAN-1.pdf", "return/CM-JAN-2.pdf", "manifest.csv"]
+        assert archive.read("order/INV-JAN-1.pdf") == b"%PDF-1.4 january one"
+        manifest = list(csv.DictReader(io.StringIO(archive.read("manifest.csv").decode("utf-8"))))
+    
+    assert [row["invoice_number"] for row in manifest] == ["INV-JAN-1", "INV-JAN-3", "CM-JAN-2"]
+    assert {row["invoice_number"]: row["status"] for row in manifest} == {
+        "INV-JAN-1": "included",
+        "INV-JAN-3": "missing",
+        "CM-JAN-2": "included",
+    }
+
+
+@pytest.mark.asyncio
+async def test_export_invoices_filters_by_type(client: TestClient, exportable_invoices):
+    """Test the type filter limits the export to one invoice type."""
+    import io
+    import zipfile
+    
+    response = client.get("/api/v1/invoices/export", params={"type": "return"})
+    
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.namelist() == ["return/CM-JAN-2.pdf", "manifest.csv"]
+
+
+@pytest.mark.asyncio
+async def test_export_invoices_rejects_inverted_range(client: TestClient):
+    """Test an export whose start date is after its end date is rejected."""
+    response = client.get("/api/v1/invoices/export", params={"from": "2024-02-01", "to": "2024-01-01"})
+    
+    assert response.status_code == 400
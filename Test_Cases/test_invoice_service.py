@@ -2,54 +2,120 @@
 Unit tests for Invoice Service.
 """
 import pytest
-from pathlib import Path
 from decimal import Decimal
 from datetime import datetime, timezone
 
+from app.invoice_store import content_key, is_content_key
 from app.services.invoice_service import InvoiceService
 from app.models.order import Order, OrderItem, OrderStatus
 from app.models.return_model import Return, ReturnItem, ReturnStatus, ReturnReason
 
 
-def test_generate_order_invoice(db_session, sample_order):
-    """Test generating order invoice PDF."""
+@pytest.fixture
+def local_store(tmp_path, monkeypatch):
+    """Point the application's local invoice store at a temporary directory."""
+    from app.invoice_store import LocalInvoiceStore, invoice_store
+    if not isinstance(invoice_store, LocalInvoiceStore):
+        pytest.skip("application is configured with a non-local invoice store")
+    monkeypatch.setattr(invoice_store, "root", tmp_path)
+    return invoice_store
+
+
+def test_generate_order_invoice(db_session, sample_order, local_store):
+    """Test rendering an order invoice PDF and saving it in the invoice store."""
     # Set order to shipped
     sample_order.status = OrderStatus.SHIPPED
     sample_order.shipped_at = datetime.now(timezone.utc)
     db_session.commit()
     
-    invoice_path = InvoiceService.generate_order_invoice(sample_order)
-    
-    assert invoice_path is not None
-    assert Path(invoice_path).exists()
-    assert invoice_path.endswith(".pdf")
-    assert "invoice_order" in invoice_path
+    pdf = InvoiceService.render_order_invoice(sample_order)
+    stored = local_store.put(pdf)
     
-    # Clean up
-    Path(invoice_path).unlink(missing_ok=True)
+    assert pdf.startswith(b"%PDF")
+    assert local_store.path(stored.key).read_bytes() == pdf
+    assert InvoiceService.order_invoice_file_name(sample_order) == f"invoice_order_{sample_order.order_number}.pdf"
 
 
-def test_generate_return_invoice(sample_return, sample_order, db_session):
-    """Test generating return credit memo PDF."""
+def test_generate_return_invoice(sample_return, sample_order, db_session, local_store):
+    """Test rendering a return credit memo PDF and saving it in the invoice store."""
     # Set return to processed
     sample_return.status = ReturnStatus.PROCESSED
     sample_return.processed_at = datetime.now(timezone.utc)
     sample_return.order = sample_order
     db_session.commit()
     
-    invoice_path = InvoiceService.generate_return_invoice(sample_return)
+    pdf = InvoiceService.render_return_invoice(sample_return)
+    stored = local_store.put(pdf)
+    
+    assert pdf.startswith(b"%PDF")
+    assert local_store.path(stored.key).read_bytes() == pdf
+    assert "credit_memo_return" in InvoiceService.return_invoice_file_name(sample_return)
+
+
+def test_invoice_store_is_sharded(sample_order, local_store):
+    """Test stored invoices land in the store's two-level sharded directories."""
+    stored = local_store.put(InvoiceService.render_order_invoice(sample_order))
+    
+    assert stored.key == content_key(stored.content_hash)
+    assert local_store.path(stored.key).parent.parent.parent == local_store.root
+
+
+def test_invoice_rendering_reuses_prebuilt_styles(sample_order, monkeypatch):
+    """Test rendering does not rebuild the stylesheet per invoice."""
+    import app.services.invoice_service as invoice_module
+    
+    def fail():
+        raise AssertionError("stylesheet rebuilt during render")
     
-    assert invoice_path is not None
-    assert Path(invoice_path).exists()
-    assert invoice_path.endswith(".pdf")
-    assert "credit_memo_return" in invoice_path
+    monkeypatch.setattr(invoice_module, "getSampleStyleSheet", fail)
     
-    # Clean up
-    Path(invoice_path).unlink(missing_ok=True)
+    assert InvoiceService.render_order_invoice(sample_order).startswith(b"%PDF")
 
 
-def test_invoice_directory_creation():
-    """Test that invoices directory is created."""
-    assert InvoiceService.INVOICES_DIR.exists()
-    assert InvoiceService.INVOICES_DIR.is_dir()
+def test_generate_order_invoices_batch(db_session, sample_order, local_store):
+    """Test batch rendering in a process pool stores and records one PDF per order, in input order."""
+    invoices = InvoiceService.generate_order_invoices(db_session, [sample_order] * 3, max_workers=2)
+    
+    assert len(invoices) == 3
+    for invoice in invoices:
+        assert invoice.id is not None
+        assert invoice.order_id == sample_order.id
+        assert invoice.file_name == InvoiceService.order_invoice_file_name(sample_order)
+        assert invoice.file_path == content_key(invoice.content_hash)
+        assert local_store.size(invoice.file_path) == invoice.file_size
+    # Identical renders share one stored file
+    assert len({invoice.content_hash for invoice in invoices}) == 1
+
+
+def test_generate_return_invoices_batch_in_process(db_session, sample_return, sample_order, local_store):
+    """Test batch rendering with a single worker renders in-process and goes through the invoice store."""
+    sample_return.order = sample_order
+    
+    invoices = InvoiceService.generate_return_invoices(db_session, [sample_return], max_workers=1)
+    
+    assert len(invoices) == 1
+    assert invoices[0].return_id == sample_return.id
+    assert "credit_memo_return" in invoices[0].file_name
+    assert is_content_key(invoices[0].file_path)
+    assert b"".join(local_store.iter_range(invoices[0].file_path, 0, 4)) == b"%PDF"
+
 
+def test_invoice_record_stores_content_hash(db_session, sample_order, tmp_path):
+    """Test invoice records store the SHA-256 of their file for use as the download ETag."""
+    import hashlib
+    from app.models.invoice import InvoiceType
+    from app.services.invoice_storage_service import InvoiceStorageService
+    
+    file_path = tmp_path / "hashed.pdf"
+    file_path.write_bytes(b"%PDF-1.4 hashed")
+    
+    invoice = InvoiceStorageService.create_invoice_record_sync(
+        db_session,
+        invoice_type=InvoiceType.ORDER,
+        file_path=str(file_path),
+        file_name="hashed.pdf",
+        order_id=sample_order.id,
+    )
+    
+    assert invoice.content_hash == hashlib.sha256(b"%PDF-1.4 hashed").hexdigest()
+    assert InvoiceStorageService.compute_content_hash(str(tmp_path / "missing.pdf")) is None
@@ -0,0 +1,157 @@
+"""
+Unit tests for the content-addressed invoice store.
+"""
+import hashlib
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.invoice_store import LocalInvoiceStore, S3InvoiceStore, content_key, invoice_store, is_content_key
+from app.models.invoice import InvoiceType
+from app.services.invoice_storage_service import InvoiceStorageService
+
+
+class _NotFound(Exception):
+    """Mimics botocore's ClientError for a missing object."""
+    
+    def __init__(self):
+        super().__init__("Not Found")
+        self.response = {"Error": {"Code": "404"}}
+
+
+class InMemoryS3Client:
+    """Local stand-in for an S3 client: the subset of the boto3 API the store uses."""
+    
+    def __init__(self):
+        self.objects = {}
+        self.puts = 0
+    
+    def put_object(self, Bucket, Key, Body, ContentType=None):
+        self.puts += 1
+        self.objects[(Bucket, Key)] = bytes(Body)
+    
+    def head_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise _NotFound()
+        return {"ContentLength": len(self.objects[(Bucket, Key)])}
+    
+    def get_object(self, Bucket, Key, Range=None):
+        if (Bucket, Key) not in self.objects:
+            raise _NotFound()
+        data = self.objects[(Bucket, Key)]
+        if Range:
+            start, end = Range[len("bytes="):].split("-")
+            data = data[int(start):int(end) + 1]
+        return {"Body": io.BytesIO(data)}
+    
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+
+@pytest.fixture
+def local_store(tmp_path, monkeypatch):
+    """Point the application's local invoice store at a temporary directory."""
+    if not isinstance(invoice_store, LocalInvoiceStore):
+        pytest.skip("application is configured with a non-local invoice store")
+    monkeypatch.setattr(invoice_store, "root", tmp_path)
+    return invoice_store
+
+
+def test_content_key_is_sharded():
+    """Test keys shard by the first two byte pairs of the hash."""
+    content_hash = hashlib.sha256(b"pdf").hexdigest()
+    key = content_key(content_hash)
+    
+    assert key == f"{content_hash[:2]}/{content_hash[2:4]}/{content_hash}.pdf"
+    assert is_content_key(key)
+    assert not is_content_key("invoices/invoice_order_ORD-1_20240101_120000.pdf")
+
+
+def test_local_store_deduplicates_identical_content(tmp_path):
+    """Test storing the same bytes twice keeps one file and returns the same key."""
+    store = LocalInvoiceStore(str(tmp_path))
+    
+    first = store.put(b"%PDF-1.4 same")
+    second = store.put(b"%PDF-1.4 same")
+    other = store.put(b"%PDF-1.4 different")
+    
+    assert first == second
+    assert first.key != other.key
+    assert first.content_hash == hashlib.sha256(b"%PDF-1.4 same").hexdigest()
+    assert len([path for path in tmp_path.rglob("*.pdf")]) == 2
+    assert (tmp_path / first.key).read_bytes() == b"%PDF-1.4 same"
+
+
+def test_local_store_reads_ranges_and_legacy_paths(tmp_path):
+    """Test ranged reads, and that non-content keys resolve as plain file paths."""
+    store = LocalInvoiceStore(str(tmp_path / "store"))
+    stored = store.put(b"0123456789")
+    
+    assert store.size(stored.key) == 10
+    assert b"".join(store.iter_range(stored.key, 2, 5, chunk_size=2)) == b"23456"
+    
+    legacy = tmp_path / "legacy_invoice.pdf"
+    legacy.write_bytes(b"legacy")
+    assert store.read(str(legacy)) == b"legacy"
+    
+    store.delete(stored.key)
+    assert store.size(stored.key) is None
+
+
+def test_s3_store_against_local_stand_in():
+    """Test the S3 store deduplicates, reads ranges and reports missing objects."""
+    client = InMemoryS3Client()
+    store = S3InvoiceStore("invoices", prefix="pdf/", client=client)
+    
+    first = store.put(b"%PDF-1.4 s3")
+    second = store.put(b"%PDF-1.4 s3")
+    
+    assert first.key == second.key
+    assert client.puts == 1
+    assert ("invoices", "pdf/" + first.key) in client.objects
+    assert store.size(first.key) == len(b"%PDF-1.4 s3")
+    assert b"".join(store.iter_range(first.key, 5, 3)) == b"1.4"
+    assert store.size(content_key("0" * 64)) is None
+
+
+def test_store_invoice_sync_records_store_key(db_session, sample_order, local_store):
+    """Test the Celery path records the store key, size and hash on the invoice row."""
+    content = b"%PDF-1.4 rendered"
+    
+    invoice = InvoiceStorageService.store_invoice_sync(
+        db_session,
+        invoice_type=InvoiceType.ORDER,
+        content=content,
+        file_name="invoice_order_ORD-TEST-001.pdf",
+        order_id=sample_order.id,
+    )
+    
+    assert is_content_key(invoice.file_path)
+    assert invoice.content_hash == hashlib.sha256(content).hexdigest()
+    assert invoice.file_size == len(content)
+    assert local_store.read(invoice.file_path) == content
+
+
+@pytest.mark.asyncio
+async def test_download_resolves_file_through_store(client: TestClient, async_db_session, local_store):
+    """Test downloads of stored invoices are served from the store."""
+    from app.models.invoice import Invoice
+    
+    stored = local_store.put(b"%PDF-1.4 served from the store")
+    invoice = Invoice(
+        invoice_number="INV-TEST-STORE",
+        invoice_type=InvoiceType.ORDER,
+        file_path=stored.key,
+        file_name="invoice.pdf",
+        file_size=stored.size,
+        content_hash=stored.content_hash,
+    )
+    async_db_session.add(invoice)
+    await async_db_session.commit()
+    
+    response = client.get(f"/api/v1/invoices/{invoice.id}/download", headers={"Range": "bytes=0-7"})
+    
+    assert response.status_code == 206
+    assert response.content == b"%PDF-1.4"
+    assert response.headers["etag"] == f'"{stored.content_hash}"'
@@ -0,0 +1,147 @@
+"""
+Tests for the Prometheus metrics endpoint and its recorders.
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app import metrics
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_request_latency_by_route(client: TestClient):
+    """Test request latency is labelled by route template and status."""
+    labels = {"method": "GET", "route": "/api/v1/orders/{order_id}", "status": "404"}
+    before = sample("http_request_duration_seconds_count", **labels)
+    
+    client.get("/api/v1/orders/999991")
+    client.get("/api/v1/orders/999992")
+    response = client.get("/metrics")
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "http_request_duration_seconds_bucket" in response.text
+    assert "db_pool_size" in response.text
+    assert sample("http_request_duration_seconds_count", **labels) == before + 2
+
+
+@pytest.mark.asyncio
+async def test_state_transitions_are_counted_by_action_and_outcome(client: TestClient, sample_order_data):
+    """Test successful, rejected and unknown actions are counted separately."""
+    success = {"entity": "order", "action": "confirm", "outcome": "success"}
+    rejected = {"entity": "order", "action": "confirm", "outcome": "rejected"}
+    unknown = {"entity": "order", "action": "unknown", "outcome": "rejected"}
+    before = [sample("state_transitions_total", **labels) for labels in (success, rejected, unknown)]
+    order_id = client.post("/api/v1/orders", json=sample_order_data).json()["id"]
+    
+    assert client.post(f"/api/v1/orders/{order_id}/state", json={"action": "confirm"}).status_code == 200
+    assert client.post(f"/api/v1/orders/{order_id}/state", json={"action": "Confirm"}).status_code == 400
+    assert client.post(f"/api/v1/orders/{order_id}/state", json={"action": "teleport"}).status_code == 400
+    
+    after = [sample("state_transitions_total", **labels) for labels in (success, rejected, unknown)]
+    assert [b - a for a, b in zip(before, after)] == [1, 1, 1]
+
+
+def test_celery_signals_record_queue_wait_and_duration(monkeypatch):
+    """Test the publish header feeds the queue-wait histogram and runs are timed by state."""
+    headers = {}
+    metrics._stamp_published_at(headers=headers)
+    assert metrics.PUBLISHED_AT_HEADER in headers
+    
+    task = SimpleNamespace(name="test_metrics_task", request=SimpleNamespace(published_at=headers["published_at"] - 2))
+    metrics._task_started(task_id="t-1", task=task)
+    metrics._task_finished(task_id="t-1", task=task, state="SUCCESS")
+    
+    assert sample("celery_task_queue_wait_seconds_count", task="test_metrics_task") == 1
+    assert sample("celery_task_queue_wait_seconds_sum", task="test_metrics_task") >= 2
+    assert sample("celery_task_duration_seconds_count", task="test_metrics_task", state="SUCCESS") == 1
+    assert "t-1" not in metrics._task_starts
+
+
+def test_invoice_render_records_duration_and_size():
+    """Test invoice renders are recorded per invoice type."""
+    before = sample("invoice_size_bytes_sum", invoice_type="order")
+    
+    metrics.observe_invoice_render("order", 0.05, 12_345)
+    
+    assert sample("invoice_size_bytes_sum", invoice_type="order") == before + 12_345
+    assert sample("invoice_render_duration_seconds_count", invoice_type="order") >= 1
+
+
+def test_queue_depth_is_cached_between_scrapes(monkeypatch):
+    """Test the broker is asked at most once per cache interval."""
+    collector = metrics.QueueDepthCollector()
+    calls = []
+    monkeypatch.setattr(collector, "_read_depths", lambda: calls.append(1) or {"celery": 7})
+    monkeypatch.setattr(metrics.settings, "METRICS_QUEUE_DEPTH_CACHE_SECONDS", 60.0)
+    
+    first = list(collector.collect())[0]
+    second = list(collector.collect())[0]
+    
+    assert len(calls) == 1
+    assert [s.value for s in first.samples] == [s.value for s in second.samples] == [7]
+
+
+def test_queue_depth_broker_errors_are_not_fatal(monkeypatch):
+    """Test an unreachable broker leaves the gauge empty instead of failing the scrape."""
+    collector = metrics.QueueDepthCollector()
+    
+    def unreachable():
+        raise ConnectionError("broker down")
+    monkeypatch.setattr(collector, "_read_depths", unreachable)
+    
+    family = list(collector.collect())[0]
+    
+    assert family.samples == []
+
+
+def test_metrics_endpoint_reads_the_broker_off_the_event_loop(client: TestClient, monkeypatch):
+    """Test the queue depth is read in the threadpool, so a slow broker cannot block other requests."""
+    threads = []
+    
+    def read_depths():
+        try:
+            asyncio.get_running_loop()
+            threads.append("event loop")
+        except RuntimeError:
+            threads.append("worker thread")
+        return {"celery": 0}
+    
+    monkeypatch.setattr(metrics.queue_depth_collector, "_read_depths", read_depths)
+    monkeypatch.setattr(metrics.settings, "METRICS_QUEUE_DEPTH_ENABLED", True)
+    monkeypatch.setattr(metrics.settings, "METRICS_QUEUE_DEPTH_CACHE_SECONDS", 0.0)
+    
+    assert client.get("/metrics").status_code == 200
+    assert threads == ["worker thread"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_transitions_count_conflicts_when_the_commit_fails(client: TestClient, sample_order_data, monkeypatch):
+    """Test a bulk batch whose commit loses a race is counted as conflicts, not successes."""
+    from app.services import order_service
+    from app.services.concurrency import ConcurrentUpdateError
+    
+    success = {"entity": "order", "action": "confirm", "outcome": "success"}
+    conflict = {"entity": "order", "action": "confirm", "outcome": "conflict"}
+    order_ids = [client.post("/api/v1/orders", json=sample_order_data).json()["id"] for _ in range(3)]
+    before = [sample("state_transitions_total", **labels) for labels in (success, conflict)]
+    
+    async def lose_race(db, entity=None):
+        await db.rollback()
+        raise ConcurrentUpdateError("Rows were modified by a concurrent request; reload them and retry")
+    
+    monkeypatch.setattr(order_service, "commit_versioned", lose_race)
+    response = client.post(
+        "/api/v1/orders/state:bulk", json=[{"order_id": order_id, "action": "confirm"} for order_id in order_ids]
+    )
+    
+    assert response.status_code == 409
+    after = [sample("state_transitions_total", **labels) for labels in (success, conflict)]
+    assert [b - a for a, b in zip(before, after)] == [0, 3]
@@ -4,6 +4,8 @@ Unit tests for Order API endpoints.
 import pytest
 from fastapi.testclient import TestClient
 
+from app.schemas.order import ORDER_SUMMARY_FIELDS
+
 
 @pytest.mark.asyncio
 async def test_create_order(client: TestClient, sample_order_data):
@@ -93,3 +95,205 @@ async def test_cancel_order(client: TestClient, sample_order):
     data = response.json()
     assert data["status"] == "cancelled"
 
+
+
+@pytest.mark.asyncio
+async def test_list_orders_cursor(client: TestClient, sample_order_data):
+    """Test keyset pagination via the X-Next-Cursor header."""
+    for _ in range(3):
+        client.post("/api/v1/orders", json=sample_order_data)
+    
+    response = client.get("/api/v1/orders", params={"limit": 2})
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    cursor = response.headers["X-Next-Cursor"]
+    
+    response = client.get("/api/v1/orders", params={"limit": 2, "cursor": cursor})
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+    assert "X-Next-Cursor" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_list_orders_invalid_cursor(client: TestClient):
+    """Test listing orders with a malformed cursor."""
+    response = client.get("/api/v1/orders", params={"cursor": "garbage"})
+    
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_create_orders_bulk(client: TestClient, sample_order_data):
+    """Test bulk order creation via API."""
+    invalid_order = dict(sample_order_data, items=[])
+    response = client.post(
+        "/api/v1/orders/bulk",
+        json=[sample_order_data, invalid_order, sample_order_data],
+    )
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 2
+    assert data["failed"] == 1
+    assert data["results"][0]["success"] is True
+    assert len(data["results"][0]["order"]["items"]) == 2
+    assert data["results"][1]["success"] is False
+    assert data["results"][1]["error"]
+
+
+@pytest.mark.asyncio
+async def test_create_orders_bulk_empty(client: TestClient):
+    """Test bulk order creation with no orders."""
+    response = client.post("/api/v1/orders/bulk", json=[])
+    
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_create_order_query_count(client: TestClient, sample_order_data, sql_queries):
+    """Test creating an order only writes, with no re-select afterwards."""
+    response = client.post("/api/v1/orders", json=sample_order_data)
+    
+    assert response.status_code == 201
+    assert len(response.json()["items"]) == 2
+    assert sql_queries.count("SELECT") == 0
+    assert sql_queries.count("INSERT") <= 1 + len(sample_order_data["items"])
+
+
+@pytest.mark.asyncio
+async def test_update_order_query_count(client: TestClient, sample_order_data, sql_queries):
+    """Test updating an order does not reload it after commit."""
+    order_id = client.post("/api/v1/orders", json=sample_order_data).json()["id"]
+    sql_queries.clear()
+    
+    response = client.patch(f"/api/v1/orders/{order_id}", json={"notes": "Leave at door"})
+    
+    assert response.status_code == 200
+    assert response.json()["notes"] == "Leave at door"
+    assert len(response.json()["items"]) == 2
+    assert sql_queries.count("UPDATE") == 1
+    assert sql_queries.selects_after_write() == 0
+
+
+@pytest.mark.asyncio
+async def test_update_order_state_query_count(client: TestClient, sample_order_data, sql_queries):
+    """Test a state transition does not reload the order after commit."""
+    order_id = client.post("/api/v1/orders", json=sample_order_data).json()["id"]
+    sql_queries.clear()
+    
+    response = client.post(f"/api/v1/orders/{order_id}/state", json={"action": "confirm"})
+    
+    assert response.status_code == 200
+    assert response.json()["status"] == "confirmed"
+    assert sql_queries.count("UPDATE") == 1
+    assert sql_queries.selects_after_write() == 0
+
+
+@pytest.mark.asyncio
+async def test_update_order_states_bulk(client: TestClient, sample_order_data):
+    """Test bulk state transitions report a result per transition."""
+    created = client.post("/api/v1/orders/bulk", json=[sample_order_data] * 3).json()
+    first, second, third = (result["order"]["id"] for result in created["results"])
+    
+    response = client.post(
+        "/api/v1/orders/state:bulk",
+        json=[
+            {"order_id": first, "action": "confirm"},
+            {"order_id": second, "action": "confirm"},
+            {"order_id": third, "action": "ship"},
+            {"order_id": 99999, "action": "confirm"},
+            {"order_id": first, "action": "start_processing"},
+        ],
+    )
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["succeeded"] == 3
+    assert data["failed"] == 2
+    assert [result["success"] for result in data["results"]] == [True, True, False, False, True]
+    assert "Cannot perform action 'ship'" in data["results"][2]["error"]
+    assert data["results"][3]["error"] == "Order 99999 not found"
+    
+    assert client.get(f"/api/v1/orders/{first}").json()["status"] == "processing"
+    assert client.get(f"/api/v1/orders/{second}").json()["status"] == "confirmed"
+    assert client.get(f"/api/v1/orders/{third}").json()["status"] == "pending"
+
+
+@pytest.mark.asyncio
+async def test_update_order_states_bulk_repeated_order(client: TestClient, sample_order_data):
+    """Test each entry for a repeated order reports the state produced by its own action."""
+    order_id = client.post("/api/v1/orders", json=sample_order_data).json()["id"]
+    
+    response = client.post(
+        "/api/v1/orders/state:bulk",
+        json=[
+            {"order_id": order_id, "action": "confirm"},
+            {"order_id": order_id, "action": "deliver"},
+            {"order_id": order_id, "action": "start_processing"},
+            {"order_id": order_id, "action": "ship"},
+        ],
+    )
+    
+    results = response.json()["results"]
+    assert [result["success"] for result in results] == [True, False, True, True]
+    assert [result["order"]["status"] for result in results if result["success"]] == ["confirmed", "processing", "shipped"]
+    assert client.get(f"/api/v1/orders/{order_id}").json()["status"] == "shipped"
+
+
+@pytest.mark.asyncio
+async def test_update_order_states_bulk_empty(client: TestClient):
+    """Test bulk state transitions with no transitions."""
+    response = client.post("/api/v1/orders/state:bulk", json=[])
+    
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_update_order_states_bulk_query_count(client: TestClient, sample_order_data, sql_queries):
+    """Test bulk transitions load all orders up front instead of once per order."""
+    created = client.post("/api/v1/orders/bulk", json=[sample_order_data] * 10).json()
+    transitions = [{"order_id": result["order"]["id"], "action": "confirm"} for result in created["results"]]
+    sql_queries.clear()
+    
+    response = client.post("/api/v1/orders/state:bulk", json=transitions)
+    
+    assert response.json()["succeeded"] == 10
+    # One query for the orders and one for their items
+    assert sql_queries.count("SELECT") == 2
+    assert sql_queries.selects_after_write() == 0
+
+
+@pytest.mark.asyncio
+async def test_list_orders_summary_view(client: TestClient, sample_order_data, sql_queries):
+    """Test view=summary returns only summary fields and skips items and address columns."""
+    for _ in range(3):
+        client.post("/api/v1/orders", json=sample_order_data)
+    sql_queries.clear()
+    
+    response = client.get("/api/v1/orders", params={"view": "summary", "limit": 2})
+    
+    assert response.status_code == 200
+    orders = response.json()
+    assert len(orders) == 2
+    assert set(orders[0]) == set(ORDER_SUMMARY_FIELDS)
+    assert orders[0]["status"] == "pending"
+    assert "X-Next-Cursor" in response.headers
+    assert len(sql_queries.statements) == 1
+    assert "ADDRESS" not in sql_queries.statements[0]
+    assert "ORDER_ITEMS" not in sql_queries.statements[0]
+
+
+@pytest.mark.asyncio
+async def test_list_orders_fields(client: TestClient, sample_order_data):
+    """Test fields= returns the requested fields (plus id), loading items only when asked."""
+    client.post("/api/v1/orders", json=sample_order_data)
+    
+    response = client.get("/api/v1/orders", params={"fields": "total,items"})
+    
+    assert response.status_code == 200
+    order = response.json()[0]
+    assert set(order) == {"id", "total", "items"}
+    assert len(order["items"]) == 2
+    
+    assert client.get("/api/v1/orders", params={"fields": "total,password"}).status_code == 400
+    assert client.get("/api/v1/orders", params={"fields": "total", "view": "summary"}).status_code == 400
@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.services.order_service import OrderService
 from app.models.order import Order, OrderStatus
 from app.schemas.order import OrderCreate, OrderUpdate, OrderItemCreate
+from app.services.pagination import next_cursor
 
 
 @pytest.mark.asyncio
@@ -176,3 +177,82 @@ async def test_transition_order_state_cancel(async_db_session: AsyncSession, sam
     assert order.status == OrderStatus.CANCELLED
     assert order.cancelled_at is not None
 
+
+
+@pytest.mark.asyncio
+async def test_list_orders_cursor_pagination(async_db_session: AsyncSession, sample_order_data):
+    """Test keyset pagination walks every order exactly once."""
+    created = []
+    for _ in range(5):
+        order = await OrderService.create_order(async_db_session, OrderCreate(**sample_order_data))
+        created.append(order.id)
+    
+    first_page = await OrderService.list_orders(async_db_session, limit=2)
+    assert len(first_page) == 2
+    
+    seen = [o.id for o in first_page]
+    cursor = next_cursor(first_page, 2)
+    while cursor:
+        page = await OrderService.list_orders(async_db_session, limit=2, cursor=cursor)
+        seen.extend(o.id for o in page)
+        cursor = next_cursor(page, 2)
+    
+    assert sorted(seen) == sorted(created)
+    assert len(seen) == len(set(seen))
+
+
+@pytest.mark.asyncio
+async def test_list_orders_invalid_cursor(async_db_session: AsyncSession):
+    """Test listing orders with a malformed cursor."""
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        await OrderService.list_orders(async_db_session, cursor="not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_create_orders_bulk(async_db_session: AsyncSession, sample_order_data):
+    """Test bulk order creation reports a result per input order."""
+    invalid_data = dict(sample_order_data, items=[])
+    orders_data = [
+        OrderCreate(**sample_order_data),
+        OrderCreate(**invalid_data),
+        OrderCreate(**sample_order_data),
+    ]
+    
+    results = await OrderService.create_orders_bulk(async_db_session, orders_data)
+    
+    assert len(results) == 3
+    first, second, third = results
+    assert first[0] is not None and first[1] is None
+    assert second[0] is None and "empty" in second[1].lower()
+    assert third[0] is not None
+    assert first[0].order_number != third[0].order_number
+    assert len(first[0].items) == 2
+    assert first[0].total == Decimal("280.00")
+    
+    orders = await OrderService.list_orders(async_db_session)
+    assert len(orders) == 2
+
+
+@pytest.mark.asyncio
+async def test_transition_orders_bulk_queues_invoices_in_chunks(async_db_session: AsyncSession, sample_order_data, monkeypatch):
+    """Test shipping many orders queues one invoice task per chunk through the outbox."""
+    from sqlalchemy import select
+    from app.config import settings
+    from app.models.outbox import OutboxMessage
+    
+    outcomes = await OrderService.create_orders_bulk(async_db_session, [OrderCreate(**sample_order_data)] * 5)
+    orders = [order for order, _ in outcomes]
+    for order in orders:
+        order.status = OrderStatus.PROCESSING
+    await async_db_session.commit()
+    monkeypatch.setattr(settings, "INVOICE_TASK_CHUNK_SIZE", 2)
+    
+    results = await OrderService.transition_orders_bulk(
+        async_db_session, [(order.id, "ship") for order in orders]
+    )
+    
+    assert all(order is not None and order.status == OrderStatus.SHIPPED for order, _ in results)
+    messages = (await async_db_session.scalars(select(OutboxMessage).order_by(OutboxMessage.id))).all()
+    ids = [order.id for order in orders]
+    assert [message.task_name for message in messages] == ["generate_order_invoices"] * 3
+    assert [message.args for message in messages] == [[ids[0:2]], [ids[2:4]], [ids[4:5]]]
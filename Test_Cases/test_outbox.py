@@ -0,0 +1,103 @@
+"""
+Tests for the transactional outbox and its relay.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.order import OrderStatus
+from app.models.outbox import OutboxMessage
+from app.schemas.order import OrderCreate
+from app.services.concurrency import ConcurrentUpdateError
+from app.services.order_service import OrderService
+from app.services.outbox_service import OutboxService
+
+
+async def _processing_order(db: AsyncSession, order_data: dict):
+    order = await OrderService.create_order(db, OrderCreate(**order_data))
+    order.status = OrderStatus.PROCESSING
+    await db.commit()
+    return order
+
+
+@pytest.mark.asyncio
+async def test_ship_writes_outbox_message_with_transition(async_db_session: AsyncSession, sample_order_data):
+    """Test shipping records the invoice task in the outbox instead of calling the broker."""
+    order = await _processing_order(async_db_session, sample_order_data)
+    
+    await OrderService.transition_order_state(async_db_session, order, "ship")
+    
+    messages = (await async_db_session.scalars(select(OutboxMessage))).all()
+    assert len(messages) == 1
+    assert messages[0].task_name == "generate_order_invoice"
+    assert messages[0].args == [order.id]
+    assert messages[0].dispatched_at is None
+
+
+@pytest.mark.asyncio
+async def test_failed_transition_leaves_no_outbox_message(async_db_session: AsyncSession, sample_order_data):
+    """Test the outbox message is rolled back with a transition that loses a race."""
+    order = await _processing_order(async_db_session, sample_order_data)
+    async with async_db_session.bind.connect() as conn:
+        await conn.execute(text("UPDATE orders SET version = version + 1 WHERE id = :id"), {"id": order.id})
+        await conn.commit()
+    
+    with pytest.raises(ConcurrentUpdateError):
+        await OrderService.transition_order_state(async_db_session, order, "ship")
+    
+    assert (await async_db_session.scalars(select(OutboxMessage))).all() == []
+
+
+def test_relay_publishes_oldest_first_in_batches(db_session):
+    """Test the relay publishes pending messages in order and marks them dispatched."""
+    for order_id in range(1, 6):
+        OutboxService.enqueue(db_session, "generate_order_invoice", order_id)
+    db_session.commit()
+    published = []
+    
+    first = OutboxService.relay_batch(db_session, lambda name, args: published.append((name, args)), batch_size=3)
+    second = OutboxService.relay_batch(db_session, lambda name, args: published.append((name, args)), batch_size=3)
+    third = OutboxService.relay_batch(db_session, lambda name, args: published.append((name, args)), batch_size=3)
+    
+    assert (first, second, third) == (3, 2, 0)
+    assert published == [("generate_order_invoice", [order_id]) for order_id in range(1, 6)]
+    assert OutboxService.pending_count(db_session) == 0
+
+
+def test_relay_stops_at_publish_failure_and_retries(db_session):
+    """Test a broker failure keeps the message pending, with the error recorded."""
+    for order_id in range(1, 4):
+        OutboxService.enqueue(db_session, "generate_order_invoice", order_id)
+    db_session.commit()
+    published = []
+    
+    def flaky_publish(name, args):
+        if args == [2]:
+            raise ConnectionError("broker unavailable")
+        published.append(args)
+    
+    assert OutboxService.relay_batch(db_session, flaky_publish) == 1
+    failed = db_session.query(OutboxMessage).filter(OutboxMessage.dispatched_at.is_(None)).order_by(OutboxMessage.id).first()
+    assert failed.args == [2]
+    assert failed.attempts == 1
+    assert "broker unavailable" in failed.last_error
+    
+    assert OutboxService.relay_batch(db_session, lambda name, args: published.append(args)) == 2
+    assert published == [[1], [2], [3]]
+    assert OutboxService.pending_count(db_session) == 0
+
+
+def test_purge_keeps_pending_messages(db_session):
+    """Test purging removes only messages dispatched before the cutoff."""
+    now = datetime.utcnow()
+    db_session.add_all([
+        OutboxMessage(task_name="t", args=[1], dispatched_at=now - timedelta(days=8)),
+        OutboxMessage(task_name="t", args=[2], dispatched_at=now),
+        OutboxMessage(task_name="t", args=[3]),
+    ])
+    db_session.commit()
+    
+    assert OutboxService.purge_dispatched(db_session, before=now - timedelta(days=7)) == 1
+    assert sorted(message.args[0] for message in db_session.query(OutboxMessage)) == [2, 3]
@@ -71,3 +71,58 @@ async def test_refund_payment(client: TestClient, sample_payment):
     data = response.json()
     assert data["status"] in ["refunded", "partially_refunded"]
 
+
+
+@pytest.fixture
+def api_order_id(client: TestClient, sample_order_data):
+    """Create an order through the API and return its ID."""
+    return client.post("/api/v1/orders", json=sample_order_data).json()["id"]
+
+
+def _create_payment(client: TestClient, order_id: int) -> dict:
+    response = client.post(
+        "/api/v1/payments",
+        json={"order_id": order_id, "method": "credit_card", "amount": 280.00},
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_create_payment_query_count(client: TestClient, api_order_id, sql_queries):
+    """Test creating a payment does not refresh it after commit."""
+    _create_payment(client, api_order_id)
+    
+    assert sql_queries.count("INSERT") == 1
+    assert sql_queries.selects_after_write() == 0
+
+
+@pytest.mark.asyncio
+async def test_update_payment_query_count(client: TestClient, api_order_id, sql_queries):
+    """Test updating a payment does not refresh it after commit."""
+    payment = _create_payment(client, api_order_id)
+    sql_queries.clear()
+    
+    response = client.patch(f"/api/v1/payments/{payment['id']}", json={"notes": "Gateway retry"})
+    
+    assert response.status_code == 200
+    assert response.json()["notes"] == "Gateway retry"
+    assert sql_queries.selects_after_write() == 0
+
+
+@pytest.mark.asyncio
+async def test_process_and_refund_payment_query_count(client: TestClient, api_order_id, sql_queries):
+    """Test processing and refunding a payment do not refresh it after commit."""
+    payment = _create_payment(client, api_order_id)
+    sql_queries.clear()
+    
+    response = client.post(f"/api/v1/payments/{payment['id']}/process")
+    assert response.status_code == 200
+    assert response.json()["status"] == "completed"
+    assert sql_queries.selects_after_write() == 0
+    
+    sql_queries.clear()
+    response = client.post(f"/api/v1/payments/{payment['id']}/refund", json={"amount": 30.00})
+    assert response.status_code == 200
+    assert response.json()["status"] == "partially_refunded"
+    assert sql_queries.selects_after_write() == 0
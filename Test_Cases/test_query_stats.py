@@ -0,0 +1,97 @@
+"""
+Tests for per-request query statistics, Server-Timing and the query budget.
+"""
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.query_stats import QueryStatsRegistry, RequestQueryStats, query_stats
+
+
+@pytest.fixture
+def fresh_query_stats():
+    query_stats.clear()
+    yield query_stats
+    query_stats.clear()
+
+
+@pytest.mark.asyncio
+async def test_server_timing_reports_request_queries(client: TestClient, sample_order_data):
+    """Test each response carries the query count and DB time of its request."""
+    order_id = client.post("/api/v1/orders", json=sample_order_data).json()["id"]
+    
+    response = client.post(f"/api/v1/orders/{order_id}/state", json={"action": "confirm"})
+    
+    timing = response.headers["server-timing"]
+    assert timing.startswith("db;dur=")
+    # Load the order with its items, then the UPDATE
+    assert 'desc="3 queries"' in timing
+
+
+@pytest.mark.asyncio
+async def test_query_metrics_aggregate_by_route(client: TestClient, sample_order_data, fresh_query_stats):
+    """Test /metrics/queries groups requests by route template, not by concrete path."""
+    first = client.post("/api/v1/orders", json=sample_order_data).json()["id"]
+    second = client.post("/api/v1/orders", json=sample_order_data).json()["id"]
+    client.get(f"/api/v1/orders/{first}")
+    client.get(f"/api/v1/orders/{second}")
+    
+    data = client.get("/metrics/queries").json()
+    
+    route = data["routes"]["GET /api/v1/orders/{order_id}"]
+    assert route["requests"] == 2
+    assert route["queries_max"] >= 1
+    assert data["routes"]["POST /api/v1/orders"]["requests"] == 2
+    assert data["slowest"] and all("statement" in entry for entry in data["slowest"])
+
+
+@pytest.mark.asyncio
+async def test_slow_queries_are_logged(client: TestClient, caplog, monkeypatch):
+    """Test statements over SLOW_QUERY_MS are logged."""
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0)
+    
+    with caplog.at_level(logging.WARNING, logger="app.query_stats"):
+        client.get("/api/v1/orders")
+    
+    assert any("Slow query" in record.message and "FROM orders" in record.message for record in caplog.records)
+
+
+def test_request_stats_keep_only_slowest_statements():
+    """Test a request keeps its top-N slowest statements."""
+    stats = RequestQueryStats(top_n=2)
+    for seconds, statement in [(0.1, "a"), (0.5, "b"), (0.2, "c"), (0.05, "d")]:
+        stats.record(statement, seconds)
+    
+    assert stats.count == 4
+    assert sorted(stats.slowest, reverse=True) == [(0.5, "b"), (0.2, "c")]
+
+
+def test_registry_notifies_budget_observers():
+    """Test observers (used by the query budget fixture) see every recorded request."""
+    registry = QueryStatsRegistry(top_n=5)
+    seen = []
+    observer = lambda route, stats: seen.append((route, stats.count))
+    registry.add_observer(observer)
+    
+    stats = RequestQueryStats(top_n=5)
+    stats.record("SELECT 1", 0.001)
+    registry.record("GET /x", stats)
+    registry.remove_observer(observer)
+    registry.record("GET /x", stats)
+    
+    assert seen == [("GET /x", 1)]
+    assert registry.snapshot()["routes"]["GET /x"]["requests"] == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.query_budget(2)
+async def test_get_order_within_query_budget(client: TestClient, async_db_session, sample_order_data):
+    """Test fetching an order stays within two queries (order + items)."""
+    from app.schemas.order import OrderCreate
+    from app.services.order_service import OrderService
+    
+    order = await OrderService.create_order(async_db_session, OrderCreate(**sample_order_data))
+    
+    assert client.get(f"/api/v1/orders/{order.id}").status_code == 200
@@ -3,7 +3,8 @@ Unit tests for Return API endpoints.
 """
 import pytest
 from fastapi.testclient import TestClient
-from app.models.order import OrderStatus
+from app.models.order import Order, OrderStatus
+from app.schemas.return_schema import RETURN_SUMMARY_FIELDS
 
 
 @pytest.mark.asyncio
@@ -79,3 +80,78 @@ async def test_reject_return(client: TestClient, sample_return):
     data = response.json()
     assert data["status"] == "rejected"
 
+
+
+@pytest.fixture
+async def delivered_order(client: TestClient, sample_order_data, async_db_session):
+    """Create an order through the API and mark it delivered."""
+    order_id = client.post("/api/v1/orders", json=sample_order_data).json()["id"]
+    order = await async_db_session.get(Order, order_id)
+    order.status = OrderStatus.DELIVERED
+    await async_db_session.commit()
+    return client.get(f"/api/v1/orders/{order_id}").json()
+
+
+def _return_payload(order: dict) -> dict:
+    item = order["items"][0]
+    return {
+        "order_id": order["id"],
+        "reason": "defective",
+        "items": [{
+            "order_item_id": item["id"],
+            "product_id": item["product_id"],
+            "product_name": item["product_name"],
+            "product_sku": item["product_sku"],
+            "quantity": 1,
+        }],
+    }
+
+
+@pytest.mark.asyncio
+async def test_create_return_query_count(client: TestClient, delivered_order, sql_queries):
+    """Test creating a return does not reload it after commit."""
+    response = client.post("/api/v1/returns", json=_return_payload(delivered_order))
+    
+    assert response.status_code == 201
+    assert len(response.json()["items"]) == 1
+    assert sql_queries.selects_after_write() == 0
+
+
+@pytest.mark.asyncio
+async def test_update_return_query_count(client: TestClient, delivered_order, sql_queries):
+    """Test updating and transitioning a return do not reload it after commit."""
+    return_id = client.post("/api/v1/returns", json=_return_payload(delivered_order)).json()["id"]
+    sql_queries.clear()
+    
+    response = client.patch(f"/api/v1/returns/{return_id}", json={"tracking_number": "1Z999"})
+    assert response.status_code == 200
+    assert response.json()["tracking_number"] == "1Z999"
+    assert sql_queries.selects_after_write() == 0
+    
+    sql_queries.clear()
+    response = client.post(f"/api/v1/returns/{return_id}/state", json={"action": "approve"})
+    assert response.status_code == 200
+    assert response.json()["status"] == "approved"
+    assert len(response.json()["items"]) == 1
+    assert sql_queries.selects_after_write() == 0
+
+
+@pytest.mark.asyncio
+async def test_list_returns_summary_view(client: TestClient, delivered_order, sql_queries):
+    """Test view=summary returns only summary fields without loading return items."""
+    client.post("/api/v1/returns", json=_return_payload(delivered_order))
+    sql_queries.clear()
+    
+    response = client.get("/api/v1/returns", params={"view": "summary"})
+    
+    assert response.status_code == 200
+    returns = response.json()
+    assert len(returns) == 1
+    assert set(returns[0]) == set(RETURN_SUMMARY_FIELDS)
+    assert returns[0]["order_id"] == delivered_order["id"]
+    assert len(sql_queries.statements) == 1
+    
+    response = client.get("/api/v1/returns", params={"fields": "status,items"})
+    assert response.status_code == 200
+    assert set(response.json()[0]) == {"id", "status", "items"}
+    assert len(response.json()[0]["items"]) == 1
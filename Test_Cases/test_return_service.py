@@ -8,6 +8,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.services.return_service import ReturnService
 from app.models.return_model import Return, ReturnStatus, ReturnReason
 from app.schemas.return_schema import ReturnCreate, ReturnUpdate
+from app.schemas.order import OrderCreate
+from app.services.order_service import OrderService
+from app.models.order import OrderStatus
 
 
 @pytest.mark.asyncio
@@ -130,3 +133,93 @@ async def test_transition_return_state_reject(async_db_session: AsyncSession, sa
     assert return_obj.status == ReturnStatus.REJECTED
     assert return_obj.rejection_reason == "Not eligible for return"
 
+
+
+async def _delivered_order(db: AsyncSession, order_data: dict, item_count: int = 2):
+    """Create a delivered order with `item_count` lines of quantity 2 each."""
+    order_data = dict(order_data, items=[
+        {
+            "product_id": 200 + n,
+            "product_name": f"Product {n}",
+            "product_sku": f"SKU-{n:03d}",
+            "unit_price": 10.00,
+            "quantity": 2,
+        }
+        for n in range(item_count)
+    ])
+    order = await OrderService.create_order(db, OrderCreate(**order_data))
+    order.status = OrderStatus.DELIVERED
+    await db.commit()
+    return order
+
+
+def _return_request(order, quantity: int = 1, lines=None) -> ReturnCreate:
+    lines = lines if lines is not None else order.items
+    return ReturnCreate(
+        order_id=order.id,
+        reason=ReturnReason.DEFECTIVE,
+        items=[
+            {
+                "order_item_id": item.id,
+                "product_id": item.product_id,
+                "product_name": item.product_name,
+                "product_sku": item.product_sku,
+                "quantity": quantity,
+            }
+            for item in lines
+        ],
+    )
+
+
+@pytest.mark.asyncio
+async def test_create_return_query_count_is_constant(async_db_session: AsyncSession, sample_order_data, sql_queries):
+    """Test order items are looked up in one query regardless of line count."""
+    small_order = await _delivered_order(async_db_session, sample_order_data, item_count=1)
+    sql_queries.clear()
+    await ReturnService.create_return(async_db_session, _return_request(small_order))
+    small_selects = sql_queries.count("SELECT")
+    
+    large_order = await _delivered_order(async_db_session, sample_order_data, item_count=50)
+    sql_queries.clear()
+    return_obj = await ReturnService.create_return(async_db_session, _return_request(large_order))
+    
+    assert len(return_obj.items) == 50
+    assert return_obj.refund_amount == Decimal("500.00")
+    assert sql_queries.count("SELECT") == small_selects
+
+
+@pytest.mark.asyncio
+async def test_create_return_quantity_exceeds_ordered(async_db_session: AsyncSession, sample_order_data):
+    """Test returning more than was ordered fails."""
+    order = await _delivered_order(async_db_session, sample_order_data)
+    
+    with pytest.raises(ValueError, match="only 2 of 2 remaining"):
+        await ReturnService.create_return(async_db_session, _return_request(order, quantity=3))
+
+
+@pytest.mark.asyncio
+async def test_create_return_accounts_for_previous_returns(async_db_session: AsyncSession, sample_order_data):
+    """Test previously returned quantities reduce what can be returned."""
+    order = await _delivered_order(async_db_session, sample_order_data)
+    first_line = order.items[:1]
+    
+    first = await ReturnService.create_return(async_db_session, _return_request(order, 2, first_line))
+    with pytest.raises(ValueError, match="only 0 of 2 remaining"):
+        await ReturnService.create_return(async_db_session, _return_request(order, 1, first_line))
+    
+    # A rejected return releases its quantities again
+    await ReturnService.transition_return_state(async_db_session, first, "reject", reason="Damaged by customer")
+    return_obj = await ReturnService.create_return(async_db_session, _return_request(order, 1, first_line))
+    assert return_obj.items[0].quantity == 1
+
+
+@pytest.mark.asyncio
+async def test_create_return_duplicate_lines_are_summed(async_db_session: AsyncSession, sample_order_data):
+    """Test repeated lines for the same order item count together."""
+    order = await _delivered_order(async_db_session, sample_order_data)
+    first_line = order.items[:1]
+    
+    with pytest.raises(ValueError, match="Cannot return 3"):
+        await ReturnService.create_return(
+            async_db_session, _return_request(order, 1, first_line + first_line + first_line)
+        )
@@ -0,0 +1,98 @@
+"""
+Tests for the search endpoint and the index triggers behind it.
+"""
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.models.return_model import Return, ReturnReason
+
+
+def search(client: TestClient, q: str, **params) -> list:
+    response = client.get("/api/v1/search", params={"q": q, **params})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_search_orders_by_partial_number_email_and_name(client: TestClient, sample_order_data):
+    """Test substrings of the order number, email and name find the order."""
+    order = client.post("/api/v1/orders", json={
+        **sample_order_data, "customer_email": "ada.lovelace@example.com", "customer_name": "Ada Lovelace",
+    }).json()
+    client.post("/api/v1/orders", json=sample_order_data)
+    
+    for q in (order["order_number"][-6:].lower(), "lovelace@exam", "ada love"):
+        hits = [hit for hit in search(client, q) if hit["entity"] == "order"]
+        assert [hit["id"] for hit in hits] == [order["id"]], q
+    
+    hit = search(client, "lovelace")[0]
+    assert hit["order_id"] == order["id"]
+    assert hit["reference"] == order["order_number"]
+    assert hit["detail"] == "Ada Lovelace <ada.lovelace@example.com>"
+
+
+@pytest.mark.asyncio
+async def test_search_items_and_payments(client: TestClient, sample_order_data):
+    """Test SKUs and payment transaction IDs are searchable, and `types` narrows the entities."""
+    order = client.post("/api/v1/orders", json=sample_order_data).json()
+    payment = client.post("/api/v1/payments", json={
+        "order_id": order["id"], "method": "credit_card", "amount": order["total"], "transaction_id": "txn_9F3KQ2",
+    }).json()
+    
+    hits = search(client, "SKU-001", types="order_item")
+    assert [(hit["entity"], hit["order_id"], hit["reference"]) for hit in hits] == [("order_item", order["id"], "SKU-001")]
+    
+    hits = search(client, "9f3kq")
+    assert [(hit["entity"], hit["id"]) for hit in hits] == [("payment", payment["id"])]
+    assert search(client, payment["payment_number"], types="order") == []
+
+
+@pytest.mark.asyncio
+async def test_search_index_follows_updates_and_deletes(client: TestClient, sample_order_data, async_db_session):
+    """Test the triggers keep the index in sync when a searchable column changes or the row is deleted."""
+    order = client.post("/api/v1/orders", json=sample_order_data).json()
+    return_obj = Return(
+        return_number="RET-SEARCH-0001", order_id=order["id"], reason=ReturnReason.DEFECTIVE,
+        refund_amount=Decimal("10.00"), tracking_number="1Z999AA10123456784",
+    )
+    async_db_session.add(return_obj)
+    await async_db_session.commit()
+    assert [hit["id"] for hit in search(client, "123456784")] == [return_obj.id]
+    
+    return_obj.tracking_number = "940011189922"
+    await async_db_session.commit()
+    assert search(client, "123456784") == []
+    assert [hit["reference"] for hit in search(client, "89922")] == ["RET-SEARCH-0001"]
+    
+    await async_db_session.delete(return_obj)
+    await async_db_session.commit()
+    assert search(client, "RET-SEARCH") == []
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_only_the_newest_candidates(client: TestClient, sample_order_data, monkeypatch):
+    """Test a broad query ranks at most SEARCH_CANDIDATE_LIMIT matches per index, newest first."""
+    orders = [client.post("/api/v1/orders", json={**sample_order_data, "customer_name": "Ordway"}).json()]
+    orders += [client.post("/api/v1/orders", json=sample_order_data).json() for _ in range(3)]
+    monkeypatch.setattr(settings, "SEARCH_CANDIDATE_LIMIT", 2)
+    
+    hits = search(client, "ORD", types="order", limit=2)
+    assert sorted(hit["id"] for hit in hits) == [orders[2]["id"], orders[3]["id"]]
+    
+    # A query cannot be starved by the cap: the limit is always ranked in full
+    assert len(search(client, "ORD", types="order", limit=3)) == 3
+    
+    # Among the candidates, the hit covering most of its field ranks first
+    monkeypatch.setattr(settings, "SEARCH_CANDIDATE_LIMIT", 10)
+    assert search(client, "ORD", types="order")[0]["id"] == orders[0]["id"]
+
+
+@pytest.mark.asyncio
+async def test_search_rejects_unsearchable_queries(client: TestClient):
+    """Test queries without a term of 3+ characters and unknown types are rejected."""
+    assert client.get("/api/v1/search", params={"q": "ab"}).status_code == 422
+    assert client.get("/api/v1/search", params={"q": "ab cd"}).status_code == 400
+    assert client.get("/api/v1/search", params={"q": "abc", "types": "order,customer"}).status_code == 400
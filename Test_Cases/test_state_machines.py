@@ -3,6 +3,7 @@ Unit tests for State Machines.
 """
 import pytest
 from datetime import datetime
+from transitions import Machine
 
 from app.state_machines.order_state import OrderStateMachine
 from app.state_machines.return_state import ReturnStateMachine
@@ -97,3 +98,63 @@ def test_get_available_transitions(sample_order):
     assert "cancel" in transitions
     assert "ship" not in transitions  # Cannot ship from pending
 
+
+
+def _reference_machine(machine_cls, state):
+    """Build the `transitions.Machine` the state machines used to create per instance."""
+    class Model:
+        pass
+    model = Model()
+    machine = Machine(
+        model=model,
+        states=machine_cls.STATES,
+        initial=state,
+        transitions=[
+            {"trigger": t["trigger"], "source": t["source"], "dest": t["dest"]}
+            for t in machine_cls.TRANSITIONS
+        ],
+        auto_transitions=False,
+        ignore_invalid_triggers=True,
+    )
+    return machine, model
+
+
+@pytest.mark.parametrize("machine_cls, entity_factory", [
+    (OrderStateMachine, lambda state: Order(status=OrderStatus(state))),
+    (ReturnStateMachine, lambda state: Return(status=ReturnStatus(state))),
+])
+def test_compiled_table_matches_transitions_machine(machine_cls, entity_factory):
+    """Test the compiled table has identical semantics to `transitions.Machine`."""
+    triggers = {t["trigger"] for t in machine_cls.TRANSITIONS}
+    for state in machine_cls.STATES:
+        reference, _ = _reference_machine(machine_cls, state)
+        machine = machine_cls(entity_factory(state))
+        assert machine.get_available_transitions() == reference.get_triggers(state)
+        
+        for trigger in triggers:
+            _, reference_model = _reference_machine(machine_cls, state)
+            expected = getattr(reference_model, trigger)()
+            
+            machine = machine_cls(entity_factory(state))
+            assert machine.can_transition(trigger) == expected
+            assert getattr(machine, trigger)() == expected
+            assert machine.state == reference_model.state
+
+
+def test_invalid_trigger_is_ignored():
+    """Test an invalid trigger returns False and leaves the state unchanged."""
+    machine = OrderStateMachine(Order(status=OrderStatus.PENDING))
+    
+    assert machine.trigger("ship") is False
+    assert machine.state == OrderStatus.PENDING.value
+    assert machine.is_pending()
+
+
+def test_reject_passes_reason_to_callback():
+    """Test trigger arguments are forwarded to callbacks."""
+    return_obj = Return(status=ReturnStatus.INITIATED)
+    machine = ReturnStateMachine(return_obj)
+    
+    assert machine.reject(reason="Outside return window")
+    assert return_obj.status == ReturnStatus.REJECTED
+    assert return_obj.rejection_reason == "Outside return window"
@@ -0,0 +1,47 @@
+"""
+Unit tests for the streaming ZIP writer.
+"""
+import io
+import zipfile
+from datetime import datetime
+
+from app.services.zip_stream import DEFLATED, STORED, ZipStreamWriter
+
+
+def _build(entries):
+    writer = ZipStreamWriter()
+    parts = []
+    for name, chunks, method in entries:
+        parts.append(writer.start_entry(name, datetime(2024, 1, 31, 12, 30), method=method))
+        for chunk in chunks:
+            parts.append(writer.write(chunk))
+        parts.append(writer.end_entry())
+    parts.extend(writer.close())
+    return b"".join(parts)
+
+
+def test_zip_stream_round_trip():
+    """Test stored and deflated entries written in chunks read back with zipfile."""
+    data = _build([
+        ("order/INV-1.pdf", [b"%PDF-1.4 ", b"first"], STORED),
+        ("manifest.csv", [b"a,b\n", b"1,2\n" * 1000], DEFLATED),
+        ("return/CM-é.pdf", [], STORED),
+    ])
+    
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == ["order/INV-1.pdf", "manifest.csv", "return/CM-é.pdf"]
+        assert archive.read("order/INV-1.pdf") == b"%PDF-1.4 first"
+        assert archive.read("manifest.csv") == b"a,b\n" + b"1,2\n" * 1000
+        assert archive.getinfo("manifest.csv").compress_size < 4000
+        assert archive.getinfo("order/INV-1.pdf").date_time == (2024, 1, 31, 12, 30, 0)
+
+
+def test_zip_stream_writes_zip64_end_records_for_many_entries():
+    """Test archives with more than 65535 entries remain readable."""
+    count = 70000
+    data = _build([(f"{n}.pdf", [b"x"], STORED) for n in range(count)])
+    
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert len(archive.infolist()) == count
+        assert archive.read(f"{count - 1}.pdf") == b"x"
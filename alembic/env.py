@@ -19,6 +19,8 @@ from app.models.order import Order, OrderItem
 from app.models.return_model import Return, ReturnItem
 from app.models.payment import Payment
 from app.models.invoice import Invoice, InvoiceType
+from app.models.idempotency import IdempotencyKey
+from app.models.outbox import OutboxMessage
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
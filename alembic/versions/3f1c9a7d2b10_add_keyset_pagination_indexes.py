@@ -0,0 +1,29 @@
+"""add_keyset_pagination_indexes
+
+Revision ID: 3f1c9a7d2b10
+Revises: e2492571bbaa
+Create Date: 2026-10-18 09:12:41.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c9a7d2b10'
+down_revision = 'e2492571bbaa'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Composite indexes for keyset pagination on (created_at, id)
+    op.create_index('ix_orders_created_at_id', 'orders', ['created_at', 'id'], unique=False)
+    op.create_index('ix_returns_created_at_id', 'returns', ['created_at', 'id'], unique=False)
+    op.create_index('ix_payments_created_at_id', 'payments', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_payments_created_at_id', table_name='payments')
+    op.drop_index('ix_returns_created_at_id', table_name='returns')
+    op.drop_index('ix_orders_created_at_id', table_name='orders')
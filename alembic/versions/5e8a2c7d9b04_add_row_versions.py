@@ -0,0 +1,31 @@
+"""add_row_versions
+
+Revision ID: 5e8a2c7d9b04
+Revises: c4d7e1a9f352
+Create Date: 2026-10-18 15:06:12.402377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8a2c7d9b04'
+down_revision = 'c4d7e1a9f352'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = ('orders', 'returns', 'payments')
+
+
+def upgrade() -> None:
+    # Optimistic concurrency counters; existing rows start at version 1
+    for table in VERSIONED_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    for table in VERSIONED_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('version')
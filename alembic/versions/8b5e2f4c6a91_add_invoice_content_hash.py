@@ -0,0 +1,27 @@
+"""add_invoice_content_hash
+
+Revision ID: 8b5e2f4c6a91
+Revises: 3f1c9a7d2b10
+Create Date: 2026-10-18 11:02:17.550931
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b5e2f4c6a91'
+down_revision = '3f1c9a7d2b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # SHA-256 of the invoice file; existing rows are backfilled on first download
+    with op.batch_alter_table('invoices', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('invoices', schema=None) as batch_op:
+        batch_op.drop_column('content_hash')
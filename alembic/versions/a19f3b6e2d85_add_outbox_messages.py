@@ -0,0 +1,40 @@
+"""add_outbox_messages
+
+Revision ID: a19f3b6e2d85
+Revises: 5e8a2c7d9b04
+Create Date: 2026-10-18 16:31:55.874120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a19f3b6e2d85'
+down_revision = '5e8a2c7d9b04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Celery task calls written with the state change that triggers them
+    op.create_table(
+        'outbox_messages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('task_name', sa.String(length=200), nullable=False),
+        sa.Column('args', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('dispatched_at', sa.DateTime(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    with op.batch_alter_table('outbox_messages', schema=None) as batch_op:
+        batch_op.create_index('ix_outbox_messages_dispatched_at_id', ['dispatched_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('outbox_messages', schema=None) as batch_op:
+        batch_op.drop_index('ix_outbox_messages_dispatched_at_id')
+
+    op.drop_table('outbox_messages')
@@ -0,0 +1,67 @@
+"""add_search_indexes
+
+Revision ID: b7c2e94f1a63
+Revises: d6f1b3a8e527
+Create Date: 2026-10-18 19:24:51.630417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7c2e94f1a63'
+down_revision = 'd6f1b3a8e527'
+branch_labels = None
+depends_on = None
+
+# Source table -> columns searched by GET /api/v1/search
+SEARCH_COLUMNS = {
+    'orders': ('order_number', 'customer_email', 'customer_name'),
+    'order_items': ('product_sku', 'product_name'),
+    'returns': ('return_number', 'tracking_number'),
+    'payments': ('payment_number', 'transaction_id'),
+}
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        # Trigram GIN indexes serve ILIKE '%term%' and are maintained by PostgreSQL
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for table, columns in SEARCH_COLUMNS.items():
+            op.create_index(
+                f'ix_{table}_search_trgm', table, list(columns), unique=False,
+                postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops' for column in columns},
+            )
+        return
+    
+    # SQLite: external-content FTS5 tables (trigram tokenizer) kept in sync by triggers
+    for table, columns in SEARCH_COLUMNS.items():
+        fts = f'{table}_fts'
+        names = ', '.join(columns)
+        new_values = ', '.join(f'new.{column}' for column in columns)
+        old_values = ', '.join(f'old.{column}' for column in columns)
+        insert = f'INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values});'
+        delete = f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values});"
+        op.execute(
+            f"CREATE VIRTUAL TABLE {fts} USING fts5("
+            f"{names}, content='{table}', content_rowid='id', tokenize='trigram')"
+        )
+        op.execute(f'CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN {insert} END')
+        op.execute(f'CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN {delete} END')
+        op.execute(f'CREATE TRIGGER {fts}_au AFTER UPDATE OF {names} ON {table} BEGIN {delete} {insert} END')
+        # Index the rows that already exist
+        op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        for table in reversed(list(SEARCH_COLUMNS)):
+            op.drop_index(f'ix_{table}_search_trgm', table_name=table)
+        return
+    
+    for table in reversed(list(SEARCH_COLUMNS)):
+        fts = f'{table}_fts'
+        for suffix in ('au', 'ad', 'ai'):
+            op.execute(f'DROP TRIGGER IF EXISTS {fts}_{suffix}')
+        op.execute(f'DROP TABLE IF EXISTS {fts}')
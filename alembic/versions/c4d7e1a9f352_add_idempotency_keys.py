@@ -0,0 +1,40 @@
+"""add_idempotency_keys
+
+Revision ID: c4d7e1a9f352
+Revises: 8b5e2f4c6a91
+Create Date: 2026-10-18 14:20:41.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d7e1a9f352'
+down_revision = '8b5e2f4c6a91'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Stored responses for requests sent with an Idempotency-Key header
+    op.create_table(
+        'idempotency_keys',
+        sa.Column('scope', sa.String(length=100), nullable=False),
+        sa.Column('key', sa.String(length=255), nullable=False),
+        sa.Column('request_hash', sa.String(length=64), nullable=False),
+        sa.Column('status_code', sa.Integer(), nullable=True),
+        sa.Column('response_body', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('scope', 'key'),
+    )
+    with op.batch_alter_table('idempotency_keys', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_idempotency_keys_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('idempotency_keys', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_idempotency_keys_expires_at'))
+
+    op.drop_table('idempotency_keys')
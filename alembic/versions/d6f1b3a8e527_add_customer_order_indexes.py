@@ -0,0 +1,27 @@
+"""add_customer_order_indexes
+
+Revision ID: d6f1b3a8e527
+Revises: a19f3b6e2d85
+Create Date: 2026-10-18 18:02:17.419836
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd6f1b3a8e527'
+down_revision = 'a19f3b6e2d85'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # GET /customers/{id}/orders: keyset pages per customer, and counts per customer and status
+    op.create_index('ix_orders_customer_id_created_at_id', 'orders', ['customer_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_orders_customer_id_status', 'orders', ['customer_id', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_customer_id_status', table_name='orders')
+    op.drop_index('ix_orders_customer_id_created_at_id', table_name='orders')
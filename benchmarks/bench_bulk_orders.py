@@ -0,0 +1,91 @@
+"""
+Throughput benchmark: POST /orders one at a time vs. POST /orders/bulk.
+
+Both paths run through the service layer against a fresh in-memory SQLite
+database. The bulk path is expected to sustain at least 5x the single-order
+throughput at batch sizes of 100 and above.
+
+Run from the project root:
+    python benchmarks/bench_bulk_orders.py [--orders 1000] [--batch-size 500]
+"""
+import argparse
+import asyncio
+import time
+from decimal import Decimal
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.database import Base
+from app.schemas.order import OrderCreate
+from app.services.order_service import OrderService
+
+# Minimum bulk/single throughput ratio we hold the bulk path to
+TARGET_SPEEDUP = 5.0
+
+
+def make_order(i: int) -> OrderCreate:
+    address = {"street": f"{i} Bench St", "city": "Bench City", "state": "BC", "zip": "00000"}
+    return OrderCreate(
+        customer_id=i % 1000,
+        customer_email=f"customer{i}@example.com",
+        customer_name=f"Customer {i}",
+        items=[
+            {
+                "product_id": 100 + n,
+                "product_name": f"Product {n}",
+                "product_sku": f"SKU-{n:03d}",
+                "unit_price": Decimal("19.99"),
+                "quantity": 1 + n,
+            }
+            for n in range(3)
+        ],
+        shipping_address=address,
+        billing_address=address,
+    )
+
+
+async def _fresh_sessionmaker():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine, async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def bench_single(orders) -> float:
+    engine, sessionmaker = await _fresh_sessionmaker()
+    start = time.perf_counter()
+    async with sessionmaker() as db:
+        for order_data in orders:
+            await OrderService.create_order(db, order_data)
+    elapsed = time.perf_counter() - start
+    await engine.dispose()
+    return len(orders) / elapsed
+
+
+async def bench_bulk(orders, batch_size: int) -> float:
+    engine, sessionmaker = await _fresh_sessionmaker()
+    start = time.perf_counter()
+    async with sessionmaker() as db:
+        for offset in range(0, len(orders), batch_size):
+            await OrderService.create_orders_bulk(db, orders[offset:offset + batch_size])
+    elapsed = time.perf_counter() - start
+    await engine.dispose()
+    return len(orders) / elapsed
+
+
+async def main(total: int, batch_size: int) -> None:
+    orders = [make_order(i) for i in range(total)]
+    single = await bench_single(orders)
+    bulk = await bench_bulk(orders, batch_size)
+    speedup = bulk / single
+    print(f"single-order path: {single:10.1f} orders/s")
+    print(f"bulk path (batch={batch_size}): {bulk:10.1f} orders/s")
+    print(f"speedup: {speedup:.1f}x (target >= {TARGET_SPEEDUP:.0f}x) {'OK' if speedup >= TARGET_SPEEDUP else 'BELOW TARGET'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.orders, args.batch_size))
@@ -0,0 +1,111 @@
+"""
+Latency benchmark: overhead of Idempotency-Key bookkeeping.
+
+Seeds a temporary SQLite database (with the PRAGMA profile from app.database)
+with N completed keys, then times, per request:
+  - lookup: IdempotencyService.begin on a completed key (the replay path)
+  - claim:  begin + complete for a new key (what a first request pays on top)
+next to OrderService.create_order for scale. Lookup is a primary-key read, so
+it should stay under a millisecond regardless of N; exits non-zero when the
+median lookup takes 1 ms or more. Claiming costs two small commits (the claim
+must be visible to concurrent retries before the request runs).
+
+Run from the project root:
+    python benchmarks/bench_idempotency.py [--keys 100000] [--samples 2000]
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.database import Base, apply_sqlite_pragmas
+from app.models.idempotency import IdempotencyKey
+from app.services.idempotency_service import IdempotencyService
+from app.services.order_service import OrderService
+
+from bench_sqlite_concurrency import make_order
+
+SCOPE = "orders.create"
+BUDGET_US = 1000.0
+
+
+def summarize(name: str, samples_us) -> float:
+    samples_us = sorted(samples_us)
+    median = statistics.median(samples_us)
+    p99 = samples_us[int(len(samples_us) * 0.99) - 1]
+    print(f"{name:<22} p50 {median:8.1f} us   p99 {p99:8.1f} us")
+    return median
+
+
+async def seed(sessionmaker, count: int) -> None:
+    now = datetime.utcnow()
+    rows = [
+        {
+            "scope": SCOPE,
+            "key": f"key-{n}",
+            "request_hash": "0" * 64,
+            "status_code": 201,
+            "response_body": {"id": n, "status": "pending"},
+            "created_at": now,
+            "expires_at": now + timedelta(days=1),
+        }
+        for n in range(count)
+    ]
+    async with sessionmaker() as db:
+        for offset in range(0, count, 10_000):
+            await db.execute(insert(IdempotencyKey), rows[offset:offset + 10_000])
+        await db.commit()
+
+
+async def main(keys: int, samples: int) -> int:
+    directory = tempfile.mkdtemp(prefix="bench_idempotency_")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(directory, 'bench.db')}")
+    apply_sqlite_pragmas(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessionmaker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await seed(sessionmaker, keys)
+
+    lookup, claim, create = [], [], []
+    async with sessionmaker() as db:
+        for n in range(samples):
+            start = time.perf_counter()
+            record = await IdempotencyService.begin(db, SCOPE, f"key-{(n * 7919) % keys}", "0" * 64)
+            lookup.append((time.perf_counter() - start) * 1e6)
+            assert record is not None
+
+            start = time.perf_counter()
+            record = await IdempotencyService.begin(db, SCOPE, f"new-{n}", "1" * 64)
+            await IdempotencyService.complete(db, record, 201, {"id": n})
+            await db.commit()
+            claim.append((time.perf_counter() - start) * 1e6)
+
+            if n < samples // 10:
+                start = time.perf_counter()
+                await OrderService.create_order(db, make_order(n))
+                create.append((time.perf_counter() - start) * 1e6)
+            db.expunge_all()
+
+    await engine.dispose()
+    shutil.rmtree(directory, ignore_errors=True)
+
+    print(f"{keys} stored keys, {samples} samples")
+    lookup_median = summarize("lookup (replay)", lookup)
+    summarize("claim + complete", claim)
+    summarize("create_order (scale)", create)
+    return 0 if lookup_median < BUDGET_US else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--keys", type=int, default=100_000)
+    parser.add_argument("--samples", type=int, default=2000)
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(main(args.keys, args.samples)))
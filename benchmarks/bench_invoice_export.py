@@ -0,0 +1,91 @@
+"""
+Memory benchmark: streamed invoice ZIP export at increasing invoice counts.
+
+Seeds a temporary SQLite database with N invoice rows backed by a local
+invoice store, consumes InvoiceExportService.export_zip without keeping the
+output, and reports the archive size, throughput and peak Python heap usage
+(tracemalloc). Peak memory should stay flat as N grows.
+
+Run from the project root:
+    python benchmarks/bench_invoice_export.py [--counts 1000 10000 100000]
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.database import Base
+from app.invoice_store import LocalInvoiceStore, invoice_store
+from app.models.invoice import Invoice, InvoiceType
+from app.services.invoice_export_service import InvoiceExportService
+
+DISTINCT_FILES = 50
+
+
+async def seed(sessionmaker, count: int) -> None:
+    stored = [invoice_store.put(b"%PDF-1.4 " + os.urandom(20_000)) for _ in range(DISTINCT_FILES)]
+    start = datetime(2024, 1, 1)
+    rows = [
+        {
+            "invoice_number": f"INV-BENCH-{n:07d}",
+            "invoice_type": InvoiceType.ORDER,
+            "file_path": stored[n % DISTINCT_FILES].key,
+            "file_name": f"invoice_{n}.pdf",
+            "file_size": stored[n % DISTINCT_FILES].size,
+            "content_hash": stored[n % DISTINCT_FILES].content_hash,
+            "created_at": start + timedelta(seconds=n),
+        }
+        for n in range(count)
+    ]
+    async with sessionmaker() as db:
+        for offset in range(0, count, 10_000):
+            await db.execute(insert(Invoice), rows[offset:offset + 10_000])
+        await db.commit()
+
+
+async def bench(count: int) -> None:
+    directory = tempfile.mkdtemp(prefix="bench_export_")
+    invoice_store.root = Path(directory)
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(directory, 'bench.db')}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessionmaker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await seed(sessionmaker, count)
+
+    total = 0
+    tracemalloc.start()
+    start = time.perf_counter()
+    async with sessionmaker() as db:
+        async for chunk in InvoiceExportService.export_zip(db):
+            total += len(chunk)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    await engine.dispose()
+    shutil.rmtree(directory, ignore_errors=True)
+
+    print(f"{count:>8} invoices: {total / 1e6:9.1f} MB archive, {count / elapsed:8.0f} invoices/s, "
+          f"peak heap {peak / 1e6:6.1f} MB")
+
+
+async def main(counts) -> None:
+    if not isinstance(invoice_store, LocalInvoiceStore):
+        raise SystemExit("This benchmark needs INVOICE_STORAGE_BACKEND=local")
+    for count in counts:
+        await bench(count)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+    asyncio.run(main(args.counts))
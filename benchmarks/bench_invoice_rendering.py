@@ -0,0 +1,72 @@
+"""
+Throughput benchmark: batch invoice PDF rendering on 1, 4 and N worker processes.
+
+Renders synthetic orders through InvoiceService.render_order_invoices and
+reports invoices/second for each worker count (N = os.cpu_count()). Worker
+counts above the number of cores are still run but will not scale.
+
+Run from the project root:
+    python benchmarks/bench_invoice_rendering.py [--invoices 400] [--items 10]
+"""
+import argparse
+import os
+import time
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+from app.services.invoice_service import InvoiceService
+
+
+def make_order(i: int, items: int) -> SimpleNamespace:
+    line_items = [
+        SimpleNamespace(
+            product_name=f"Product {n}",
+            product_sku=f"SKU-{n:03d}",
+            quantity=1 + n % 3,
+            unit_price=Decimal("19.99"),
+            total_price=Decimal("19.99") * (1 + n % 3),
+        )
+        for n in range(items)
+    ]
+    subtotal = sum(item.total_price for item in line_items)
+    return SimpleNamespace(
+        order_number=f"ORD-BENCH-{i:06d}",
+        created_at=datetime(2024, 1, 1),
+        shipped_at=datetime(2024, 1, 2),
+        customer_name=f"Customer {i}",
+        customer_email=f"customer{i}@example.com",
+        shipping_address={"street": f"{i} Bench St", "city": "Bench City", "state": "BC", "zip": "00000"},
+        subtotal=subtotal,
+        tax=subtotal * Decimal("0.10"),
+        shipping_cost=Decimal("5.00"),
+        total=subtotal * Decimal("1.10") + Decimal("5.00"),
+        items=line_items,
+    )
+
+
+def bench(orders, workers: int) -> float:
+    start = time.perf_counter()
+    pdfs = InvoiceService.render_order_invoices(orders, max_workers=workers)
+    elapsed = time.perf_counter() - start
+    assert len(pdfs) == len(orders)
+    return len(orders) / elapsed
+
+
+def main(total: int, items: int) -> None:
+    cores = os.cpu_count() or 1
+    orders = [make_order(i, items) for i in range(total)]
+    print(f"{total} invoices, {items} items each, {cores} CPU cores")
+    baseline = None
+    for workers in sorted({1, 4, cores}):
+        rate = bench(orders, workers)
+        baseline = baseline or rate
+        print(f"{workers:>3} workers: {rate:8.1f} invoices/s  ({rate / baseline:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--invoices", type=int, default=400)
+    parser.add_argument("--items", type=int, default=10)
+    args = parser.parse_args()
+    main(args.invoices, args.items)
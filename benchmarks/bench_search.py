@@ -0,0 +1,117 @@
+"""
+Latency benchmark: GET /search on a large table, with and without the candidate cap.
+
+A temporary SQLite file is filled with --orders orders (two items and a
+payment each, and a return for every tenth order) through bulk Core
+inserts, so the FTS5 triggers build the indexes as they would in
+production. Each query then runs through SearchService.search twice: with
+SEARCH_CANDIDATE_LIMIT as configured, and with it raised above the row
+count, which scores and sorts every match the way an uncapped search
+would. Broad terms ("ORD", "2026", "example.com") match nearly every row;
+the capped search is expected to keep their p95 within a small factor of a
+selective query's, independent of table size.
+
+Run from the project root:
+    python benchmarks/bench_search.py [--orders 1000000] [--repeat 20]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.config import settings
+from app.database import Base
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.payment import Payment, PaymentMethod
+from app.models.return_model import Return, ReturnReason
+from app.services.search_service import SearchService
+
+# Broad queries first; the last ones match a handful of rows
+QUERIES = ["ORD", "2026", "example.com", "SKU-0", "customer123", "ORD-20260101-0042", "txn_00099"]
+
+BATCH_SIZE = 10000
+
+
+def populate(path: str, total: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    now = datetime.now(timezone.utc)
+    address = {"street": "1 Bench St", "city": "Bench City", "state": "BC", "zip": "00000"}
+    with engine.begin() as conn:
+        for offset in range(0, total, BATCH_SIZE):
+            ids = range(offset + 1, min(offset + BATCH_SIZE, total) + 1)
+            conn.execute(insert(Order), [{
+                "id": i, "order_number": f"ORD-20260101-{i:07d}", "customer_id": i % 50000,
+                "customer_email": f"customer{i % 50000}@example.com", "customer_name": f"Customer {i % 50000}",
+                "status": OrderStatus.DELIVERED, "subtotal": 39.98, "total": 39.98,
+                "shipping_address": address, "billing_address": address, "created_at": now, "updated_at": now,
+            } for i in ids])
+            conn.execute(insert(OrderItem), [{
+                "order_id": i, "product_id": n, "product_name": f"Product {n}", "product_sku": f"SKU-{n:04d}",
+                "unit_price": 19.99, "quantity": 1, "total_price": 19.99, "created_at": now,
+            } for i in ids for n in (i % 997, i % 991 + 1000)])
+            conn.execute(insert(Payment), [{
+                "id": i, "payment_number": f"PAY-20260101-{i:07d}", "order_id": i, "method": PaymentMethod.CREDIT_CARD,
+                "amount": 39.98, "transaction_id": f"txn_{i:08d}", "created_at": now, "updated_at": now,
+            } for i in ids])
+            conn.execute(insert(Return), [{
+                "return_number": f"RET-20260101-{i:07d}", "order_id": i, "reason": ReturnReason.DEFECTIVE,
+                "refund_amount": 19.99, "tracking_number": f"1Z{i:016d}", "created_at": now, "updated_at": now,
+            } for i in ids if i % 10 == 0])
+    engine.dispose()
+
+
+def percentile(sorted_samples, fraction: float) -> float:
+    index = max(0, min(len(sorted_samples) - 1, round(fraction * len(sorted_samples)) - 1))
+    return sorted_samples[index]
+
+
+async def time_queries(sessionmaker, repeat: int) -> dict:
+    results = {}
+    async with sessionmaker() as db:
+        for q in QUERIES:
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                await SearchService.search(db, q, limit=20)
+                samples.append(time.perf_counter() - start)
+            samples.sort()
+            results[q] = (percentile(samples, 0.50) * 1000, percentile(samples, 0.95) * 1000)
+    return results
+
+
+async def main(total: int, repeat: int) -> None:
+    directory = tempfile.mkdtemp(prefix="bench_search_")
+    path = os.path.join(directory, "search.db")
+    start = time.perf_counter()
+    populate(path, total)
+    print(f"populated {total} orders in {time.perf_counter() - start:.1f} s")
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    sessionmaker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    capped = await time_queries(sessionmaker, repeat)
+    configured = settings.SEARCH_CANDIDATE_LIMIT
+    settings.SEARCH_CANDIDATE_LIMIT = 10 * total
+    try:
+        uncapped = await time_queries(sessionmaker, max(1, repeat // 4))
+    finally:
+        settings.SEARCH_CANDIDATE_LIMIT = configured
+    await engine.dispose()
+
+    print(f"{'query':<22} {'capped p50':>11} {'p95 ms':>8} {'uncapped p50':>13} {'p95 ms':>8}")
+    for q in QUERIES:
+        print(f"{q:<22} {capped[q][0]:>11.2f} {capped[q][1]:>8.2f} {uncapped[q][0]:>13.2f} {uncapped[q][1]:>8.2f}")
+    print(f"candidate limit: {configured} per index")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--orders", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per query (a quarter of that uncapped)")
+    args = parser.parse_args()
+    asyncio.run(main(args.orders, args.repeat))
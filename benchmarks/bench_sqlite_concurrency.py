@@ -0,0 +1,169 @@
+"""
+Concurrency benchmark: API writers and readers alongside Celery-style invoice writers
+on one SQLite file, with and without the PRAGMA profile from app.database.
+
+The API side runs concurrent asyncio tasks that create and list orders through
+OrderService on an aiosqlite engine. The worker side runs threads that insert
+invoice rows through InvoiceStorageService.create_invoice_record_sync on a sync
+engine, as the Celery tasks do. Each mode gets a fresh database file and runs for
+a fixed duration; we report throughput and the number of "database is locked"
+errors. With the tuned profile (WAL, busy_timeout) the locked count should be 0.
+
+Run from the project root:
+    python benchmarks/bench_sqlite_concurrency.py [--seconds 5] [--api-tasks 8] [--workers 4]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, apply_sqlite_pragmas
+from app.models.invoice import InvoiceType
+from app.schemas.order import OrderCreate
+from app.services.invoice_storage_service import InvoiceStorageService
+from app.services.order_service import OrderService
+
+SEED_ORDERS = 200
+
+
+class Counters:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.api_ops = 0
+        self.worker_ops = 0
+        self.locked = 0
+        self.other_errors = 0
+
+    def error(self, exc: Exception) -> None:
+        with self.lock:
+            if "database is locked" in str(exc):
+                self.locked += 1
+            else:
+                self.other_errors += 1
+
+
+def make_order(i: int) -> OrderCreate:
+    address = {"street": f"{i} Bench St", "city": "Bench City", "state": "BC", "zip": "00000"}
+    return OrderCreate(
+        customer_id=i % 100,
+        customer_email=f"customer{i}@example.com",
+        customer_name=f"Customer {i}",
+        items=[
+            {
+                "product_id": 100 + n,
+                "product_name": f"Product {n}",
+                "product_sku": f"SKU-{n:03d}",
+                "unit_price": Decimal("19.99"),
+                "quantity": 1 + n,
+            }
+            for n in range(3)
+        ],
+        shipping_address=address,
+        billing_address=address,
+    )
+
+
+def worker_loop(session_factory, counters: Counters, deadline: float) -> None:
+    """Celery-style writer: read an order, insert its invoice row, commit."""
+    while time.perf_counter() < deadline:
+        db = session_factory()
+        try:
+            order_id = random.randint(1, SEED_ORDERS)
+            InvoiceStorageService.create_invoice_record_sync(
+                db,
+                invoice_type=InvoiceType.ORDER,
+                file_path=f"/nonexistent/invoice_{order_id}.pdf",
+                file_name=f"invoice_{order_id}.pdf",
+                order_id=order_id,
+            )
+            with counters.lock:
+                counters.worker_ops += 1
+        except OperationalError as e:
+            db.rollback()
+            counters.error(e)
+        finally:
+            db.close()
+
+
+async def api_loop(session_factory, counters: Counters, deadline: float, task_id: int) -> None:
+    """API-style client: create an order, then read a page of orders."""
+    i = 0
+    while time.perf_counter() < deadline:
+        i += 1
+        async with session_factory() as db:
+            try:
+                await OrderService.create_order(db, make_order(task_id * 1_000_000 + i))
+                await OrderService.list_orders(db, limit=20)
+                with counters.lock:
+                    counters.api_ops += 1
+            except OperationalError as e:
+                await db.rollback()
+                counters.error(e)
+
+
+async def run_mode(tuned: bool, seconds: float, api_tasks: int, workers: int) -> Counters:
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_sqlite_"), "bench.db")
+
+    sync_engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", connect_args={"check_same_thread": False})
+    if tuned:
+        apply_sqlite_pragmas(sync_engine)
+        apply_sqlite_pragmas(async_engine)
+
+    Base.metadata.create_all(sync_engine)
+    async_factory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+    sync_factory = sessionmaker(bind=sync_engine)
+
+    async with async_factory() as db:
+        await OrderService.create_orders_bulk(db, [make_order(i) for i in range(SEED_ORDERS)])
+
+    counters = Counters()
+    deadline = time.perf_counter() + seconds
+    threads = [
+        threading.Thread(target=worker_loop, args=(sync_factory, counters, deadline))
+        for _ in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    await asyncio.gather(*(api_loop(async_factory, counters, deadline, n) for n in range(api_tasks)))
+    for thread in threads:
+        thread.join()
+
+    await async_engine.dispose()
+    sync_engine.dispose()
+    return counters
+
+
+async def main(seconds: float, api_tasks: int, workers: int) -> bool:
+    print(f"{seconds:.0f}s per mode, {api_tasks} API tasks, {workers} worker threads")
+    print(f"{'mode':<10} {'api ops/s':>10} {'worker ops/s':>13} {'locked':>8} {'other errors':>13}")
+    tuned_locked = 0
+    for label, tuned in (("default", False), ("tuned", True)):
+        counters = await run_mode(tuned, seconds, api_tasks, workers)
+        print(
+            f"{label:<10} {counters.api_ops / seconds:>10.1f} {counters.worker_ops / seconds:>13.1f} "
+            f"{counters.locked:>8} {counters.other_errors:>13}"
+        )
+        if tuned:
+            tuned_locked = counters.locked
+    ok = tuned_locked == 0
+    print("tuned profile: no 'database is locked' errors" if ok else "tuned profile: FAILED, lock errors seen")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--api-tasks", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    raise SystemExit(0 if asyncio.run(main(args.seconds, args.api_tasks, args.workers)) else 1)
@@ -0,0 +1,77 @@
+"""
+Microbenchmark: compiled state machines vs. building a `transitions.Machine` per request.
+
+Run from the project root:
+    python benchmarks/bench_state_machines.py
+"""
+import timeit
+
+from transitions import Machine
+
+from app.models.order import Order, OrderStatus
+from app.models.return_model import Return, ReturnStatus
+from app.state_machines.order_state import OrderStateMachine
+from app.state_machines.return_state import ReturnStateMachine
+
+
+class _LegacyModel:
+    """Stand-in for the old per-request machine model (callbacks are no-ops)."""
+
+    def __getattr__(self, name):
+        if name.startswith("_before_") or name.startswith("_after_"):
+            return lambda *args, **kwargs: None
+        raise AttributeError(name)
+
+
+def legacy_transition(machine_cls, state: str, action: str) -> bool:
+    """Reproduce the old request path: build a Machine, check triggers twice, fire."""
+    model = _LegacyModel()
+    machine = Machine(
+        model=model,
+        states=machine_cls.STATES,
+        initial=state,
+        transitions=machine_cls.TRANSITIONS,
+        auto_transitions=False,
+        ignore_invalid_triggers=True,
+    )
+    if action not in machine.get_triggers(model.state):
+        machine.get_triggers(model.state)
+        return False
+    return getattr(model, action)()
+
+
+def compiled_order_transition() -> bool:
+    machine = OrderStateMachine(Order(status=OrderStatus.PROCESSING))
+    if not machine.can_transition("ship"):
+        return False
+    return machine.ship()
+
+
+def compiled_return_transition() -> bool:
+    machine = ReturnStateMachine(Return(status=ReturnStatus.RECEIVED))
+    if not machine.can_transition("process"):
+        return False
+    return machine.process()
+
+
+def _report(label: str, legacy, compiled, number: int = 2000) -> None:
+    legacy_time = min(timeit.repeat(legacy, number=number, repeat=5)) / number
+    compiled_time = min(timeit.repeat(compiled, number=number, repeat=5)) / number
+    print(
+        f"{label:<8} legacy {legacy_time * 1e6:8.1f} us/op   "
+        f"compiled {compiled_time * 1e6:8.1f} us/op   "
+        f"speedup {legacy_time / compiled_time:5.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    _report(
+        "order",
+        lambda: legacy_transition(OrderStateMachine, OrderStatus.PROCESSING.value, "ship"),
+        compiled_order_transition,
+    )
+    _report(
+        "return",
+        lambda: legacy_transition(ReturnStateMachine, ReturnStatus.RECEIVED.value, "process"),
+        compiled_return_transition,
+    )
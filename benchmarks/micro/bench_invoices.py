@@ -0,0 +1,29 @@
+"""
+Invoice generation as the Celery tasks do it: InvoiceService.render_order_invoice
+plus invoice_store.put, for orders with 1, 50 and 500 lines.
+"""
+import itertools
+
+import pytest
+
+from app.invoice_store import LocalInvoiceStore, invoice_store
+from app.services.invoice_service import InvoiceService
+
+from conftest import make_order
+
+
+@pytest.mark.benchmark(group="invoice rendering")
+@pytest.mark.parametrize("items", [1, 50, 500])
+def bench_render_and_store_order_invoice(benchmark, items, tmp_path, monkeypatch):
+    if not isinstance(invoice_store, LocalInvoiceStore):
+        pytest.skip("application is configured with a non-local invoice store")
+    monkeypatch.setattr(invoice_store, "root", tmp_path)
+    # A new order each round: identical renders would deduplicate and skip the write
+    orders = (make_order(n, items=items) for n in itertools.count(1))
+
+    def generate():
+        return invoice_store.put(InvoiceService.render_order_invoice(next(orders)))
+
+    stored = benchmark(generate)
+
+    assert invoice_store.size(stored.key) == stored.size
@@ -0,0 +1,31 @@
+"""
+Pydantic serialization of OrderResponse lists, as done for GET /orders.
+"""
+import pytest
+from pydantic import TypeAdapter
+
+from app.schemas.order import OrderResponse
+
+from conftest import make_order
+
+ORDER_LIST = TypeAdapter(list[OrderResponse])
+
+
+@pytest.fixture(scope="module")
+def orders():
+    return [make_order(n) for n in range(100)]
+
+
+@pytest.mark.benchmark(group="serialization")
+def bench_validate_order_responses(benchmark, orders):
+    """ORM objects to OrderResponse models (from_attributes)."""
+    responses = benchmark(ORDER_LIST.validate_python, orders, from_attributes=True)
+    assert len(responses) == 100
+
+
+@pytest.mark.benchmark(group="serialization")
+def bench_dump_order_responses_json(benchmark, orders):
+    """OrderResponse models to the JSON response body."""
+    responses = ORDER_LIST.validate_python(orders, from_attributes=True)
+    body = benchmark(ORDER_LIST.dump_json, responses)
+    assert body.startswith(b"[")
@@ -0,0 +1,58 @@
+"""
+OrderService.create_order and ReturnService.create_return, one call per round.
+"""
+import itertools
+
+import pytest
+
+from app.models.order import OrderStatus
+from app.models.return_model import ReturnReason
+from app.schemas.return_schema import ReturnCreate, ReturnItemCreate
+from app.services.order_service import OrderService
+from app.services.return_service import ReturnService
+
+from conftest import make_order_data
+
+
+@pytest.mark.benchmark(group="services")
+def bench_create_order(benchmark, run, sessionmaker):
+    counter = itertools.count()
+
+    async def create():
+        async with sessionmaker() as db:
+            await OrderService.create_order(db, make_order_data(next(counter)))
+
+    benchmark(lambda: run(create()))
+
+
+@pytest.mark.benchmark(group="services")
+def bench_create_return(benchmark, run, sessionmaker):
+    async def delivered_order():
+        async with sessionmaker() as db:
+            data = make_order_data(0, items=1)
+            # Enough quantity for every round to return one unit
+            data.items[0].quantity = 10_000_000
+            order = await OrderService.create_order(db, data)
+            order.status = OrderStatus.DELIVERED
+            await db.commit()
+            return order
+
+    order = run(delivered_order())
+    item = order.items[0]
+    return_data = ReturnCreate(
+        order_id=order.id,
+        reason=ReturnReason.DEFECTIVE,
+        items=[ReturnItemCreate(
+            order_item_id=item.id,
+            product_id=item.product_id,
+            product_name=item.product_name,
+            product_sku=item.product_sku,
+            quantity=1,
+        )],
+    )
+
+    async def create():
+        async with sessionmaker() as db:
+            await ReturnService.create_return(db, return_data)
+
+    benchmark(lambda: run(create()))
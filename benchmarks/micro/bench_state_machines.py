@@ -0,0 +1,41 @@
+"""
+OrderStateMachine / ReturnStateMachine construction and transitions.
+"""
+import pytest
+
+from app.models.order import Order, OrderStatus
+from app.models.return_model import Return, ReturnStatus
+from app.state_machines.order_state import OrderStateMachine
+from app.state_machines.return_state import ReturnStateMachine
+
+
+@pytest.mark.benchmark(group="state machines")
+def bench_order_machine_construction(benchmark):
+    order = Order(status=OrderStatus.PROCESSING)
+    benchmark(OrderStateMachine, order)
+
+
+@pytest.mark.benchmark(group="state machines")
+def bench_order_machine_transition(benchmark):
+    def ship():
+        machine = OrderStateMachine(Order(status=OrderStatus.PROCESSING))
+        assert machine.can_transition("ship")
+        return machine.ship()
+
+    assert benchmark(ship)
+
+
+@pytest.mark.benchmark(group="state machines")
+def bench_return_machine_construction(benchmark):
+    return_obj = Return(status=ReturnStatus.RECEIVED)
+    benchmark(ReturnStateMachine, return_obj)
+
+
+@pytest.mark.benchmark(group="state machines")
+def bench_return_machine_transition(benchmark):
+    def process():
+        machine = ReturnStateMachine(Return(status=ReturnStatus.RECEIVED))
+        assert machine.can_transition("process")
+        return machine.process()
+
+    assert benchmark(process)
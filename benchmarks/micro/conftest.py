@@ -0,0 +1,101 @@
+"""
+Fixtures for the microbenchmarks.
+
+Run from the project root:
+    pytest benchmarks/micro                              # print a table per group
+    pytest benchmarks/micro --benchmark-autosave         # save a baseline under .benchmarks/
+    pytest benchmarks/micro --benchmark-compare --benchmark-compare-fail=median:10%
+
+Service benchmarks use a temporary SQLite file with the PRAGMA profile from
+app.database, so they measure the service code and SQLite, not a server.
+"""
+import asyncio
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.database import Base, apply_sqlite_pragmas
+from app.models.order import Order, OrderItem, OrderStatus
+from app.schemas.order import OrderCreate, OrderItemCreate
+
+
+def make_order_data(n: int, items: int = 3) -> OrderCreate:
+    address = {"street": f"{n} Bench St", "city": "Bench City", "state": "BC", "zip": "00000", "country": "USA"}
+    return OrderCreate(
+        customer_id=n % 1000,
+        customer_email=f"bench{n}@example.com",
+        customer_name=f"Bench Customer {n}",
+        items=[
+            OrderItemCreate(
+                product_id=100 + i,
+                product_name=f"Product {i}",
+                product_sku=f"SKU-{i:03d}",
+                unit_price=Decimal("19.99"),
+                quantity=1 + i % 3,
+            )
+            for i in range(items)
+        ],
+        shipping_address=address,
+        billing_address=address,
+    )
+
+
+def make_order(n: int, items: int = 3, status: OrderStatus = OrderStatus.SHIPPED) -> Order:
+    """A fully populated, unsaved Order (as loaded by the API) with `items` lines."""
+    now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    lines = [
+        OrderItem(
+            id=n * 1000 + i,
+            product_id=100 + i,
+            product_name=f"Product {i}",
+            product_sku=f"SKU-{i:03d}",
+            unit_price=Decimal("19.99"),
+            quantity=1 + i % 3,
+            total_price=Decimal("19.99") * (1 + i % 3),
+            created_at=now,
+        )
+        for i in range(items)
+    ]
+    subtotal = sum(line.total_price for line in lines)
+    return Order(
+        id=n,
+        order_number=f"ORD-BENCH-{n:06d}",
+        customer_id=n % 1000,
+        customer_email=f"bench{n}@example.com",
+        customer_name=f"Bench Customer {n}",
+        status=status,
+        subtotal=subtotal,
+        tax=subtotal * Decimal("0.10"),
+        shipping_cost=Decimal("5.00"),
+        total=subtotal * Decimal("1.10") + Decimal("5.00"),
+        currency="USD",
+        shipping_address={"street": f"{n} Bench St", "city": "Bench City", "state": "BC", "zip": "00000"},
+        billing_address={"street": f"{n} Bench St", "city": "Bench City", "state": "BC", "zip": "00000"},
+        created_at=now,
+        updated_at=now,
+        shipped_at=now,
+        items=lines,
+    )
+
+
+@pytest.fixture(scope="session")
+def run():
+    """Run a coroutine to completion on one event loop shared by all benchmarks."""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def sessionmaker(run, tmp_path_factory):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path_factory.mktemp('bench') / 'bench.db'}")
+    apply_sqlite_pragmas(engine)
+
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    run(create_tables())
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    run(engine.dispose())
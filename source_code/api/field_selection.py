@@ -0,0 +1,58 @@
+"""
+Field selection (`fields=`) and summary views (`view=summary`) for list endpoints.
+"""
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence, Tuple, Type
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+
+FULL_VIEW = "full"
+SUMMARY_VIEW = "summary"
+
+
+def selected_fields(
+    response_model: Type[BaseModel],
+    fields: Optional[str],
+    view: str,
+    summary_fields: Sequence[str],
+) -> Optional[Tuple[str, ...]]:
+    """
+    The response fields requested by `fields` (comma-separated) or `view`, in
+    response model order and always including "id"; None for the full view.
+    Raises HTTPException(400) for unknown fields or when both are given.
+    """
+    if fields is not None and view != FULL_VIEW:
+        raise HTTPException(status_code=400, detail="Use either 'fields' or 'view', not both")
+    if fields is None:
+        return tuple(summary_fields) if view == SUMMARY_VIEW else None
+
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(response_model.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    requested.add("id")
+    return tuple(name for name in response_model.model_fields if name in requested)
+
+
+@lru_cache(maxsize=256)
+def _partial_adapter(response_model: Type[BaseModel], fields: Tuple[str, ...]) -> TypeAdapter:
+    model = create_model(
+        f"{response_model.__name__}Partial",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (response_model.model_fields[name].annotation, response_model.model_fields[name]) for name in fields},
+    )
+    return TypeAdapter(List[model])
+
+
+def partial_response(
+    rows: Sequence[Any],
+    response_model: Type[BaseModel],
+    fields: Tuple[str, ...],
+    headers: Optional[dict] = None,
+) -> Response:
+    """Serialize only `fields` of each row, with the types declared on `response_model`."""
+    adapter = _partial_adapter(response_model, fields)
+    content = adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+    return Response(content=content, media_type="application/json", headers=headers)
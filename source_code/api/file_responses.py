@@ -0,0 +1,119 @@
+"""
+Conditional and ranged file responses for immutable, content-addressed files.
+"""
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+from app.config import settings
+
+
+def make_etag(content_hash: str) -> str:
+    """Strong ETag for a content hash."""
+    return f'"{content_hash}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison, per RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def parse_range(range_header: Optional[str], file_size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range `bytes=` Range header into an inclusive (start, end).
+    Returns None when the whole file should be sent: no header, another unit,
+    several ranges, or a header that is not a valid range (which RFC 9110
+    says to ignore). Raises ValueError only for a valid range that cannot be
+    satisfied.
+    """
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+    spec = range_header[len("bytes="):].strip()
+    if "," in spec:
+        return None
+
+    start_text, sep, end_text = spec.partition("-")
+    if not sep or not (start_text or end_text):
+        return None
+    if any(text and not (text.isascii() and text.isdigit()) for text in (start_text, end_text)):
+        return None
+
+    if start_text:
+        start = int(start_text)
+        end = int(end_text) if end_text else file_size - 1
+        if end_text and start > end:
+            return None
+    else:
+        # Suffix range: the last N bytes
+        length = int(end_text)
+        if length == 0:
+            raise ValueError(f"Range not satisfiable: {range_header}")
+        start, end = max(file_size - length, 0), file_size - 1
+
+    if start >= file_size:
+        raise ValueError(f"Range not satisfiable: {range_header}")
+    return start, min(end, file_size - 1)
+
+
+def immutable_file_headers(etag: str, filename: Optional[str] = None) -> Dict[str, str]:
+    """Caching headers shared by full, partial and 304 responses."""
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={settings.INVOICE_CACHE_MAX_AGE}, immutable",
+        "Accept-Ranges": "bytes",
+    }
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return headers
+
+
+def not_modified_response(etag: str) -> Response:
+    """304 response for a client that already holds the current file."""
+    return Response(status_code=304, headers=immutable_file_headers(etag))
+
+
+def stream_file_response(
+    request: Request,
+    read_range: Callable[[int, int], Iterator[bytes]],
+    file_size: int,
+    etag: str,
+    filename: str,
+    media_type: str,
+) -> Response:
+    """
+    Stream a file in chunks, honouring a single-range Range header (206/416).
+    `read_range(start, length)` yields the requested bytes; it is blocking and
+    is iterated in the threadpool. An If-Range that does not match the ETag
+    falls back to the full file.
+    """
+    headers = immutable_file_headers(etag, filename)
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range.strip() == etag:
+        try:
+            byte_range = parse_range(request.headers.get("range"), file_size)
+        except ValueError:
+            headers["Content-Range"] = f"bytes */{file_size}"
+            return Response(status_code=416, headers=headers)
+
+    if byte_range is None:
+        headers["Content-Length"] = str(file_size)
+        return StreamingResponse(read_range(0, file_size), media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    length = end - start + 1
+    headers["Content-Length"] = str(length)
+    headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+    return StreamingResponse(
+        read_range(start, length),
+        status_code=206,
+        media_type=media_type,
+        headers=headers,
+    )
@@ -0,0 +1,67 @@
+"""
+Idempotency-Key handling for create-style POST endpoints.
+"""
+from typing import Any, Awaitable, Callable, Type
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.concurrency import commit_versioned
+from app.services.idempotency_service import (
+    IdempotencyKeyInUse,
+    IdempotencyKeyMismatch,
+    IdempotencyService,
+)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+async def run_idempotent(
+    db: AsyncSession,
+    scope: str,
+    key: str,
+    payload: Any,
+    operation: Callable[[], Awaitable[Any]],
+    response_model: Type[BaseModel],
+    status_code: int,
+) -> JSONResponse:
+    """
+    Run `operation` at most once per (scope, key).
+    `operation` must flush its changes without committing: they are committed
+    in one transaction with the serialized response, so a key is never left
+    unfinished once the operation's changes exist. Repeats with the same
+    payload get that response back (with Idempotent-Replayed: true) without
+    running the operation again. Failed operations release the key and re-raise.
+    """
+    try:
+        record = await IdempotencyService.begin(db, scope, key, IdempotencyService.request_hash(payload))
+    except IdempotencyKeyMismatch as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except IdempotencyKeyInUse as e:
+        raise HTTPException(status_code=409, detail=str(e), headers={"Retry-After": "1"})
+    
+    if record.completed:
+        return JSONResponse(
+            content=record.response_body,
+            status_code=record.status_code,
+            headers={REPLAYED_HEADER: "true"},
+        )
+    
+    # The operation may roll back (expiring the record) before it fails
+    claimed_at = record.created_at
+    try:
+        result = await operation()
+        body = response_model.model_validate(result).model_dump(mode="json")
+        await IdempotencyService.complete(db, record, status_code, body)
+        await commit_versioned(db, result)
+    except IdempotencyKeyInUse as e:
+        # A retry took the key over; it runs the request instead of us
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
+    except BaseException:
+        await IdempotencyService.release(db, scope, key, claimed_at)
+        raise
+    return JSONResponse(content=body, status_code=status_code)
@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+from decimal import Decimal
+
+from app.api.field_selection import partial_response, selected_fields
+from app.database import get_db
+from app.models.order import OrderStatus
+from app.schemas.order import OrderResponse, ORDER_SUMMARY_FIELDS
+from app.services.order_service import OrderService
+from app.services.pagination import next_cursor
+
+router = APIRouter()
+
+
+@router.get("/{customer_id}/orders", response_model=List[OrderResponse])
+async def list_customer_orders(
+    customer_id: int,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    status: Optional[OrderStatus] = Query(None),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor for keyset pagination"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,order_number,status,total"),
+    view: Literal["full", "summary"] = Query("full", description="'summary' returns only the columns list views need"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    A customer's order history, newest first.
+    X-Total-Count holds the number of the customer's orders (matching `status`
+    if given) and X-Lifetime-Spend the total of all orders not cancelled, per
+    currency (e.g. "EUR 12.50, USD 280.00"; absent without orders); both come
+    from the same query as the page. When more results may follow, the
+    X-Next-Cursor header holds the cursor for the next page.
+    """
+    selected = selected_fields(OrderResponse, fields, view, ORDER_SUMMARY_FIELDS)
+    try:
+        orders, order_count, lifetime_spend = await OrderService.list_customer_orders(
+            db, customer_id, limit=limit, status=status, cursor=cursor, fields=selected
+        )
+    except ValueError as e:
+        # `status` is shadowed by the filter parameter here
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    headers = {"X-Total-Count": str(order_count)}
+    if lifetime_spend:
+        headers["X-Lifetime-Spend"] = ", ".join(
+            f"{currency} {amount.quantize(Decimal('0.01'))}" for currency, amount in sorted(lifetime_spend.items())
+        )
+    next_page = next_cursor(orders, limit)
+    if next_page:
+        headers["X-Next-Cursor"] = next_page
+    if selected is not None:
+        return partial_response(orders, OrderResponse, selected, headers)
+    response.headers.update(headers)
+    return orders
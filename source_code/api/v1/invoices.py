@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
-from pathlib import Path
+from typing import List, Optional
+from datetime import date
 
+from app.api.file_responses import etag_matches, make_etag, not_modified_response, stream_file_response
+from app.config import settings
 from app.database import get_db
+from app.invoice_store import invoice_store
+from app.models.invoice import InvoiceType
 from app.schemas.invoice import InvoiceResponse
+from app.services.invoice_export_service import InvoiceExportService
 from app.services.invoice_storage_service import InvoiceStorageService
 
 router = APIRouter()
@@ -31,13 +37,40 @@ async def get_return_invoices(
     return invoices
 
 
+@router.get("/export")
+async def export_invoices(
+    date_from: Optional[date] = Query(None, alias="from", description="First creation date to include"),
+    date_to: Optional[date] = Query(None, alias="to", description="Last creation date to include"),
+    invoice_type: Optional[InvoiceType] = Query(None, alias="type"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Export matching invoice PDFs as a ZIP archive with a manifest.csv.
+    The archive is streamed as it is built, so large exports use constant memory.
+    """
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from' must not be after 'to'",
+        )
+    
+    parts = ["invoices", str(date_from or "start"), str(date_to or "end")]
+    if invoice_type:
+        parts.append(invoice_type.value)
+    return StreamingResponse(
+        InvoiceExportService.export_zip(db, date_from, date_to, invoice_type),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{"_".join(parts)}.zip"'},
+    )
+
+
 @router.get("/{invoice_id}", response_model=InvoiceResponse)
 async def get_invoice(
     invoice_id: int,
     db: AsyncSession = Depends(get_db),
 ):
     """Get invoice details by ID."""
-    invoice = await InvoiceStorageService.get_invoice(db, invoice_id)
+    invoice = await InvoiceStorageService.get_invoice_response(db, invoice_id)
     if not invoice:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -49,26 +82,48 @@ async def get_invoice(
 @router.get("/{invoice_id}/download")
 async def download_invoice(
     invoice_id: int,
+    request: Request,
     db: AsyncSession = Depends(get_db),
 ):
-    """Download invoice PDF file."""
-    invoice = await InvoiceStorageService.get_invoice(db, invoice_id)
+    """
+    Download invoice PDF file.
+    Invoice files are immutable: responses carry a strong ETag (the file's
+    SHA-256) and long-lived Cache-Control, If-None-Match returns 304 without
+    touching the file, and single byte ranges are served as 206.
+    """
+    invoice = await InvoiceStorageService.get_invoice_response(db, invoice_id)
     if not invoice:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Invoice {invoice_id} not found",
         )
     
-    file_path = Path(invoice.file_path)
-    if not file_path.exists():
+    content_hash = invoice["content_hash"] or await InvoiceStorageService.ensure_content_hash(db, invoice_id)
+    if not content_hash:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Invoice file not found: {invoice.file_path}",
+            detail=f"Invoice file not found: {invoice['file_path']}",
         )
     
-    return FileResponse(
-        path=str(file_path),
-        filename=invoice.file_name,
+    etag = make_etag(content_hash)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified_response(etag)
+    
+    file_path = invoice["file_path"]
+    file_size = await run_in_threadpool(invoice_store.size, file_path)
+    if file_size is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Invoice file not found: {file_path}",
+        )
+    
+    return stream_file_response(
+        request,
+        read_range=lambda start, length: invoice_store.iter_range(
+            file_path, start, length, chunk_size=settings.INVOICE_DOWNLOAD_CHUNK_SIZE
+        ),
+        file_size=file_size,
+        etag=etag,
+        filename=invoice["file_name"],
         media_type="application/pdf",
     )
-
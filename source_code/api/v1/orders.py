@@ -1,18 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, Header
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
+from typing import List, Literal, Optional
 
+from app.api.idempotency import IDEMPOTENCY_HEADER, run_idempotent
+from app.api.field_selection import partial_response, selected_fields
 from app.database import get_db
 from app.models.order import OrderStatus
-from app.schemas.order import OrderCreate, OrderUpdate, OrderResponse, OrderStateUpdate
+from app.schemas.order import (
+    OrderCreate,
+    OrderUpdate,
+    OrderResponse,
+    OrderStateUpdate,
+    OrderBulkResult,
+    OrderBulkResponse,
+    OrderStateBulkItem,
+    OrderStateBulkResult,
+    OrderStateBulkResponse,
+    ORDER_SUMMARY_FIELDS,
+)
 from app.services.order_service import OrderService
+from app.services.pagination import next_cursor
 
 router = APIRouter()
 
+# Upper bound on orders accepted by POST /orders/bulk
+BULK_MAX_ORDERS = 1000
+# Upper bound on transitions accepted by POST /orders/state:bulk (one warehouse wave)
+BULK_MAX_TRANSITIONS = 5000
+
 
 @router.post("", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
 async def create_order(
     order_data: OrderCreate,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER, max_length=255),
     db: AsyncSession = Depends(get_db),
 ):
     """Create a new order.
@@ -33,6 +53,9 @@ async def create_order(
     Optional fields:
     - notes: string
     - meta_data: object/dictionary
+    
+    Send an Idempotency-Key header to make retries safe: a repeated key with the
+    same body returns the original response instead of creating another order.
     """
     try:
         # Validate items list is not empty
@@ -42,6 +65,17 @@ async def create_order(
                 detail="Items list cannot be empty. At least one item is required.",
             )
         
+        if idempotency_key:
+            return await run_idempotent(
+                db,
+                "orders.create",
+                idempotency_key,
+                order_data.model_dump(mode="json"),
+                lambda: OrderService.create_order(db, order_data, commit=False),
+                OrderResponse,
+                status.HTTP_201_CREATED,
+            )
+        
         order = await OrderService.create_order(db, order_data)
         return order
     except HTTPException:
@@ -53,18 +87,117 @@ async def create_order(
         )
 
 
+@router.post("/bulk", response_model=OrderBulkResponse)
+async def create_orders_bulk(
+    orders_data: List[OrderCreate],
+    db: AsyncSession = Depends(get_db),
+):
+    """Create many orders in a single transaction.
+    
+    Accepts a JSON array of order objects (same fields as POST /orders).
+    Each order gets its own result entry; orders that fail validation are
+    reported with an error and do not prevent the others from being created.
+    """
+    if not orders_data:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Orders list cannot be empty.",
+        )
+    if len(orders_data) > BULK_MAX_ORDERS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {BULK_MAX_ORDERS} orders can be created per request.",
+        )
+    
+    try:
+        outcomes = await OrderService.create_orders_bulk(db, orders_data)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    
+    results = [
+        OrderBulkResult(index=index, success=order is not None, order=order, error=error)
+        for index, (order, error) in enumerate(outcomes)
+    ]
+    created = sum(1 for result in results if result.success)
+    return OrderBulkResponse(created=created, failed=len(results) - created, results=results)
+
+
+@router.post("/state:bulk", response_model=OrderStateBulkResponse)
+async def update_order_states_bulk(
+    transitions: List[OrderStateBulkItem],
+    db: AsyncSession = Depends(get_db),
+):
+    """Apply many state transitions in a single transaction.
+    
+    Accepts a JSON array of {"order_id", "action"} objects. Each transition gets
+    its own result entry; transitions that are not allowed (or whose order does
+    not exist) are reported with an error and do not prevent the others.
+    Invoice generation for shipped orders is queued in chunks.
+    """
+    if not transitions:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Transitions list cannot be empty.",
+        )
+    if len(transitions) > BULK_MAX_TRANSITIONS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {BULK_MAX_TRANSITIONS} transitions can be applied per request.",
+        )
+    
+    outcomes = await OrderService.transition_orders_bulk(
+        db, [(transition.order_id, transition.action) for transition in transitions]
+    )
+    
+    results = [
+        OrderStateBulkResult(
+            index=index,
+            order_id=transition.order_id,
+            success=order is not None,
+            order=order,
+            error=error,
+        )
+        for index, (transition, (order, error)) in enumerate(zip(transitions, outcomes))
+    ]
+    succeeded = sum(1 for result in results if result.success)
+    return OrderStateBulkResponse(succeeded=succeeded, failed=len(results) - succeeded, results=results)
+
+
 @router.get("", response_model=List[OrderResponse])
 async def list_orders(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     customer_id: Optional[int] = Query(None),
     status: Optional[OrderStatus] = Query(None),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor for keyset pagination"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,order_number,status,total"),
+    view: Literal["full", "summary"] = Query("full", description="'summary' returns only the columns list views need"),
     db: AsyncSession = Depends(get_db),
 ):
-    """List orders with optional filters."""
-    orders = await OrderService.list_orders(
-        db, skip=skip, limit=limit, customer_id=customer_id, status=status
-    )
+    """
+    List orders with optional filters.
+    When more results may follow, the X-Next-Cursor header holds the cursor for the next page.
+    With `fields` or `view=summary` only those fields are loaded and returned
+    (items are loaded only if requested).
+    """
+    selected = selected_fields(OrderResponse, fields, view, ORDER_SUMMARY_FIELDS)
+    try:
+        orders = await OrderService.list_orders(
+            db, skip=skip, limit=limit, customer_id=customer_id, status=status, cursor=cursor, fields=selected
+        )
+    except ValueError as e:
+        # `status` is shadowed by the filter parameter here
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    next_page = next_cursor(orders, limit)
+    headers = {"X-Next-Cursor": next_page} if next_page else {}
+    if selected is not None:
+        return partial_response(orders, OrderResponse, selected, headers)
+    response.headers.update(headers)
     return orders
 
 
@@ -74,7 +207,7 @@ async def get_order(
     db: AsyncSession = Depends(get_db),
 ):
     """Get order by ID."""
-    order = await OrderService.get_order(db, order_id)
+    order = await OrderService.get_order_response(db, order_id)
     if not order:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, Header
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
+from app.api.idempotency import IDEMPOTENCY_HEADER, run_idempotent
+from app.cache import entity_cache
 from app.database import get_db
 from app.models.payment import PaymentStatus
 from app.schemas.payment import PaymentCreate, PaymentUpdate, PaymentResponse, RefundRequest
 from app.services.payment_service import PaymentService
+from app.services.pagination import next_cursor
 
 router = APIRouter()
 
@@ -13,10 +16,25 @@ router = APIRouter()
 @router.post("", response_model=PaymentResponse, status_code=status.HTTP_201_CREATED)
 async def create_payment(
     payment_data: PaymentCreate,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER, max_length=255),
     db: AsyncSession = Depends(get_db),
 ):
-    """Create a new payment."""
+    """
+    Create a new payment.
+    A repeated Idempotency-Key with the same body returns the original payment.
+    """
     try:
+        if idempotency_key:
+            return await run_idempotent(
+                db,
+                "payments.create",
+                idempotency_key,
+                payment_data.model_dump(mode="json"),
+                lambda: PaymentService.create_payment(db, payment_data, commit=False),
+                PaymentResponse,
+                status.HTTP_201_CREATED,
+            )
+        
         payment = await PaymentService.create_payment(db, payment_data)
         return payment
     except ValueError as e:
@@ -28,16 +46,29 @@ async def create_payment(
 
 @router.get("", response_model=List[PaymentResponse])
 async def list_payments(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     order_id: Optional[int] = Query(None),
     status: Optional[PaymentStatus] = Query(None),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor for keyset pagination"),
     db: AsyncSession = Depends(get_db),
 ):
-    """List payments with optional filters."""
-    payments = await PaymentService.list_payments(
-        db, skip=skip, limit=limit, order_id=order_id, status=status
-    )
+    """
+    List payments with optional filters.
+    When more results may follow, the X-Next-Cursor header holds the cursor for the next page.
+    """
+    try:
+        payments = await PaymentService.list_payments(
+            db, skip=skip, limit=limit, order_id=order_id, status=status, cursor=cursor
+        )
+    except ValueError as e:
+        # `status` is shadowed by the filter parameter here
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    next_page = next_cursor(payments, limit)
+    if next_page:
+        response.headers["X-Next-Cursor"] = next_page
     return payments
 
 
@@ -47,7 +78,7 @@ async def get_payment(
     db: AsyncSession = Depends(get_db),
 ):
     """Get payment by ID."""
-    payment = await PaymentService.get_payment(db, payment_id)
+    payment = await PaymentService.get_payment_response(db, payment_id)
     if not payment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -101,9 +132,14 @@ async def process_payment(
 async def refund_payment(
     payment_id: int,
     refund_request: RefundRequest,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER, max_length=255),
     db: AsyncSession = Depends(get_db),
 ):
-    """Process a refund."""
+    """
+    Process a refund.
+    A repeated Idempotency-Key with the same body returns the original result
+    instead of refunding again.
+    """
     payment = await PaymentService.get_payment(db, payment_id)
     if not payment:
         raise HTTPException(
@@ -112,6 +148,19 @@ async def refund_payment(
         )
     
     try:
+        if idempotency_key:
+            response = await run_idempotent(
+                db,
+                f"payments.refund:{payment_id}",
+                idempotency_key,
+                refund_request.model_dump(mode="json"),
+                lambda: PaymentService.process_refund(db, payment, refund_request, commit=False),
+                PaymentResponse,
+                status.HTTP_200_OK,
+            )
+            await entity_cache.invalidate("payment", payment_id)
+            return response
+        
         payment = await PaymentService.process_refund(db, payment, refund_request)
         return payment
     except ValueError as e:
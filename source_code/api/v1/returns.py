@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
+from typing import List, Literal, Optional
 
+from app.api.field_selection import partial_response, selected_fields
 from app.database import get_db
 from app.models.return_model import ReturnStatus
 from app.schemas.return_schema import (
@@ -9,8 +10,10 @@ from app.schemas.return_schema import (
     ReturnUpdate,
     ReturnResponse,
     ReturnStateUpdate,
+    RETURN_SUMMARY_FIELDS,
 )
 from app.services.return_service import ReturnService
+from app.services.pagination import next_cursor
 
 router = APIRouter()
 
@@ -33,16 +36,36 @@ async def create_return(
 
 @router.get("", response_model=List[ReturnResponse])
 async def list_returns(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     order_id: Optional[int] = Query(None),
     status: Optional[ReturnStatus] = Query(None),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor for keyset pagination"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,return_number,status,refund_amount"),
+    view: Literal["full", "summary"] = Query("full", description="'summary' returns only the columns list views need"),
     db: AsyncSession = Depends(get_db),
 ):
-    """List returns with optional filters."""
-    returns = await ReturnService.list_returns(
-        db, skip=skip, limit=limit, order_id=order_id, status=status
-    )
+    """
+    List returns with optional filters.
+    When more results may follow, the X-Next-Cursor header holds the cursor for the next page.
+    With `fields` or `view=summary` only those fields are loaded and returned
+    (items are loaded only if requested).
+    """
+    selected = selected_fields(ReturnResponse, fields, view, RETURN_SUMMARY_FIELDS)
+    try:
+        returns = await ReturnService.list_returns(
+            db, skip=skip, limit=limit, order_id=order_id, status=status, cursor=cursor, fields=selected
+        )
+    except ValueError as e:
+        # `status` is shadowed by the filter parameter here
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    next_page = next_cursor(returns, limit)
+    headers = {"X-Next-Cursor": next_page} if next_page else {}
+    if selected is not None:
+        return partial_response(returns, ReturnResponse, selected, headers)
+    response.headers.update(headers)
     return returns
 
 
@@ -52,7 +75,7 @@ async def get_return(
     db: AsyncSession = Depends(get_db),
 ):
     """Get return by ID."""
-    return_obj = await ReturnService.get_return(db, return_id)
+    return_obj = await ReturnService.get_return_response(db, return_id)
     if not return_obj:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from app.database import get_db
+from app.schemas.search import SearchHit
+from app.services.search_service import SEARCH_ENTITIES, SearchService
+
+router = APIRouter()
+
+
+@router.get("", response_model=List[SearchHit])
+async def search(
+    q: str = Query(..., min_length=3, max_length=200, description="Partial order number, email, name, SKU, tracking number, ..."),
+    types: Optional[str] = Query(None, description="Comma-separated entities to search: " + ",".join(SEARCH_ENTITIES)),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Ranked search across orders (number, customer email and name), order items
+    (SKU, product name), returns (number, tracking number) and payments
+    (number, transaction ID). Every term of at least 3 characters must match
+    part of an indexed field. Broad terms that match more than
+    SEARCH_CANDIDATE_LIMIT rows of an entity are ranked among its newest
+    matches only.
+    """
+    entities = None
+    if types is not None:
+        entities = [name.strip() for name in types.split(",") if name.strip()]
+        unknown = set(entities) - set(SEARCH_ENTITIES)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown types: {', '.join(sorted(unknown))}",
+            )
+    try:
+        return await SearchService.search(db, q, limit=limit, entities=entities)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
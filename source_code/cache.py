@@ -0,0 +1,209 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+import json
+import logging
+import threading
+import time
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend:
+    """Interface for cache backends. Values must be JSON-serializable."""
+
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any) -> None:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    async def delete_many(self, keys: List[str]) -> None:
+        for key in keys:
+            await self.delete(key)
+
+    async def clear(self) -> None:
+        raise NotImplementedError
+
+
+class NullCache(CacheBackend):
+    """Backend that never stores anything (caching disabled)."""
+
+    async def get(self, key: str) -> Optional[Any]:
+        return None
+
+    async def set(self, key: str, value: Any) -> None:
+        pass
+
+    async def delete(self, key: str) -> None:
+        pass
+
+    async def clear(self) -> None:
+        pass
+
+
+class LRUCache(CacheBackend):
+    """In-process LRU cache with a per-entry TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    async def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    async def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCache(CacheBackend):
+    """Redis-backed cache, shared by every API worker (uses settings.REDIS_URL)."""
+
+    def __init__(self, url: str, ttl_seconds: float, prefix: str = "oms:cache:"):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any) -> None:
+        await self.client.set(self.prefix + key, json.dumps(value), ex=max(1, int(self.ttl_seconds)))
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(self.prefix + key)
+
+    async def delete_many(self, keys: List[str]) -> None:
+        if keys:
+            await self.client.delete(*(self.prefix + key for key in keys))
+
+    async def clear(self) -> None:
+        keys = [key async for key in self.client.scan_iter(match=self.prefix + "*")]
+        if keys:
+            await self.client.delete(*keys)
+
+
+class EntityCache:
+    """
+    Read-through cache of serialized entities, keyed by kind and ID.
+    Backend errors are logged and treated as misses so the cache can never
+    fail a request.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @staticmethod
+    def key(kind: str, entity_id: int) -> str:
+        return f"{kind}:{entity_id}"
+
+    async def get_or_load(
+        self,
+        kind: str,
+        entity_id: int,
+        loader: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+    ) -> Optional[Dict[str, Any]]:
+        """Return the cached entity, or load, store and return it."""
+        key = self.key(kind, entity_id)
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Cache get failed for {key}: {e}")
+            value = None
+
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = await loader()
+        if value is not None:
+            try:
+                await self.backend.set(key, value)
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Cache set failed for {key}: {e}")
+        return value
+
+    async def invalidate(self, kind: str, entity_id: int) -> None:
+        """Drop a cached entity after it has been written."""
+        key = self.key(kind, entity_id)
+        try:
+            await self.backend.delete(key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Cache delete failed for {key}: {e}")
+
+    async def invalidate_many(self, kind: str, entity_ids: Iterable[int]) -> None:
+        """Drop several cached entities of one kind (a single round trip on Redis)."""
+        keys = [self.key(kind, entity_id) for entity_id in entity_ids]
+        try:
+            await self.backend.delete_many(keys)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Cache delete failed for {len(keys)} {kind} entries: {e}")
+
+    async def clear(self) -> None:
+        await self.backend.clear()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def create_cache_backend() -> CacheBackend:
+    """Create the cache backend selected by settings.CACHE_BACKEND."""
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCache(settings.REDIS_URL, settings.CACHE_TTL_SECONDS)
+    if settings.CACHE_BACKEND == "memory":
+        return LRUCache(settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_SECONDS)
+    return NullCache()
+
+
+entity_cache = EntityCache(create_cache_backend())
@@ -17,6 +17,7 @@ celery_app = Celery(
         "app.tasks.return_tasks",
         "app.tasks.notification_tasks",
         "app.tasks.invoice_tasks",
+        "app.tasks.maintenance_tasks",
     ],
 )
 
@@ -34,7 +35,22 @@ celery_app.conf.update(
     worker_max_tasks_per_child=1000,
 )
 
+# Periodic tasks (run `celery -A app.celery_app beat` alongside the worker)
+celery_app.conf.beat_schedule = {
+    "purge-expired-idempotency-keys": {
+        "task": "purge_expired_idempotency_keys",
+        "schedule": 60 * 60,  # hourly
+    },
+    "purge-dispatched-outbox-messages": {
+        "task": "purge_dispatched_outbox_messages",
+        "schedule": 24 * 60 * 60,  # daily
+    },
+}
+
 # Add broker transport options if using filesystem
 if settings.CELERY_BROKER_URL == "filesystem://":
     celery_app.conf.broker_transport_options = settings.CELERY_BROKER_TRANSPORT_OPTIONS
 
+
+# Task queue-wait and run-time metrics (signal handlers for publishers and workers)
+import app.metrics  # noqa: E402,F401
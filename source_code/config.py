@@ -15,9 +15,64 @@ class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:///./order_management.db"
     DATABASE_URL_ASYNC: str = "sqlite+aiosqlite:///./order_management.db"
     
+    # Connection pool (size/overflow/timeout/recycle apply to non-SQLite databases)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30  # Seconds to wait for a connection before failing
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a connection is replaced; -1 disables
+    DB_POOL_PRE_PING: bool = True
+    DB_ECHO: bool = False  # Log every SQL statement (independent of DEBUG)
+    
+    # Per-request query statistics (Server-Timing header and GET /metrics/queries)
+    QUERY_STATS_ENABLED: bool = True
+    SLOW_QUERY_MS: float = 100.0  # Statements slower than this are logged as warnings
+    QUERY_STATS_TOP_N: int = 10  # Slowest statements kept per request and per worker
+    
+    # Readiness probe (GET /health/ready)
+    HEALTH_CACHE_SECONDS: float = 5.0  # Probe results are reused for this long
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = 2.0  # Per dependency; a slower check fails
+    
+    # Prometheus metrics (GET /metrics); set PROMETHEUS_MULTIPROC_DIR when running several processes
+    METRICS_ENABLED: bool = True  # Per-route request latency histograms
+    METRICS_QUEUE_DEPTH_ENABLED: bool = True  # Report the Celery broker queue depth on scrape
+    METRICS_QUEUE_DEPTH_CACHE_SECONDS: float = 15.0  # Broker is asked at most this often
+    
+    # SQLite performance profile, applied to every SQLite connection (API and Celery)
+    SQLITE_JOURNAL_MODE: str = "WAL"  # Readers no longer block the writer
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # Safe with WAL; fsync only at checkpoints
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # Wait for locks instead of failing with "database is locked"
+    SQLITE_CACHE_SIZE_KB: int = 65536  # Page cache per connection
+    SQLITE_MMAP_SIZE: int = 268435456  # Bytes of the database file to memory-map (256 MB)
+    
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
     
+    # Entity cache for single-entity GET endpoints ("memory", "redis" or "none")
+    # The in-process "memory" cache is per worker; use "redis" when running several workers
+    CACHE_BACKEND: str = "memory"
+    CACHE_TTL_SECONDS: int = 30
+    CACHE_MAX_ENTRIES: int = 10000
+    
+    # Idempotency-Key support for POST /orders, POST /payments and refunds
+    IDEMPOTENCY_TTL_SECONDS: int = 86400  # How long a key (and its stored response) is honoured
+    IDEMPOTENCY_LEASE_SECONDS: float = 30.0  # After this, an unfinished claim is treated as abandoned
+    
+    # GET /search: matches per index that are ranked; broader queries rank the newest matches only
+    SEARCH_CANDIDATE_LIMIT: int = 1000
+    
+    # Invoice PDF rendering
+    INVOICE_RENDER_WORKERS: int = 0  # Processes for batch rendering; 0 = one per CPU core
+    INVOICE_CACHE_MAX_AGE: int = 31536000  # Invoice files never change, so clients may cache them for a year
+    INVOICE_DOWNLOAD_CHUNK_SIZE: int = 65536
+    INVOICE_TASK_CHUNK_SIZE: int = 50  # Orders per Celery task when bulk shipping queues invoice generation
+    
+    # Invoice file storage ("local" or "s3"); files are stored by content hash
+    INVOICE_STORAGE_BACKEND: str = "local"
+    INVOICE_STORAGE_DIR: str = "invoice_store"
+    INVOICE_S3_BUCKET: str = "invoices"
+    INVOICE_S3_PREFIX: str = "invoices/"
+    INVOICE_S3_ENDPOINT_URL: Optional[str] = None  # Set for MinIO or other S3-compatible servers
+    
     # Celery (defaults to filesystem broker for Windows - no Redis needed)
     # Using filesystem transport which works well for development
     CELERY_BROKER_URL: str = "filesystem://"
@@ -27,6 +82,15 @@ class Settings(BaseSettings):
         "data_folder_processed": "./celery_data/processed"
     }
     CELERY_RESULT_BACKEND: str = "file://./celery_results"
+    # Database pool per worker process; prefork children run one task at a time,
+    # so a small pool is enough (raise it for thread/gevent pools)
+    CELERY_DB_POOL_SIZE: int = 2
+    CELERY_DB_MAX_OVERFLOW: int = 2
+    
+    # Transactional outbox relay (python -m app.tasks.outbox_relay)
+    OUTBOX_RELAY_BATCH_SIZE: int = 500  # Messages published per database round trip
+    OUTBOX_RELAY_POLL_SECONDS: float = 1.0  # Idle wait between scans when the outbox is empty
+    OUTBOX_RETENTION_SECONDS: int = 604800  # Dispatched messages are purged after a week
     
     class Config:
         env_file = ".env"
@@ -1,34 +1,119 @@
-from sqlalchemy import create_engine, event
+from sqlalchemy import create_engine, event, exc
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from typing import Any, Dict, Optional
+import time
 
 from app.config import settings
+from app.query_stats import instrument_engine
 
 # Determine if using SQLite
 is_sqlite = settings.DATABASE_URL.startswith("sqlite")
 
+
+class PoolWaitStats:
+    """Counters for how long callers wait to check a connection out of a pool."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, seconds: float):
+        self.checkouts += 1
+        self.wait_seconds_total += seconds
+        if seconds > self.wait_seconds_max:
+            self.wait_seconds_max = seconds
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": round(self.wait_seconds_total, 6),
+            "wait_seconds_max": round(self.wait_seconds_max, 6),
+            "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+        }
+
+
+class _WaitTimingMixin:
+    """Times every checkout from the underlying queue pool."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.wait_stats.timeouts += 1
+            raise
+        self.wait_stats.record(time.perf_counter() - start)
+        return connection
+
+
+class TimedQueuePool(_WaitTimingMixin, QueuePool):
+    """QueuePool that records checkout wait times."""
+
+
+class TimedAsyncAdaptedQueuePool(_WaitTimingMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records checkout wait times."""
+
+
+def _pool_options(poolclass, pool_size: Optional[int] = None, max_overflow: Optional[int] = None) -> Dict[str, Any]:
+    """Engine keyword arguments for a server database pool, taken from settings."""
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE if pool_size is None else pool_size,
+        "max_overflow": settings.DB_MAX_OVERFLOW if max_overflow is None else max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+
+def set_sqlite_pragma(dbapi_conn, connection_record):
+    """Enable foreign keys and the SQLite performance profile on a new connection."""
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    # Negative cache_size is in KiB rather than pages
+    cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def apply_sqlite_pragmas(target_engine):
+    """Register set_sqlite_pragma on a sync or async engine if it is SQLite."""
+    sync_engine = getattr(target_engine, "sync_engine", target_engine)
+    if sync_engine.dialect.name == "sqlite":
+        event.listen(sync_engine, "connect", set_sqlite_pragma)
+
+
 # Synchronous database (for migrations, etc.)
 # SQLite needs different pool settings
 if is_sqlite:
     engine = create_engine(
         settings.DATABASE_URL,
         connect_args={"check_same_thread": False},  # SQLite-specific
-        pool_pre_ping=True,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        echo=settings.DB_ECHO,
     )
-    # Enable foreign keys for SQLite
-    @event.listens_for(engine, "connect")
-    def set_sqlite_pragma(dbapi_conn, connection_record):
-        cursor = dbapi_conn.cursor()
-        cursor.execute("PRAGMA foreign_keys=ON")
-        cursor.close()
+    apply_sqlite_pragmas(engine)
 else:
     engine = create_engine(
         settings.DATABASE_URL,
-        pool_pre_ping=True,
-        pool_size=10,
-        max_overflow=20,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        echo=settings.DB_ECHO,
+        **_pool_options(TimedQueuePool),
     )
+instrument_engine(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -45,17 +130,18 @@ def get_async_engine():
             _async_engine = create_async_engine(
                 settings.DATABASE_URL_ASYNC,
                 connect_args={"check_same_thread": False},
-                pool_pre_ping=True,
-                echo=settings.DEBUG,
+                pool_pre_ping=settings.DB_POOL_PRE_PING,
+                echo=settings.DB_ECHO,
             )
+            apply_sqlite_pragmas(_async_engine)
         else:
             _async_engine = create_async_engine(
                 settings.DATABASE_URL_ASYNC,
-                pool_pre_ping=True,
-                pool_size=10,
-                max_overflow=20,
-                echo=settings.DEBUG,
+                pool_pre_ping=settings.DB_POOL_PRE_PING,
+                echo=settings.DB_ECHO,
+                **_pool_options(TimedAsyncAdaptedQueuePool),
             )
+        instrument_engine(_async_engine)
     return _async_engine
 
 def get_async_session_local():
@@ -69,6 +155,32 @@ def get_async_session_local():
         )
     return _AsyncSessionLocal
 
+
+def pool_stats(pool) -> Dict[str, Any]:
+    """Snapshot of a connection pool: occupancy, overflow usage and checkout wait times."""
+    stats: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            # overflow() counts from -size, so only positive values are overflow connections
+            "overflow_in_use": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+        })
+    wait_stats = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        stats.update(wait_stats.as_dict())
+    return stats
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Pool statistics for the sync engine and, once created, the async engine."""
+    stats = {"sync": pool_stats(engine.pool)}
+    if _async_engine is not None:
+        stats["async"] = pool_stats(_async_engine.pool)
+    return stats
+
 Base = declarative_base()
 
 
@@ -81,4 +193,3 @@ async def get_db():
             yield session
         finally:
             await session.close()
-
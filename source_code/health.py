@@ -0,0 +1,108 @@
+"""
+Liveness and readiness probes.
+
+GET /health/live only shows that the process is serving requests.
+GET /health/ready checks the database, the Celery broker and the invoice
+store, each with a timeout. Results are cached for HEALTH_CACHE_SECONDS and
+concurrent probes share one in-flight check, so probe traffic adds at most
+one connection checkout per interval per worker, however often the load
+balancer asks.
+"""
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import get_async_engine
+from app.invoice_store import invoice_store
+
+
+async def check_database() -> None:
+    # Waits for a pool connection like any request would, so an exhausted pool
+    # fails the check by timing out
+    async with get_async_engine().connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+
+def _check_broker() -> None:
+    from app.celery_app import celery_app
+
+    with celery_app.connection_for_read() as connection:
+        connection.ensure_connection(max_retries=1)
+
+
+async def check_broker() -> None:
+    await asyncio.to_thread(_check_broker)
+
+
+async def check_invoice_store() -> None:
+    await asyncio.to_thread(invoice_store.check)
+
+
+class ReadinessChecker:
+    """Runs named checks concurrently and caches the combined result."""
+
+    def __init__(self, checks: Dict[str, Callable[[], Awaitable[None]]]):
+        self.checks = checks
+        self._result: Optional[Dict[str, Any]] = None
+        self._checked_at = float("-inf")
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def _run_check(self, check: Callable[[], Awaitable[None]]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(check(), timeout=settings.HEALTH_CHECK_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            error = f"timed out after {settings.HEALTH_CHECK_TIMEOUT_SECONDS:g}s"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        else:
+            error = None
+        result: Dict[str, Any] = {"ok": error is None, "ms": round((time.perf_counter() - start) * 1000, 2)}
+        if error is not None:
+            result["error"] = error
+        return result
+
+    def _fresh(self) -> bool:
+        return self._result is not None and time.monotonic() - self._checked_at < settings.HEALTH_CACHE_SECONDS
+
+    async def check(self) -> Dict[str, Any]:
+        """The cached readiness result, refreshed once it is older than HEALTH_CACHE_SECONDS."""
+        if self._fresh():
+            return self._result
+        async with self._get_lock():
+            # Another probe may have refreshed the result while this one waited
+            if self._fresh():
+                return self._result
+            names = list(self.checks)
+            results = await asyncio.gather(*(self._run_check(self.checks[name]) for name in names))
+            checks = dict(zip(names, results))
+            self._result = {
+                "status": "ready" if all(result["ok"] for result in results) else "not_ready",
+                "checked_at": datetime.utcnow().isoformat(),
+                "checks": checks,
+            }
+            self._checked_at = time.monotonic()
+            return self._result
+
+    def clear(self) -> None:
+        self._result = None
+        self._checked_at = float("-inf")
+
+
+readiness = ReadinessChecker({
+    "database": check_database,
+    "broker": check_broker,
+    "invoice_store": check_invoice_store,
+})
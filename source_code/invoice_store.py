@@ -0,0 +1,199 @@
+from pathlib import Path
+from typing import Any, Iterator, NamedTuple, Optional
+import hashlib
+import os
+import re
+import tempfile
+
+from app.config import settings
+
+# Keys written by the store: <2 hex>/<2 hex>/<sha256>.pdf
+_CONTENT_KEY = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.pdf$")
+
+
+class StoredInvoice(NamedTuple):
+    """Result of storing an invoice PDF."""
+    key: str
+    content_hash: str
+    size: int
+
+
+def content_key(content_hash: str) -> str:
+    """Sharded storage key for a SHA-256 hex digest."""
+    return f"{content_hash[:2]}/{content_hash[2:4]}/{content_hash}.pdf"
+
+
+def is_content_key(key: str) -> bool:
+    """Whether a stored file path is a content-addressed key (rather than a legacy file path)."""
+    return bool(_CONTENT_KEY.match(key))
+
+
+class InvoiceStore:
+    """
+    Interface for invoice PDF storage. Files are addressed by the SHA-256 of
+    their content, so storing an identical render twice keeps one copy.
+    """
+
+    def put(self, content: bytes) -> StoredInvoice:
+        """Store a PDF (if not already present) and return its key."""
+        content_hash = hashlib.sha256(content).hexdigest()
+        key = content_key(content_hash)
+        if self.size(key) is None:
+            self._write(key, content)
+        return StoredInvoice(key=key, content_hash=content_hash, size=len(content))
+
+    def _write(self, key: str, content: bytes) -> None:
+        raise NotImplementedError
+
+    def size(self, key: str) -> Optional[int]:
+        """Size in bytes of a stored file, or None if it does not exist."""
+        raise NotImplementedError
+
+    def iter_range(self, key: str, start: int, length: int, chunk_size: int = 65536) -> Iterator[bytes]:
+        """Yield `length` bytes of a stored file from offset `start`, in chunks."""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def check(self) -> None:
+        """Raise if the store cannot currently accept new invoices (readiness probe)."""
+        raise NotImplementedError
+
+    def read(self, key: str) -> bytes:
+        size = self.size(key)
+        if size is None:
+            raise FileNotFoundError(key)
+        return b"".join(self.iter_range(key, 0, size))
+
+
+class LocalInvoiceStore(InvoiceStore):
+    """
+    Filesystem store under a root directory, sharded two levels deep so no
+    directory holds more than a few thousand files. Keys that are not content
+    keys are treated as plain file paths, which keeps invoices recorded before
+    content addressing downloadable.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def path(self, key: str) -> Path:
+        return self.root / key if is_content_key(key) else Path(key)
+
+    def _write(self, key: str, content: bytes) -> None:
+        target = self.path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, target)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return self.path(key).stat().st_size
+        except FileNotFoundError:
+            return None
+
+    def iter_range(self, key: str, start: int, length: int, chunk_size: int = 65536) -> Iterator[bytes]:
+        with open(self.path(key), "rb") as f:
+            f.seek(start)
+            remaining = length
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def delete(self, key: str) -> None:
+        self.path(key).unlink(missing_ok=True)
+
+    def check(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".probe")
+        os.close(fd)
+        os.unlink(tmp_path)
+
+
+class S3InvoiceStore(InvoiceStore):
+    """
+    Store in an S3-compatible bucket (AWS S3, MinIO, ...). `client` is a boto3
+    S3 client, or any object with the same put/head/get/delete_object methods;
+    credentials come from the usual AWS environment variables.
+    """
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None, client: Any = None):
+        if client is None:
+            import boto3
+
+            client = boto3.client("s3", endpoint_url=endpoint_url)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    @staticmethod
+    def _is_not_found(error: Exception) -> bool:
+        code = getattr(error, "response", {}).get("Error", {}).get("Code")
+        return code in ("404", "NoSuchKey", "NotFound")
+
+    def _write(self, key: str, content: bytes) -> None:
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=self.prefix + key,
+            Body=content,
+            ContentType="application/pdf",
+        )
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+        except Exception as e:
+            if self._is_not_found(e):
+                return None
+            raise
+        return head["ContentLength"]
+
+    def iter_range(self, key: str, start: int, length: int, chunk_size: int = 65536) -> Iterator[bytes]:
+        if length <= 0:
+            return
+        response = self.client.get_object(
+            Bucket=self.bucket,
+            Key=self.prefix + key,
+            Range=f"bytes={start}-{start + length - 1}",
+        )
+        body = response["Body"]
+        try:
+            while True:
+                chunk = body.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            body.close()
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+
+    def check(self) -> None:
+        # Bucket reachability and access; a probe write per check would cost a PUT
+        self.client.head_bucket(Bucket=self.bucket)
+
+
+def create_invoice_store() -> InvoiceStore:
+    """Create the invoice store selected by settings.INVOICE_STORAGE_BACKEND."""
+    if settings.INVOICE_STORAGE_BACKEND == "s3":
+        return S3InvoiceStore(
+            settings.INVOICE_S3_BUCKET,
+            prefix=settings.INVOICE_S3_PREFIX,
+            endpoint_url=settings.INVOICE_S3_ENDPOINT_URL,
+        )
+    return LocalInvoiceStore(settings.INVOICE_STORAGE_DIR)
+
+
+invoice_store = create_invoice_store()
@@ -1,7 +1,14 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from app.config import settings
-from app.api.v1 import orders, returns, payments, invoices
+from app.cache import entity_cache
+from app.database import get_pool_stats
+from app.health import readiness
+from app.metrics import MetricsMiddleware, render_metrics
+from app.query_stats import QueryStatsMiddleware, query_stats
+from app.api.v1 import orders, returns, payments, invoices, customers, search
+from app.services.concurrency import ConcurrentUpdateError
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -18,12 +25,22 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+@app.exception_handler(ConcurrentUpdateError)
+async def concurrent_update_handler(request: Request, exc: ConcurrentUpdateError):
+    """A concurrent request changed the same order/return/payment first."""
+    return JSONResponse(status_code=409, content={"detail": str(exc)})
+
 
 # Include routers
 app.include_router(orders.router, prefix=f"{settings.API_V1_PREFIX}/orders", tags=["orders"])
 app.include_router(returns.router, prefix=f"{settings.API_V1_PREFIX}/returns", tags=["returns"])
 app.include_router(payments.router, prefix=f"{settings.API_V1_PREFIX}/payments", tags=["payments"])
 app.include_router(invoices.router, prefix=f"{settings.API_V1_PREFIX}/invoices", tags=["invoices"])
+app.include_router(customers.router, prefix=f"{settings.API_V1_PREFIX}/customers", tags=["customers"])
+app.include_router(search.router, prefix=f"{settings.API_V1_PREFIX}/search", tags=["search"])
 
 
 @app.get("/")
@@ -41,3 +58,43 @@ async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
 
+
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is up and serving requests (no dependency checks)."""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness probe: database, broker and invoice storage (cached for HEALTH_CACHE_SECONDS)."""
+    result = await readiness.check()
+    return JSONResponse(status_code=200 if result["status"] == "ready" else 503, content=result)
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Entity cache hit/miss counters for this worker."""
+    return entity_cache.stats()
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """
+    Prometheus metrics: request latency, state transitions, invoices, Celery and DB pools.
+    A plain def, so it runs in the threadpool: reading queue depths may wait on the broker.
+    """
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
+
+@app.get("/metrics/db")
+async def db_pool_metrics():
+    """Connection pool occupancy, overflow usage and checkout wait times for this worker."""
+    return get_pool_stats()
+
+
+@app.get("/metrics/queries")
+async def query_metrics():
+    """Per-route query counts and DB time, plus the slowest statements, for this worker."""
+    return query_stats.snapshot()
@@ -0,0 +1,274 @@
+"""
+Prometheus metrics for the API, the database pools and the Celery workers.
+
+Hot paths only touch pre-resolved metric children (a dict lookup plus a
+locked add), so recording stays cheap at full traffic. Values that are
+expensive or only meaningful at scrape time - connection pool occupancy and
+broker queue depth - are read by collectors when GET /metrics is scraped.
+
+With several processes (uvicorn/gunicorn workers, Celery prefork children)
+set PROMETHEUS_MULTIPROC_DIR to a directory shared by all of them on the
+host; GET /metrics then aggregates every process, including Celery task
+and invoice metrics recorded by the workers.
+"""
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
+import logging
+import os
+import threading
+import time
+
+from celery.signals import before_task_publish, task_postrun, task_prerun
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from app.config import settings
+from app.database import get_pool_stats
+from app.query_stats import route_name
+from app.services.concurrency import ConcurrentUpdateError
+
+logger = logging.getLogger(__name__)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+STATE_TRANSITIONS = Counter(
+    "state_transitions_total",
+    "Order and return state transitions by action and outcome",
+    ["entity", "action", "outcome"],
+)
+INVOICE_RENDER_SECONDS = Histogram(
+    "invoice_render_duration_seconds",
+    "Time to render an invoice PDF",
+    ["invoice_type"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+INVOICE_SIZE_BYTES = Histogram(
+    "invoice_size_bytes",
+    "Size of rendered invoice PDFs",
+    ["invoice_type"],
+    buckets=(2_000, 5_000, 10_000, 25_000, 50_000, 100_000, 250_000, 500_000, 1_000_000),
+)
+TASK_QUEUE_WAIT = Histogram(
+    "celery_task_queue_wait_seconds",
+    "Time from publishing a Celery task to a worker starting it",
+    ["task"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+TASK_DURATION = Histogram(
+    "celery_task_duration_seconds",
+    "Celery task run time by final state",
+    ["task", "state"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+
+# Header stamped on published tasks; Celery exposes it as task.request.published_at
+PUBLISHED_AT_HEADER = "published_at"
+
+_request_children: Dict[Tuple[str, str, str], object] = {}
+_transition_children: Dict[Tuple[str, str, str], object] = {}
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    key = (method, route, str(status))
+    child = _request_children.get(key)
+    if child is None:
+        child = _request_children.setdefault(key, REQUEST_LATENCY.labels(*key))
+    child.observe(seconds)
+
+
+def record_transition(entity: str, action: str, outcome: str) -> None:
+    key = (entity, action, outcome)
+    child = _transition_children.get(key)
+    if child is None:
+        child = _transition_children.setdefault(key, STATE_TRANSITIONS.labels(*key))
+    child.inc()
+
+
+def transition_label(action: str, machine) -> str:
+    """
+    The action label for a requested transition. Actions that are not
+    triggers of `machine` become "unknown" so that user input cannot create
+    new label values.
+    """
+    action = action.lower().strip()
+    return action if action in machine.TRIGGERS else "unknown"
+
+
+@contextmanager
+def track_transition(entity: str, action: str, machine) -> Iterator[None]:
+    """
+    Count a state transition as "success", "rejected" (ValueError) or
+    "conflict" (ConcurrentUpdateError). The block must include the commit.
+    """
+    action = transition_label(action, machine)
+    try:
+        yield
+    except ConcurrentUpdateError:
+        record_transition(entity, action, "conflict")
+        raise
+    except ValueError:
+        record_transition(entity, action, "rejected")
+        raise
+    record_transition(entity, action, "success")
+
+
+def observe_invoice_render(invoice_type: str, seconds: float, size: int) -> None:
+    INVOICE_RENDER_SECONDS.labels(invoice_type).observe(seconds)
+    INVOICE_SIZE_BYTES.labels(invoice_type).observe(size)
+
+
+class MetricsMiddleware:
+    """ASGI middleware that records the latency of each HTTP request by route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            method, _, route = route_name(scope).partition(" ")
+            observe_request(method, route, status, time.perf_counter() - start)
+
+
+# Celery task latency (recorded in the publishing process and the worker)
+
+_task_starts: Dict[str, float] = {}
+
+
+@before_task_publish.connect
+def _stamp_published_at(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault(PUBLISHED_AT_HEADER, time.time())
+
+
+@task_prerun.connect
+def _task_started(task_id=None, task=None, **kwargs):
+    _task_starts[task_id] = time.perf_counter()
+    published_at = getattr(task.request, PUBLISHED_AT_HEADER, None)
+    if published_at is not None:
+        TASK_QUEUE_WAIT.labels(task.name).observe(max(time.time() - float(published_at), 0.0))
+
+
+@task_postrun.connect
+def _task_finished(task_id=None, task=None, state=None, **kwargs):
+    start = _task_starts.pop(task_id, None)
+    if start is not None:
+        TASK_DURATION.labels(task.name, state or "UNKNOWN").observe(time.perf_counter() - start)
+
+
+# Scrape-time collectors
+
+class PoolStatsCollector:
+    """Connection pool occupancy and checkout waits for this process's engines."""
+
+    GAUGES = {
+        "size": "Configured pool size",
+        "checked_out": "Connections currently checked out",
+        "checked_in": "Idle connections in the pool",
+        "overflow_in_use": "Overflow connections currently open",
+        "wait_seconds_max": "Longest wait for a connection",
+    }
+    COUNTERS = {
+        "checkouts": ("db_pool_checkouts", "Connections checked out"),
+        "timeouts": ("db_pool_checkout_timeouts", "Checkouts that timed out"),
+        "wait_seconds_total": ("db_pool_wait_seconds", "Time spent waiting for a connection"),
+    }
+
+    def collect(self):
+        stats = get_pool_stats()
+        families = [
+            (key, GaugeMetricFamily(f"db_pool_{key}", documentation, labels=["engine"]))
+            for key, documentation in self.GAUGES.items()
+        ] + [
+            (key, CounterMetricFamily(name, documentation, labels=["engine"]))
+            for key, (name, documentation) in self.COUNTERS.items()
+        ]
+        for key, family in families:
+            for engine_name, engine_stats in stats.items():
+                if key in engine_stats:
+                    family.add_metric([engine_name], engine_stats[key])
+            yield family
+
+
+class QueueDepthCollector:
+    """
+    Messages waiting in the Celery broker's default queue. The broker is asked
+    at most once per METRICS_QUEUE_DEPTH_CACHE_SECONDS, however often the
+    endpoint is scraped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked_at = float("-inf")
+        self._depths: Dict[str, int] = {}
+
+    def _read_depths(self) -> Dict[str, int]:
+        from app.celery_app import celery_app
+
+        queue = celery_app.conf.task_default_queue
+        with celery_app.connection_for_read() as connection:
+            _, message_count, _ = connection.default_channel.queue_declare(queue=queue, passive=True)
+        return {queue: message_count}
+
+    def depths(self) -> Dict[str, int]:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at >= settings.METRICS_QUEUE_DEPTH_CACHE_SECONDS:
+                self._checked_at = now
+                try:
+                    self._depths = self._read_depths()
+                except Exception as e:
+                    logger.warning(f"Could not read Celery queue depth: {e}")
+                    self._depths = {}
+            return dict(self._depths)
+
+    def collect(self):
+        family = GaugeMetricFamily("celery_queue_depth", "Messages waiting in the Celery broker queue", labels=["queue"])
+        if settings.METRICS_QUEUE_DEPTH_ENABLED:
+            for queue, depth in self.depths().items():
+                family.add_metric([queue], depth)
+        yield family
+
+
+pool_stats_collector = PoolStatsCollector()
+queue_depth_collector = QueueDepthCollector()
+REGISTRY.register(pool_stats_collector)
+REGISTRY.register(queue_depth_collector)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """The Prometheus exposition text for GET /metrics and its content type."""
+    registry = REGISTRY
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # Per-process values come from the shared directory; the scrape-time
+        # collectors report on the process serving the scrape
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(pool_stats_collector)
+        registry.register(queue_depth_collector)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -2,6 +2,9 @@ from app.models.order import Order, OrderItem
 from app.models.return_model import Return, ReturnItem
 from app.models.payment import Payment
 from app.models.invoice import Invoice, InvoiceType
+from app.models.idempotency import IdempotencyKey
+from app.models.outbox import OutboxMessage
+from app.models import search  # noqa: F401  (registers the search indexes on the metadata)
 
-__all__ = ["Order", "OrderItem", "Return", "ReturnItem", "Payment", "Invoice", "InvoiceType"]
+__all__ = ["Order", "OrderItem", "Return", "ReturnItem", "Payment", "Invoice", "InvoiceType", "IdempotencyKey", "OutboxMessage"]
 
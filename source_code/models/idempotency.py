@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+
+from app.database import Base
+
+
+class IdempotencyKey(Base):
+    """Stored outcome of a request sent with an Idempotency-Key header."""
+    
+    __tablename__ = "idempotency_keys"
+    
+    # Keys are unique per endpoint (and per resource for nested endpoints)
+    scope = Column(String(100), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    
+    # SHA-256 of the request body; a reused key with another body is rejected
+    request_hash = Column(String(64), nullable=False)
+    
+    # Stored response; both are NULL while the first request is still running
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(JSON, nullable=True)
+    
+    # Naive UTC timestamps; created_at also identifies the current claim, which
+    # is reset when a claim unfinished after IDEMPOTENCY_LEASE_SECONDS is taken over
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    
+    @property
+    def completed(self) -> bool:
+        return self.status_code is not None
+    
+    def __repr__(self):
+        return f"<IdempotencyKey(scope={self.scope}, key={self.key}, status_code={self.status_code})>"
@@ -30,6 +30,7 @@ class Invoice(Base):
     file_path = Column(String(500), nullable=False)
     file_name = Column(String(255), nullable=False)
     file_size = Column(Integer, nullable=True)  # Size in bytes
+    content_hash = Column(String(64), nullable=True)  # SHA-256 of the file, served as its ETag
     
     # Metadata
     notes = Column(Text, nullable=True)
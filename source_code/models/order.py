@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, Enum, Text, JSON
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, Enum, Text, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime, timezone
@@ -22,6 +22,13 @@ class Order(Base):
     """Order model representing a customer order."""
     
     __tablename__ = "orders"
+    __table_args__ = (
+        # Keyset pagination walks (created_at, id) newest-first
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        # Customer order history: newest-first pages and status counts per customer
+        Index("ix_orders_customer_id_created_at_id", "customer_id", "created_at", "id"),
+        Index("ix_orders_customer_id_status", "customer_id", "status"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     order_number = Column(String(50), unique=True, index=True, nullable=False)
@@ -33,6 +40,11 @@ class Order(Base):
     status = Column(Enum(OrderStatus), default=OrderStatus.PENDING, nullable=False, index=True)
     previous_status = Column(Enum(OrderStatus), nullable=True)
     
+    # Optimistic concurrency: every ORM UPDATE checks and increments the version,
+    # so a write based on a stale read fails instead of overwriting
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
+    
     # Financial information
     subtotal = Column(Numeric(10, 2), nullable=False)
     tax = Column(Numeric(10, 2), default=0.00)
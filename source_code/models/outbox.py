@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, Index
+from datetime import datetime
+
+from app.database import Base
+
+
+class OutboxMessage(Base):
+    """Celery task call recorded in the same transaction as the change that triggers it."""
+    
+    __tablename__ = "outbox_messages"
+    __table_args__ = (
+        # The relay scans undispatched messages oldest-first
+        Index("ix_outbox_messages_dispatched_at_id", "dispatched_at", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    task_name = Column(String(200), nullable=False)
+    args = Column(JSON, nullable=False)
+    
+    # Delivery bookkeeping (naive UTC)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    dispatched_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+    
+    def __repr__(self):
+        return f"<OutboxMessage(id={self.id}, task_name={self.task_name}, dispatched_at={self.dispatched_at})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, Enum, Text, JSON
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, Enum, Text, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime, timezone
@@ -32,6 +32,10 @@ class Payment(Base):
     """Payment model representing a payment transaction."""
     
     __tablename__ = "payments"
+    __table_args__ = (
+        # Keyset pagination walks (created_at, id) newest-first
+        Index("ix_payments_created_at_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     payment_number = Column(String(50), unique=True, index=True, nullable=False)
@@ -40,6 +44,10 @@ class Payment(Base):
     # Status
     status = Column(Enum(PaymentStatus), default=PaymentStatus.PENDING, nullable=False, index=True)
     
+    # Row version for optimistic concurrency (bumped on every ORM UPDATE)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
+    
     # Payment information
     method = Column(Enum(PaymentMethod), nullable=False)
     amount = Column(Numeric(10, 2), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, Enum, Text, JSON
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, Enum, Text, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime, timezone
@@ -35,6 +35,10 @@ class Return(Base):
     """Return model representing a product return."""
     
     __tablename__ = "returns"
+    __table_args__ = (
+        # Keyset pagination walks (created_at, id) newest-first
+        Index("ix_returns_created_at_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     return_number = Column(String(50), unique=True, index=True, nullable=False)
@@ -44,6 +48,10 @@ class Return(Base):
     status = Column(Enum(ReturnStatus), default=ReturnStatus.INITIATED, nullable=False, index=True)
     previous_status = Column(Enum(ReturnStatus), nullable=True)
     
+    # Row version for optimistic concurrency (bumped on every ORM UPDATE)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
+    
     # Return information
     reason = Column(Enum(ReturnReason), nullable=False)
     reason_description = Column(Text, nullable=True)
@@ -0,0 +1,86 @@
+"""
+Search indexes for GET /api/v1/search.
+
+SQLite: one external-content FTS5 table per searchable table, using the
+trigram tokenizer so that any substring of three or more characters matches
+(partial order numbers, SKUs, emails). The FTS rowid is the source row id and
+triggers keep the index in sync on every INSERT, DELETE and UPDATE of an
+indexed column, including bulk Core inserts.
+
+PostgreSQL: a multi-column pg_trgm GIN index on the same columns, which
+PostgreSQL maintains itself and which serves the ILIKE '%term%' searches.
+"""
+from typing import Dict, List, Tuple
+
+from sqlalchemy import DDL, Index, event
+
+from app.database import Base
+from app.models.order import Order, OrderItem
+from app.models.payment import Payment
+from app.models.return_model import Return
+
+# Source table -> indexed columns; the FTS table is "<table>_fts"
+SEARCH_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "orders": ("order_number", "customer_email", "customer_name"),
+    "order_items": ("product_sku", "product_name"),
+    "returns": ("return_number", "tracking_number"),
+    "payments": ("payment_number", "transaction_id"),
+}
+
+
+def fts_table(table: str) -> str:
+    return f"{table}_fts"
+
+
+def fts_create_statements(table: str, columns: Tuple[str, ...]) -> List[str]:
+    """CREATE statements for the FTS5 table of `table` and its sync triggers."""
+    fts = fts_table(table)
+    names = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    insert = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values});"
+    delete = f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{names}, content='{table}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {names} ON {table} BEGIN {delete} {insert} END",
+    ]
+
+
+def _create_fts(target, connection, **kw):
+    if connection.dialect.name != "sqlite":
+        return
+    for table, columns in SEARCH_COLUMNS.items():
+        for statement in fts_create_statements(table, columns):
+            connection.exec_driver_sql(statement)
+
+
+def _drop_fts(target, connection, **kw):
+    if connection.dialect.name != "sqlite":
+        return
+    # The triggers go with their source tables; the FTS tables are not in the metadata
+    for table in SEARCH_COLUMNS:
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {fts_table(table)}")
+
+
+event.listen(Base.metadata, "after_create", _create_fts)
+event.listen(Base.metadata, "before_drop", _drop_fts)
+
+# pg_trgm must exist before the trigram indexes below are created
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+for _model in (Order, OrderItem, Return, Payment):
+    _table = _model.__table__
+    _columns = SEARCH_COLUMNS[_table.name]
+    Index(
+        f"ix_{_table.name}_search_trgm",
+        *(_table.c[name] for name in _columns),
+        postgresql_using="gin",
+        postgresql_ops={name: "gin_trgm_ops" for name in _columns},
+    ).ddl_if(dialect="postgresql")
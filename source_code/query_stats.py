@@ -0,0 +1,221 @@
+"""
+Per-request SQL query statistics.
+
+SQLAlchemy cursor events on every instrumented engine add each statement's
+duration to the stats of the request being served (tracked in a ContextVar
+set by QueryStatsMiddleware). The middleware reports them in a Server-Timing
+header, logs slow statements, and folds them into per-route aggregates
+served by GET /metrics/queries.
+"""
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import heapq
+import logging
+import threading
+import time
+
+from sqlalchemy import event
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Longest statement text kept in slow-statement lists
+STATEMENT_PREVIEW_CHARS = 500
+
+
+def _preview(statement: str) -> str:
+    statement = " ".join(statement.split())
+    if len(statement) > STATEMENT_PREVIEW_CHARS:
+        return statement[:STATEMENT_PREVIEW_CHARS] + "..."
+    return statement
+
+
+class RequestQueryStats:
+    """Queries issued while serving one request."""
+
+    def __init__(self, top_n: int):
+        self.top_n = top_n
+        self.count = 0
+        self.seconds = 0.0
+        # Min-heap of (seconds, statement) holding the slowest top_n statements
+        self.slowest: List[Tuple[float, str]] = []
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        entry = (seconds, statement)
+        if len(self.slowest) < self.top_n:
+            heapq.heappush(self.slowest, entry)
+        elif seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, e.g. `db;dur=12.34;desc="5 queries"`."""
+        return f'db;dur={self.seconds * 1000:.2f};desc="{self.count} queries"'
+
+
+_current: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_times", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get("query_start_times")
+    if not start_times:
+        return
+    seconds = time.perf_counter() - start_times.pop()
+
+    if seconds * 1000 >= settings.SLOW_QUERY_MS:
+        logger.warning(f"Slow query ({seconds * 1000:.1f} ms): {_preview(statement)}")
+
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+
+
+def instrument_engine(target_engine) -> None:
+    """Time every statement on a sync or async engine (idempotent)."""
+    sync_engine = getattr(target_engine, "sync_engine", target_engine)
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class RouteQueryStats:
+    """Aggregate of RequestQueryStats for one route."""
+
+    def __init__(self):
+        self.requests = 0
+        self.queries_total = 0
+        self.queries_max = 0
+        self.db_seconds_total = 0.0
+        self.db_seconds_max = 0.0
+
+    def add(self, stats: RequestQueryStats) -> None:
+        self.requests += 1
+        self.queries_total += stats.count
+        self.queries_max = max(self.queries_max, stats.count)
+        self.db_seconds_total += stats.seconds
+        self.db_seconds_max = max(self.db_seconds_max, stats.seconds)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "queries_total": self.queries_total,
+            "queries_avg": round(self.queries_total / self.requests, 2) if self.requests else 0.0,
+            "queries_max": self.queries_max,
+            "db_ms_total": round(self.db_seconds_total * 1000, 3),
+            "db_ms_avg": round(self.db_seconds_total * 1000 / self.requests, 3) if self.requests else 0.0,
+            "db_ms_max": round(self.db_seconds_max * 1000, 3),
+        }
+
+
+class QueryStatsRegistry:
+    """Per-route query aggregates and the slowest statements seen by this worker."""
+
+    def __init__(self, top_n: int):
+        self.top_n = top_n
+        self._routes: Dict[str, RouteQueryStats] = {}
+        self._slowest: List[Tuple[float, str, str]] = []
+        self._observers: List[Callable[[str, RequestQueryStats], None]] = []
+        self._lock = threading.Lock()
+
+    def record(self, route: str, stats: RequestQueryStats) -> None:
+        with self._lock:
+            self._routes.setdefault(route, RouteQueryStats()).add(stats)
+            for seconds, statement in stats.slowest:
+                entry = (seconds, route, statement)
+                if len(self._slowest) < self.top_n:
+                    heapq.heappush(self._slowest, entry)
+                elif seconds > self._slowest[0][0]:
+                    heapq.heapreplace(self._slowest, entry)
+            observers = list(self._observers)
+        for observer in observers:
+            observer(route, stats)
+
+    def add_observer(self, observer: Callable[[str, RequestQueryStats], None]) -> None:
+        """Call `observer(route, stats)` after every request (used by the test query budget)."""
+        with self._lock:
+            self._observers.append(observer)
+
+    def remove_observer(self, observer: Callable[[str, RequestQueryStats], None]) -> None:
+        with self._lock:
+            self._observers.remove(observer)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            routes = {route: stats.as_dict() for route, stats in sorted(self._routes.items())}
+            slowest = sorted(self._slowest, reverse=True)
+        return {
+            "routes": routes,
+            "slowest": [
+                {"route": route, "ms": round(seconds * 1000, 3), "statement": _preview(statement)}
+                for seconds, route, statement in slowest
+            ],
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._routes.clear()
+            self._slowest.clear()
+
+
+query_stats = QueryStatsRegistry(settings.QUERY_STATS_TOP_N)
+
+
+def route_name(scope) -> str:
+    """
+    "GET /api/v1/orders/{order_id}" for the matched route. Unmatched requests
+    share one entry so that arbitrary 404 paths cannot grow the registry.
+    """
+    method = scope.get("method", "")
+    path = scope.get("path", "")
+    template = getattr(scope.get("route"), "path_format", None)
+    if template is None:
+        return f"{method} (unmatched)"
+    # The route template may be relative to an included router's prefix; recover
+    # the prefix by rendering the template with this request's path parameters
+    try:
+        rendered = template.format(**{key: str(value) for key, value in scope.get("path_params", {}).items()})
+    except (KeyError, IndexError, ValueError):
+        return f"{method} {path}"
+    if not path.endswith(rendered):
+        return f"{method} {path}"
+    return f"{method} {path[:len(path) - len(rendered)]}{template}"
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware that collects the queries of each HTTP request, adds a
+    Server-Timing header and records them in the `query_stats` registry.
+    """
+
+    def __init__(self, app, registry: QueryStatsRegistry = query_stats):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.QUERY_STATS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats(self.registry.top_n)
+        token = _current.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                # Queries issued while a streamed body is still being sent are
+                # not in the header, but are included in the aggregates
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing().encode("latin-1")))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            self.registry.record(route_name(scope), stats)
@@ -5,6 +5,11 @@ from app.schemas.order import (
     OrderItemCreate,
     OrderItemResponse,
     OrderStateUpdate,
+    OrderBulkResult,
+    OrderBulkResponse,
+    OrderStateBulkItem,
+    OrderStateBulkResult,
+    OrderStateBulkResponse,
 )
 from app.schemas.return_schema import (
     ReturnCreate,
@@ -28,6 +33,11 @@ __all__ = [
     "OrderItemCreate",
     "OrderItemResponse",
     "OrderStateUpdate",
+    "OrderBulkResult",
+    "OrderBulkResponse",
+    "OrderStateBulkItem",
+    "OrderStateBulkResult",
+    "OrderStateBulkResponse",
     "ReturnCreate",
     "ReturnUpdate",
     "ReturnResponse",
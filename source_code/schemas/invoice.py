@@ -14,6 +14,7 @@ class InvoiceResponse(BaseModel):
     file_path: str
     file_name: str
     file_size: Optional[int] = None
+    content_hash: Optional[str] = None
     notes: Optional[str] = None
     created_at: datetime
     
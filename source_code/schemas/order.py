@@ -84,3 +84,43 @@ class OrderResponse(BaseModel):
     class Config:
         from_attributes = True
 
+
+# OrderResponse fields returned by list endpoints with view=summary
+ORDER_SUMMARY_FIELDS = ("id", "order_number", "customer_id", "customer_name", "status", "total", "currency", "created_at")
+
+
+class OrderBulkResult(BaseModel):
+    """Per-order outcome of a bulk create request."""
+    index: int = Field(..., description="Position of the order in the request body")
+    success: bool
+    order: Optional[OrderResponse] = None
+    error: Optional[str] = None
+
+
+class OrderBulkResponse(BaseModel):
+    """Schema for bulk order creation response."""
+    created: int
+    failed: int
+    results: List[OrderBulkResult]
+
+
+class OrderStateBulkItem(BaseModel):
+    """One transition in a bulk state update."""
+    order_id: int
+    action: str = Field(..., description="State transition action (e.g., 'confirm', 'ship', 'cancel')")
+
+
+class OrderStateBulkResult(BaseModel):
+    """Per-transition outcome of a bulk state update."""
+    index: int = Field(..., description="Position of the transition in the request body")
+    order_id: int
+    success: bool
+    order: Optional[OrderResponse] = None
+    error: Optional[str] = None
+
+
+class OrderStateBulkResponse(BaseModel):
+    """Schema for bulk state update response."""
+    succeeded: int
+    failed: int
+    results: List[OrderStateBulkResult]
@@ -87,3 +87,6 @@ class ReturnResponse(BaseModel):
     class Config:
         from_attributes = True
 
+
+# ReturnResponse fields returned by list endpoints with view=summary
+RETURN_SUMMARY_FIELDS = ("id", "return_number", "order_id", "status", "reason", "refund_amount", "currency", "created_at")
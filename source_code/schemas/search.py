@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
+
+SearchEntity = Literal["order", "order_item", "return", "payment"]
+
+
+class SearchHit(BaseModel):
+    """One search result; `order_id` is the order the hit belongs to."""
+    entity: SearchEntity
+    id: int
+    order_id: int
+    reference: str = Field(description="Order, return or payment number, or the SKU of an order item")
+    detail: Optional[str] = Field(None, description="Customer, product name, tracking number or transaction ID")
+    score: float = Field(description="Relevance; higher is better (comparable within one response)")
@@ -0,0 +1,85 @@
+"""
+Concurrency control for read-modify-write operations on versioned rows.
+
+Order, Return and Payment carry a version column (SQLAlchemy version_id_col),
+so every ORM UPDATE is conditional on the version that was read. Two requests
+racing on the same row can therefore not both succeed: the loser's UPDATE
+matches no row and fails. On PostgreSQL the row is additionally locked with
+SELECT ... FOR UPDATE NOWAIT before it is checked, so a concurrent writer fails
+immediately instead of queueing behind the lock. Both cases surface as
+ConcurrentUpdateError, which the API maps to 409 Conflict.
+"""
+from sqlalchemy import inspect
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+
+# PostgreSQL lock_not_available (raised by NOWAIT)
+_PG_LOCK_NOT_AVAILABLE = "55P03"
+
+
+class ConcurrentUpdateError(Exception):
+    """The row was changed or locked by another request; reload and retry."""
+
+
+def _is_lock_conflict(exc: DBAPIError) -> bool:
+    orig = getattr(exc, "orig", None)
+    code = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    return code == _PG_LOCK_NOT_AVAILABLE or "database is locked" in str(orig)
+
+
+def _conflict(entity=None) -> ConcurrentUpdateError:
+    if entity is None:
+        return ConcurrentUpdateError("Rows were modified by a concurrent request; reload them and retry")
+    # The identity survives the rollback that expires the entity's attributes
+    identity = inspect(entity).identity
+    entity_id = identity[0] if identity else None
+    return ConcurrentUpdateError(
+        f"{type(entity).__name__} {entity_id} was modified by a concurrent request; reload it and retry"
+    )
+
+
+async def lock_for_update(db: AsyncSession, entity) -> None:
+    """
+    Lock the entity's row for the rest of the transaction and reload it, on
+    databases with row locks (PostgreSQL). Elsewhere this is a no-op and the
+    version check at commit time catches lost races.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    try:
+        await db.refresh(entity, with_for_update={"nowait": True})
+    except DBAPIError as e:
+        if not _is_lock_conflict(e):
+            raise
+        await db.rollback()
+        raise _conflict(entity) from e
+
+
+async def _run_versioned(operation, db: AsyncSession, entity) -> None:
+    try:
+        await operation()
+    except StaleDataError as e:
+        await db.rollback()
+        raise _conflict(entity) from e
+    except DBAPIError as e:
+        if not _is_lock_conflict(e):
+            raise
+        await db.rollback()
+        raise _conflict(entity) from e
+
+
+async def commit_versioned(db: AsyncSession, entity=None) -> None:
+    """
+    Commit changes to versioned entities, raising ConcurrentUpdateError if any
+    changed underneath. Pass the entity when only one was modified, for the message.
+    """
+    await _run_versioned(db.commit, db, entity)
+
+
+async def flush_versioned(db: AsyncSession, entity=None) -> None:
+    """
+    Like commit_versioned, but only flush: the caller commits the changes
+    together with its own writes.
+    """
+    await _run_versioned(db.flush, db, entity)
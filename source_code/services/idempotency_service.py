@@ -0,0 +1,159 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import Any, Optional
+from datetime import datetime, timedelta
+import hashlib
+import json
+
+from app.config import settings
+from app.models.idempotency import IdempotencyKey
+
+
+class IdempotencyKeyInUse(ValueError):
+    """The first request with this key is still being processed."""
+
+
+class IdempotencyKeyMismatch(ValueError):
+    """The key was already used with a different request body."""
+
+
+class IdempotencyService:
+    """Service for Idempotency-Key bookkeeping."""
+    
+    @staticmethod
+    def request_hash(payload: Any) -> str:
+        """Stable SHA-256 of a JSON-compatible request payload."""
+        encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    async def begin(
+        db: AsyncSession,
+        scope: str,
+        key: str,
+        request_hash: str,
+    ) -> IdempotencyKey:
+        """
+        Claim a key before running the request.
+        Returns the stored record: if it is `completed`, replay its response;
+        otherwise it is our claim (run the request, then call complete before
+        committing). The claim is committed on its own so that concurrent
+        repeats see it; the request's changes are committed with the response.
+        Raises IdempotencyKeyInUse / IdempotencyKeyMismatch otherwise.
+        """
+        now = datetime.utcnow()
+        record = await db.get(IdempotencyKey, (scope, key), populate_existing=True)
+        
+        if record is not None and record.expires_at <= now:
+            await db.delete(record)
+            await db.flush()
+            record = None
+        
+        if record is not None:
+            if record.request_hash != request_hash:
+                raise IdempotencyKeyMismatch(
+                    f"Idempotency-Key {key} was already used with a different request"
+                )
+            if record.completed:
+                return record
+            if record.created_at > now - timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS):
+                raise IdempotencyKeyInUse(f"A request with Idempotency-Key {key} is still in progress")
+            return await IdempotencyService._take_over(db, record, now)
+        
+        record = IdempotencyKey(
+            scope=scope,
+            key=key,
+            request_hash=request_hash,
+            created_at=now,
+            expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+        )
+        db.add(record)
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Another request claimed the same key between our lookup and insert
+            await db.rollback()
+            raise IdempotencyKeyInUse(f"A request with Idempotency-Key {key} is still in progress")
+        return record
+    
+    @staticmethod
+    async def _take_over(db: AsyncSession, record: IdempotencyKey, now: datetime) -> IdempotencyKey:
+        """
+        Re-claim a key whose request stopped before finishing. Its changes would
+        have been committed together with its response, so none were made.
+        created_at is the claim token: resetting it fences off the old request.
+        """
+        result = await db.execute(
+            update(IdempotencyKey)
+            .where(
+                IdempotencyKey.scope == record.scope,
+                IdempotencyKey.key == record.key,
+                IdempotencyKey.created_at == record.created_at,
+            )
+            .values(created_at=now, expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS))
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            await db.rollback()
+            raise IdempotencyKeyInUse(f"A request with Idempotency-Key {record.key} is still in progress")
+        await db.commit()
+        set_committed_value(record, "created_at", now)
+        return record
+    
+    @staticmethod
+    async def complete(
+        db: AsyncSession,
+        claim: IdempotencyKey,
+        status_code: int,
+        response_body: Any,
+    ) -> None:
+        """
+        Store the response on our claim, in the transaction holding the
+        request's changes (the caller commits both at once). Raises
+        IdempotencyKeyInUse if the claim was taken over in the meantime.
+        """
+        result = await db.execute(
+            update(IdempotencyKey)
+            .where(
+                IdempotencyKey.scope == claim.scope,
+                IdempotencyKey.key == claim.key,
+                IdempotencyKey.created_at == claim.created_at,
+                IdempotencyKey.status_code.is_(None),
+            )
+            .values(status_code=status_code, response_body=response_body)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            raise IdempotencyKeyInUse(
+                f"The request with Idempotency-Key {claim.key} took too long and was taken over by a retry"
+            )
+    
+    @staticmethod
+    async def release(db: AsyncSession, scope: str, key: str, claimed_at: datetime) -> None:
+        """
+        Roll back a failed request and drop its claim, so the client can retry
+        with the key. Takes the claim's fields rather than the record, which
+        the failed request may already have expired with its own rollback.
+        """
+        await db.rollback()
+        await db.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.scope == scope,
+                IdempotencyKey.key == key,
+                IdempotencyKey.created_at == claimed_at,
+                IdempotencyKey.status_code.is_(None),
+            )
+        )
+        await db.commit()
+    
+    @staticmethod
+    def purge_expired(db: Session, now: Optional[datetime] = None) -> int:
+        """Delete expired keys (sync, for the Celery beat task). Returns the number removed."""
+        result = db.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.expires_at <= (now or datetime.utcnow()))
+        )
+        db.commit()
+        return result.rowcount
@@ -0,0 +1,114 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import AsyncIterator, Iterator, Optional
+from datetime import date, datetime, time, timedelta
+import asyncio
+import csv
+import tempfile
+
+from app.invoice_store import invoice_store
+from app.models.invoice import Invoice, InvoiceType
+from app.services.zip_stream import DEFLATED, STORED, ZipStreamWriter
+
+MANIFEST_NAME = "manifest.csv"
+MANIFEST_FIELDS = [
+    "archive_name", "invoice_number", "invoice_type", "order_id", "return_id",
+    "file_name", "file_size", "content_hash", "created_at", "status",
+]
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = 500
+# Manifest rows are kept in memory up to this size, then spilled to a temp file
+MANIFEST_SPOOL_BYTES = 1024 * 1024
+
+
+class InvoiceExportService:
+    """Service for exporting invoices as a streamed ZIP archive."""
+    
+    @staticmethod
+    def export_query(
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        invoice_type: Optional[InvoiceType] = None,
+    ):
+        """Invoices created between date_from and date_to (both inclusive), oldest first."""
+        query = select(Invoice)
+        if date_from:
+            query = query.where(Invoice.created_at >= datetime.combine(date_from, time.min))
+        if date_to:
+            query = query.where(Invoice.created_at < datetime.combine(date_to + timedelta(days=1), time.min))
+        if invoice_type:
+            query = query.where(Invoice.invoice_type == invoice_type)
+        return query.order_by(Invoice.created_at, Invoice.id)
+    
+    @staticmethod
+    def archive_name(invoice: Invoice) -> str:
+        """Path of an invoice's PDF inside the export archive."""
+        return f"{invoice.invoice_type.value}/{invoice.invoice_number}.pdf"
+    
+    @staticmethod
+    def _read_file(file_path: str, chunk_size: int = 1024 * 1024) -> Optional[Iterator[bytes]]:
+        size = invoice_store.size(file_path)
+        if size is None:
+            return None
+        return invoice_store.iter_range(file_path, 0, size, chunk_size=chunk_size)
+    
+    @staticmethod
+    async def export_zip(
+        db: AsyncSession,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        invoice_type: Optional[InvoiceType] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Yield a ZIP archive of matching invoice PDFs followed by manifest.csv.
+        Rows come from a server-side cursor and each file is copied in chunks, so
+        memory use does not grow with the number of invoices. Invoices whose file
+        is missing are listed in the manifest with status "missing".
+        """
+        archive = ZipStreamWriter()
+        manifest_file = tempfile.SpooledTemporaryFile(max_size=MANIFEST_SPOOL_BYTES, mode="w+", newline="")
+        manifest = csv.DictWriter(manifest_file, fieldnames=MANIFEST_FIELDS)
+        manifest.writeheader()
+        
+        try:
+            query = InvoiceExportService.export_query(date_from, date_to, invoice_type)
+            result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            
+            async for invoice in result.scalars():
+                name = InvoiceExportService.archive_name(invoice)
+                chunks = await asyncio.to_thread(InvoiceExportService._read_file, invoice.file_path)
+                
+                if chunks is not None:
+                    # PDFs are already compressed, so they are stored as-is
+                    yield archive.start_entry(name, invoice.created_at, method=STORED)
+                    while True:
+                        chunk = await asyncio.to_thread(next, chunks, None)
+                        if chunk is None:
+                            break
+                        yield archive.write(chunk)
+                    yield archive.end_entry()
+                
+                manifest.writerow({
+                    "archive_name": name,
+                    "invoice_number": invoice.invoice_number,
+                    "invoice_type": invoice.invoice_type.value,
+                    "order_id": invoice.order_id,
+                    "return_id": invoice.return_id,
+                    "file_name": invoice.file_name,
+                    "file_size": invoice.file_size,
+                    "content_hash": invoice.content_hash,
+                    "created_at": invoice.created_at.isoformat(),
+                    "status": "included" if chunks is not None else "missing",
+                })
+            
+            manifest_file.seek(0)
+            yield archive.start_entry(MANIFEST_NAME, method=DEFLATED)
+            for block in iter(lambda: manifest_file.read(64 * 1024), ""):
+                yield archive.write(block.encode("utf-8"))
+            yield archive.end_entry()
+            
+            for chunk in archive.close():
+                yield chunk
+        finally:
+            manifest_file.close()
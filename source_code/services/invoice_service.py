@@ -1,7 +1,8 @@
-from typing import Optional, Dict, Any
-from datetime import datetime
+from typing import Optional, Dict, Any, Iterable, List, Sequence
+from concurrent.futures import ProcessPoolExecutor
 from decimal import Decimal
-from pathlib import Path
+from types import SimpleNamespace
+import io
 import os
 
 from reportlab.lib import colors
@@ -11,64 +12,172 @@ from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
 from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
 
+from app.config import settings
 from app.models.order import Order, OrderItem
 from app.models.return_model import Return, ReturnItem
+from app.models.invoice import Invoice, InvoiceType
+from app.services.invoice_storage_service import InvoiceStorageService
+
+
+# Page layout shared by every invoice document
+DOC_TEMPLATE_OPTIONS: Dict[str, Any] = {
+    "pagesize": letter,
+    "rightMargin": 72,
+    "leftMargin": 72,
+    "topMargin": 72,
+    "bottomMargin": 18,
+    # No creation timestamp or random document ID, so identical invoices
+    # render to identical bytes and deduplicate in the content-addressed store
+    "invariant": True,
+}
+
+# Paragraph and table styles are built once per process and reused by every
+# render; building the sample stylesheet dominated the cost of small invoices.
+_SAMPLE_STYLES = getSampleStyleSheet()
+
+PARAGRAPH_STYLES: Dict[str, ParagraphStyle] = {
+    "title": ParagraphStyle(
+        'CustomTitle',
+        parent=_SAMPLE_STYLES['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#1a1a1a'),
+        spaceAfter=30,
+        alignment=TA_CENTER,
+    ),
+    "heading": ParagraphStyle(
+        'CustomHeading',
+        parent=_SAMPLE_STYLES['Heading2'],
+        fontSize=14,
+        textColor=colors.HexColor('#333333'),
+        spaceAfter=12,
+    ),
+    "normal": ParagraphStyle(
+        'InvoiceNormal',
+        parent=_SAMPLE_STYLES['Normal'],
+        fontSize=10,
+    ),
+    "footer": ParagraphStyle(
+        'Footer',
+        parent=_SAMPLE_STYLES['Normal'],
+        fontSize=10,
+        textColor=colors.HexColor('#666666'),
+        alignment=TA_CENTER,
+        spaceBefore=20,
+    ),
+}
+
+
+def _items_table_style(header_color: str, first_right_column: int) -> TableStyle:
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(header_color)),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('ALIGN', (first_right_column, 0), (-1, -1), 'RIGHT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 11),
+        ('FONTSIZE', (0, 1), (-1, -1), 9),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ('TOPPADDING', (0, 0), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f5f5f5')]),
+    ])
+
+
+TABLE_STYLES: Dict[str, TableStyle] = {
+    "details": TableStyle([
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ]),
+    "addresses": TableStyle([
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ('TOPPADDING', (0, 0), (-1, -1), 6),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ]),
+    "order_items": _items_table_style('#4a90e2', first_right_column=2),
+    "return_items": _items_table_style('#e74c3c', first_right_column=3),
+    "totals": TableStyle([
+        ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -2), 10),
+        ('FONTSIZE', (0, -1), (-1, -1), 12),
+        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ('TOPPADDING', (0, 0), (-1, -1), 8),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ('LINEABOVE', (0, -2), (-1, -2), 1, colors.grey),
+    ]),
+}
+
+_ORDER_FIELDS = (
+    "order_number", "created_at", "shipped_at", "customer_name", "customer_email",
+    "shipping_address", "subtotal", "tax", "shipping_cost", "total",
+)
+_ORDER_ITEM_FIELDS = ("product_name", "product_sku", "quantity", "unit_price", "total_price")
+_RETURN_FIELDS = (
+    "return_number", "created_at", "reason", "processed_at", "refunded_at",
+    "refund_amount", "refund_method",
+)
+_RETURN_ITEM_FIELDS = ("product_name", "product_sku", "quantity", "refund_amount")
+
+
+def _snapshot(obj: Any, fields: Sequence[str]) -> SimpleNamespace:
+    return SimpleNamespace(**{field: getattr(obj, field) for field in fields})
+
+
+def order_render_snapshot(order: Order) -> SimpleNamespace:
+    """Plain, picklable copy of the order fields an invoice renders."""
+    snapshot = _snapshot(order, _ORDER_FIELDS)
+    snapshot.items = [_snapshot(item, _ORDER_ITEM_FIELDS) for item in order.items]
+    return snapshot
+
+
+def return_render_snapshot(return_obj: Return) -> SimpleNamespace:
+    """Plain, picklable copy of the return fields a credit memo renders."""
+    snapshot = _snapshot(return_obj, _RETURN_FIELDS)
+    snapshot.items = [_snapshot(item, _RETURN_ITEM_FIELDS) for item in return_obj.items]
+    snapshot.order = (
+        _snapshot(return_obj.order, ("order_number", "customer_name", "customer_email"))
+        if return_obj.order else None
+    )
+    return snapshot
 
 
 class InvoiceService:
-    """Service for generating PDF invoices."""
+    """
+    Service for generating PDF invoices. render_* return the PDF bytes; the
+    Celery tasks and the batch generate_*_invoices save them in the
+    content-addressed app.invoice_store and record them.
+    """
     
-    # Create invoices directory if it doesn't exist
-    INVOICES_DIR = Path("invoices")
-    INVOICES_DIR.mkdir(exist_ok=True)
+    @staticmethod
+    def order_invoice_file_name(order: Order) -> str:
+        """Download file name for an order invoice."""
+        return f"invoice_order_{order.order_number}.pdf"
     
     @staticmethod
-    def generate_order_invoice(order: Order) -> str:
-        """
-        Generate PDF invoice for an order.
-        Returns the file path of the generated invoice.
-        """
-        # Generate filename
-        filename = f"invoice_order_{order.order_number}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        filepath = InvoiceService.INVOICES_DIR / filename
+    def return_invoice_file_name(return_obj: Return) -> str:
+        """Download file name for a return credit memo."""
+        return f"credit_memo_return_{return_obj.return_number}.pdf"
+    
+    @staticmethod
+    def render_order_invoice(order: Order) -> bytes:
+        """Render the PDF invoice for an order."""
+        buffer = io.BytesIO()
         
         # Create PDF document
-        doc = SimpleDocTemplate(
-            str(filepath),
-            pagesize=letter,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=18
-        )
+        doc = SimpleDocTemplate(buffer, **DOC_TEMPLATE_OPTIONS)
         
         # Container for the 'Flowable' objects
         elements = []
         
-        # Define styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#1a1a1a'),
-            spaceAfter=30,
-            alignment=TA_CENTER,
-        )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=14,
-            textColor=colors.HexColor('#333333'),
-            spaceAfter=12,
-        )
-        
-        normal_style = styles['Normal']
-        normal_style.fontSize = 10
-        
         # Title
-        elements.append(Paragraph("INVOICE", title_style))
+        elements.append(Paragraph("INVOICE", PARAGRAPH_STYLES["title"]))
         elements.append(Spacer(1, 0.2*inch))
         
         # Invoice details
@@ -82,13 +191,7 @@ class InvoiceService:
             invoice_data.append(['Shipped Date:', order.shipped_at.strftime('%B %d, %Y')])
         
         invoice_table = Table(invoice_data, colWidths=[2*inch, 4*inch])
-        invoice_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-        ]))
+        invoice_table.setStyle(TABLE_STYLES["details"])
         elements.append(invoice_table)
         elements.append(Spacer(1, 0.3*inch))
         
@@ -102,19 +205,12 @@ class InvoiceService:
         ]
         
         info_table = Table(info_data, colWidths=[3.5*inch, 3.5*inch])
-        info_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ]))
+        info_table.setStyle(TABLE_STYLES["addresses"])
         elements.append(info_table)
         elements.append(Spacer(1, 0.3*inch))
         
         # Items table
-        elements.append(Paragraph("Order Items", heading_style))
+        elements.append(Paragraph("Order Items", PARAGRAPH_STYLES["heading"]))
         
         items_data = [['Product', 'SKU', 'Quantity', 'Unit Price', 'Total']]
         
@@ -128,19 +224,7 @@ class InvoiceService:
             ])
         
         items_table = Table(items_data, colWidths=[2.5*inch, 1*inch, 0.8*inch, 1*inch, 1*inch])
-        items_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4a90e2')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('ALIGN', (2, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 11),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f5f5f5')]),
-        ]))
+        items_table.setStyle(TABLE_STYLES["order_items"])
         elements.append(items_table)
         elements.append(Spacer(1, 0.3*inch))
         
@@ -154,82 +238,31 @@ class InvoiceService:
         ]
         
         totals_table = Table(totals_data, colWidths=[5*inch, 2*inch])
-        totals_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -2), 10),
-            ('FONTSIZE', (0, -1), (-1, -1), 12),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('LINEABOVE', (0, -2), (-1, -2), 1, colors.grey),
-        ]))
+        totals_table.setStyle(TABLE_STYLES["totals"])
         elements.append(totals_table)
         elements.append(Spacer(1, 0.3*inch))
         
         # Footer
         footer_text = "Thank you for your business!"
-        elements.append(Paragraph(footer_text, ParagraphStyle(
-            'Footer',
-            parent=styles['Normal'],
-            fontSize=10,
-            textColor=colors.HexColor('#666666'),
-            alignment=TA_CENTER,
-            spaceBefore=20,
-        )))
+        elements.append(Paragraph(footer_text, PARAGRAPH_STYLES["footer"]))
         
         # Build PDF
         doc.build(elements)
         
-        return str(filepath)
+        return buffer.getvalue()
     
     @staticmethod
-    def generate_return_invoice(return_obj: Return) -> str:
-        """
-        Generate PDF invoice/credit memo for a return.
-        Returns the file path of the generated invoice.
-        """
-        # Generate filename
-        filename = f"credit_memo_return_{return_obj.return_number}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        filepath = InvoiceService.INVOICES_DIR / filename
+    def render_return_invoice(return_obj: Return) -> bytes:
+        """Render the PDF credit memo for a return."""
+        buffer = io.BytesIO()
         
         # Create PDF document
-        doc = SimpleDocTemplate(
-            str(filepath),
-            pagesize=letter,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=18
-        )
+        doc = SimpleDocTemplate(buffer, **DOC_TEMPLATE_OPTIONS)
         
         elements = []
         
-        # Define styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#1a1a1a'),
-            spaceAfter=30,
-            alignment=TA_CENTER,
-        )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=14,
-            textColor=colors.HexColor('#333333'),
-            spaceAfter=12,
-        )
-        
-        normal_style = styles['Normal']
-        normal_style.fontSize = 10
-        
         # Title
-        elements.append(Paragraph("CREDIT MEMO", title_style))
+        elements.append(Paragraph("CREDIT MEMO", PARAGRAPH_STYLES["title"]))
         elements.append(Spacer(1, 0.2*inch))
         
         # Return details
@@ -246,24 +279,18 @@ class InvoiceService:
             return_data.append(['Refunded Date:', return_obj.refunded_at.strftime('%B %d, %Y')])
         
         return_table = Table(return_data, colWidths=[2*inch, 4*inch])
-        return_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-        ]))
+        return_table.setStyle(TABLE_STYLES["details"])
         elements.append(return_table)
         elements.append(Spacer(1, 0.3*inch))
         
         # Customer Information
         if return_obj.order:
             customer_info = f"Customer: {return_obj.order.customer_name}<br/>Email: {return_obj.order.customer_email}"
-            elements.append(Paragraph(customer_info, normal_style))
+            elements.append(Paragraph(customer_info, PARAGRAPH_STYLES["normal"]))
             elements.append(Spacer(1, 0.2*inch))
         
         # Return items table
-        elements.append(Paragraph("Returned Items", heading_style))
+        elements.append(Paragraph("Returned Items", PARAGRAPH_STYLES["heading"]))
         
         items_data = [['Product', 'SKU', 'Quantity', 'Refund Amount']]
         
@@ -276,19 +303,7 @@ class InvoiceService:
             ])
         
         items_table = Table(items_data, colWidths=[3*inch, 1.5*inch, 1*inch, 1.5*inch])
-        items_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#e74c3c')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('ALIGN', (3, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 11),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f5f5f5')]),
-        ]))
+        items_table.setStyle(TABLE_STYLES["return_items"])
         elements.append(items_table)
         elements.append(Spacer(1, 0.3*inch))
         
@@ -302,33 +317,83 @@ class InvoiceService:
             totals_data.insert(0, ['Refund Method:', return_obj.refund_method.replace('_', ' ').title()])
         
         totals_table = Table(totals_data, colWidths=[5*inch, 2*inch])
-        totals_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -2), 10),
-            ('FONTSIZE', (0, -1), (-1, -1), 12),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('LINEABOVE', (0, -2), (-1, -2), 1, colors.grey),
-        ]))
+        totals_table.setStyle(TABLE_STYLES["totals"])
         elements.append(totals_table)
         elements.append(Spacer(1, 0.3*inch))
         
         # Footer
         footer_text = "This credit memo has been processed and refunded."
-        elements.append(Paragraph(footer_text, ParagraphStyle(
-            'Footer',
-            parent=styles['Normal'],
-            fontSize=10,
-            textColor=colors.HexColor('#666666'),
-            alignment=TA_CENTER,
-            spaceBefore=20,
-        )))
+        elements.append(Paragraph(footer_text, PARAGRAPH_STYLES["footer"]))
         
         # Build PDF
         doc.build(elements)
         
-        return str(filepath)
-
+        return buffer.getvalue()
+    
+    @staticmethod
+    def _render_batch(render, snapshots: List[SimpleNamespace], max_workers: Optional[int]) -> List[bytes]:
+        workers = max_workers or settings.INVOICE_RENDER_WORKERS or os.cpu_count() or 1
+        workers = min(workers, len(snapshots))
+        if workers <= 1:
+            return [render(snapshot) for snapshot in snapshots]
+        
+        # A few chunks per worker keeps the pool busy without per-invoice IPC overhead
+        chunksize = max(1, len(snapshots) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(render, snapshots, chunksize=chunksize))
+    
+    @staticmethod
+    def render_order_invoices(orders: Iterable[Order], max_workers: Optional[int] = None) -> List[bytes]:
+        """
+        Render invoices for many orders in a process pool.
+        Orders must have their items loaded. Returns the PDFs in input order.
+        """
+        snapshots = [order_render_snapshot(order) for order in orders]
+        return InvoiceService._render_batch(InvoiceService.render_order_invoice, snapshots, max_workers)
+    
+    @staticmethod
+    def render_return_invoices(returns: Iterable[Return], max_workers: Optional[int] = None) -> List[bytes]:
+        """
+        Render credit memos for many returns in a process pool.
+        Returns must have their items and order loaded. Returns the PDFs in input order.
+        """
+        snapshots = [return_render_snapshot(return_obj) for return_obj in returns]
+        return InvoiceService._render_batch(InvoiceService.render_return_invoice, snapshots, max_workers)
+    
+    @staticmethod
+    def generate_order_invoices(db_session, orders: Iterable[Order], max_workers: Optional[int] = None) -> List[Invoice]:
+        """
+        Render invoices for many orders in a process pool and save them in the
+        invoice store, recording each one. Returns the records in input order.
+        """
+        orders = list(orders)
+        pdfs = InvoiceService.render_order_invoices(orders, max_workers)
+        return [
+            InvoiceStorageService.store_invoice_sync(
+                db_session,
+                invoice_type=InvoiceType.ORDER,
+                content=pdf,
+                file_name=InvoiceService.order_invoice_file_name(order),
+                order_id=order.id,
+            )
+            for order, pdf in zip(orders, pdfs)
+        ]
+    
+    @staticmethod
+    def generate_return_invoices(db_session, returns: Iterable[Return], max_workers: Optional[int] = None) -> List[Invoice]:
+        """
+        Render credit memos for many returns in a process pool and save them in
+        the invoice store, recording each one. Returns the records in input order.
+        """
+        returns = list(returns)
+        pdfs = InvoiceService.render_return_invoices(returns, max_workers)
+        return [
+            InvoiceStorageService.store_invoice_sync(
+                db_session,
+                invoice_type=InvoiceType.RETURN,
+                content=pdf,
+                file_name=InvoiceService.return_invoice_file_name(return_obj),
+                return_id=return_obj.id,
+            )
+            for return_obj, pdf in zip(returns, pdfs)
+        ]
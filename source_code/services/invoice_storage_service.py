@@ -1,13 +1,18 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import Optional
+from typing import Any, Dict, Optional
 from datetime import datetime
+import asyncio
+import hashlib
 import os
 import uuid
 
+from app.cache import entity_cache
+from app.invoice_store import invoice_store
 from app.models.invoice import Invoice, InvoiceType
 from app.models.order import Order
 from app.models.return_model import Return
+from app.schemas.invoice import InvoiceResponse
 
 
 class InvoiceStorageService:
@@ -21,6 +26,17 @@ class InvoiceStorageService:
         prefix = "INV" if invoice_type == InvoiceType.ORDER else "CM"
         return f"{prefix}-{date_str}-{short_id}"
     
+    @staticmethod
+    def compute_content_hash(file_path: str) -> Optional[str]:
+        """SHA-256 hex digest of a file, or None if it does not exist."""
+        if not os.path.exists(file_path):
+            return None
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
     @staticmethod
     async def create_invoice_record(
         db: AsyncSession,
@@ -47,10 +63,11 @@ class InvoiceStorageService:
         else:
             reference = "UNKNOWN"
         
-        # Get file size
+        # Get file size and content hash (the download ETag)
         file_size = None
         if os.path.exists(file_path):
             file_size = os.path.getsize(file_path)
+        content_hash = InvoiceStorageService.compute_content_hash(file_path)
         
         invoice = Invoice(
             invoice_number=InvoiceStorageService.generate_invoice_number(invoice_type, reference),
@@ -60,6 +77,7 @@ class InvoiceStorageService:
             file_path=file_path,
             file_name=file_name,
             file_size=file_size,
+            content_hash=content_hash,
         )
         
         db.add(invoice)
@@ -75,6 +93,37 @@ class InvoiceStorageService:
         )
         return result.scalar_one_or_none()
     
+    @staticmethod
+    async def get_invoice_response(db: AsyncSession, invoice_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get serialized invoice by ID through the read-through entity cache.
+        Invoice rows are only modified to backfill content_hash, which invalidates the entry.
+        """
+        async def load():
+            invoice = await InvoiceStorageService.get_invoice(db, invoice_id)
+            return InvoiceResponse.model_validate(invoice).model_dump(mode="json") if invoice else None
+        
+        return await entity_cache.get_or_load("invoice", invoice_id, load)
+    
+    @staticmethod
+    async def ensure_content_hash(db: AsyncSession, invoice_id: int) -> Optional[str]:
+        """
+        Return the invoice's content hash, computing and storing it for rows
+        created before hashes were recorded. None if the invoice or file is missing.
+        """
+        invoice = await InvoiceStorageService.get_invoice(db, invoice_id)
+        if not invoice:
+            return None
+        if invoice.content_hash:
+            return invoice.content_hash
+        
+        content_hash = await asyncio.to_thread(InvoiceStorageService.hash_stored_file, invoice.file_path)
+        if content_hash:
+            invoice.content_hash = content_hash
+            await db.commit()
+            await entity_cache.invalidate("invoice", invoice_id)
+        return content_hash
+    
     @staticmethod
     async def get_invoices_by_order(db: AsyncSession, order_id: int):
         """Get all invoices for an order."""
@@ -101,19 +150,13 @@ class InvoiceStorageService:
         return_id: Optional[int] = None,
     ) -> Invoice:
         """Create an invoice record in the database (synchronous version for Celery)."""
-        # Get reference number for invoice number generation
-        reference = "UNKNOWN"
-        if invoice_type == InvoiceType.ORDER and order_id:
-            order = db_session.query(Order).filter(Order.id == order_id).first()
-            reference = order.order_number if order else f"ORD-{order_id}"
-        elif invoice_type == InvoiceType.RETURN and return_id:
-            return_obj = db_session.query(Return).filter(Return.id == return_id).first()
-            reference = return_obj.return_number if return_obj else f"RET-{return_id}"
+        reference = InvoiceStorageService._reference_number_sync(db_session, invoice_type, order_id, return_id)
         
-        # Get file size
+        # Get file size and content hash (the download ETag)
         file_size = None
         if os.path.exists(file_path):
             file_size = os.path.getsize(file_path)
+        content_hash = InvoiceStorageService.compute_content_hash(file_path)
         
         invoice = Invoice(
             invoice_number=InvoiceStorageService.generate_invoice_number(invoice_type, reference),
@@ -123,10 +166,68 @@ class InvoiceStorageService:
             file_path=file_path,
             file_name=file_name,
             file_size=file_size,
+            content_hash=content_hash,
         )
         
         db_session.add(invoice)
         db_session.commit()
         db_session.refresh(invoice)
         return invoice
-
+    
+    @staticmethod
+    def _reference_number_sync(
+        db_session,
+        invoice_type: InvoiceType,
+        order_id: Optional[int],
+        return_id: Optional[int],
+    ) -> str:
+        """Order or return number used in the invoice number."""
+        if invoice_type == InvoiceType.ORDER and order_id:
+            order = db_session.query(Order).filter(Order.id == order_id).first()
+            return order.order_number if order else f"ORD-{order_id}"
+        if invoice_type == InvoiceType.RETURN and return_id:
+            return_obj = db_session.query(Return).filter(Return.id == return_id).first()
+            return return_obj.return_number if return_obj else f"RET-{return_id}"
+        return "UNKNOWN"
+    
+    @staticmethod
+    def store_invoice_sync(
+        db_session,
+        invoice_type: InvoiceType,
+        content: bytes,
+        file_name: str,
+        order_id: Optional[int] = None,
+        return_id: Optional[int] = None,
+    ) -> Invoice:
+        """
+        Save a rendered PDF in the invoice store and record it (synchronous version for Celery).
+        The row's file_path is the store key; identical PDFs share one stored file.
+        """
+        stored = invoice_store.put(content)
+        reference = InvoiceStorageService._reference_number_sync(db_session, invoice_type, order_id, return_id)
+        
+        invoice = Invoice(
+            invoice_number=InvoiceStorageService.generate_invoice_number(invoice_type, reference),
+            invoice_type=invoice_type,
+            order_id=order_id,
+            return_id=return_id,
+            file_path=stored.key,
+            file_name=file_name,
+            file_size=stored.size,
+            content_hash=stored.content_hash,
+        )
+        
+        db_session.add(invoice)
+        db_session.commit()
+        return invoice
+    
+    @staticmethod
+    def hash_stored_file(file_path: str) -> Optional[str]:
+        """SHA-256 hex digest of a file in the invoice store, or None if it does not exist."""
+        size = invoice_store.size(file_path)
+        if size is None:
+            return None
+        digest = hashlib.sha256()
+        for chunk in invoice_store.iter_range(file_path, 0, size, chunk_size=1024 * 1024):
+            digest.update(chunk)
+        return digest.hexdigest()
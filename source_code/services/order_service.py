@@ -1,13 +1,20 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
-from typing import List, Optional
+from sqlalchemy import and_, case, func, insert, select, true, tuple_
+from sqlalchemy.orm import aliased, load_only, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from datetime import datetime
 from decimal import Decimal
 import uuid
 
+from app import metrics
+from app.cache import entity_cache
+from app.config import settings
 from app.models.order import Order, OrderItem, OrderStatus
-from app.schemas.order import OrderCreate, OrderUpdate
+from app.schemas.order import OrderCreate, OrderUpdate, OrderResponse
+from app.services.concurrency import ConcurrentUpdateError, commit_versioned, lock_for_update
+from app.services.outbox_service import OutboxService
+from app.services.pagination import apply_keyset, decode_cursor
 from app.state_machines.order_state import OrderStateMachine
 
 
@@ -20,15 +27,25 @@ class OrderService:
         return f"ORD-{datetime.utcnow().strftime('%Y%m%d')}-{uuid.uuid4().hex[:8].upper()}"
     
     @staticmethod
-    async def create_order(db: AsyncSession, order_data: OrderCreate) -> Order:
-        """Create a new order."""
-        # Calculate totals
+    def calculate_totals(order_data: OrderCreate) -> Tuple[Decimal, Decimal, Decimal, Decimal]:
+        """Calculate (subtotal, tax, shipping_cost, total) for an order."""
         subtotal = sum(item.unit_price * item.quantity for item in order_data.items)
         tax = subtotal * Decimal("0.10")  # 10% tax (adjust as needed)
         shipping_cost = Decimal("5.00")  # Fixed shipping (adjust as needed)
         total = subtotal + tax + shipping_cost
+        return subtotal, tax, shipping_cost, total
+    
+    @staticmethod
+    async def create_order(db: AsyncSession, order_data: OrderCreate, commit: bool = True) -> Order:
+        """
+        Create a new order.
+        With commit=False the order is only flushed, for the caller to commit.
+        """
+        # Calculate totals
+        subtotal, tax, shipping_cost, total = OrderService.calculate_totals(order_data)
         
-        # Create order
+        # Create order with its items attached, so a single flush inserts both
+        # and the response can be built from the in-session objects
         order = Order(
             order_number=OrderService.generate_order_number(),
             customer_id=order_data.customer_id,
@@ -43,28 +60,108 @@ class OrderService:
             billing_address=order_data.billing_address,
             notes=order_data.notes,
             meta_data=order_data.meta_data,
+            items=[
+                OrderItem(
+                    product_id=item_data.product_id,
+                    product_name=item_data.product_name,
+                    product_sku=item_data.product_sku,
+                    unit_price=item_data.unit_price,
+                    quantity=item_data.quantity,
+                    total_price=item_data.unit_price * item_data.quantity,
+                    meta_data=item_data.meta_data,
+                )
+                for item_data in order_data.items
+            ],
         )
         
         db.add(order)
-        await db.flush()  # Get order ID
-        
-        # Create order items
-        for item_data in order_data.items:
-            order_item = OrderItem(
-                order_id=order.id,
-                product_id=item_data.product_id,
-                product_name=item_data.product_name,
-                product_sku=item_data.product_sku,
-                unit_price=item_data.unit_price,
-                quantity=item_data.quantity,
-                total_price=item_data.unit_price * item_data.quantity,
-                meta_data=item_data.meta_data,
+        if commit:
+            await db.commit()
+        else:
+            await db.flush()
+        return order
+    
+    @staticmethod
+    async def create_orders_bulk(
+        db: AsyncSession,
+        orders_data: List[OrderCreate],
+    ) -> List[Tuple[Optional[Order], Optional[str]]]:
+        """
+        Create many orders in one transaction.
+        Orders and items are each written with a single batched INSERT ... RETURNING.
+        Returns one (order, error) pair per input, in request order.
+        """
+        results: List[Tuple[Optional[Order], Optional[str]]] = [(None, None)] * len(orders_data)
+        valid = []
+        
+        for index, order_data in enumerate(orders_data):
+            if not order_data.items:
+                results[index] = (None, "Items list cannot be empty. At least one item is required.")
+            else:
+                valid.append((index, order_data))
+        
+        if not valid:
+            return results
+        
+        order_rows = []
+        for _, order_data in valid:
+            subtotal, tax, shipping_cost, total = OrderService.calculate_totals(order_data)
+            order_rows.append({
+                "order_number": OrderService.generate_order_number(),
+                "customer_id": order_data.customer_id,
+                "customer_email": order_data.customer_email,
+                "customer_name": order_data.customer_name,
+                "status": OrderStatus.PENDING,
+                "subtotal": subtotal,
+                "tax": tax,
+                "shipping_cost": shipping_cost,
+                "total": total,
+                "shipping_address": order_data.shipping_address,
+                "billing_address": order_data.billing_address,
+                "notes": order_data.notes,
+                "meta_data": order_data.meta_data,
+            })
+        
+        try:
+            orders = list(await db.scalars(
+                insert(Order).returning(Order, sort_by_parameter_order=True),
+                order_rows,
+            ))
+            
+            item_rows = []
+            for order, (_, order_data) in zip(orders, valid):
+                for item_data in order_data.items:
+                    item_rows.append({
+                        "order_id": order.id,
+                        "product_id": item_data.product_id,
+                        "product_name": item_data.product_name,
+                        "product_sku": item_data.product_sku,
+                        "unit_price": item_data.unit_price,
+                        "quantity": item_data.quantity,
+                        "total_price": item_data.unit_price * item_data.quantity,
+                        "meta_data": item_data.meta_data,
+                    })
+            
+            items = await db.scalars(
+                insert(OrderItem).returning(OrderItem, sort_by_parameter_order=True),
+                item_rows,
             )
-            db.add(order_item)
+            
+            items_by_order = {order.id: [] for order in orders}
+            for item in items:
+                items_by_order[item.order_id].append(item)
+            
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        
+        # Attach items without triggering a lazy load
+        for order, (index, _) in zip(orders, valid):
+            set_committed_value(order, "items", items_by_order[order.id])
+            results[index] = (order, None)
         
-        await db.commit()
-        # Reload order with relationships to avoid async loading issues
-        return await OrderService.get_order(db, order.id)
+        return results
     
     @staticmethod
     async def get_order(db: AsyncSession, order_id: int) -> Optional[Order]:
@@ -76,6 +173,15 @@ class OrderService:
         )
         return result.scalar_one_or_none()
     
+    @staticmethod
+    async def get_order_response(db: AsyncSession, order_id: int) -> Optional[Dict[str, Any]]:
+        """Get serialized order by ID through the read-through entity cache."""
+        async def load():
+            order = await OrderService.get_order(db, order_id)
+            return OrderResponse.model_validate(order).model_dump(mode="json") if order else None
+        
+        return await entity_cache.get_or_load("order", order_id, load)
+    
     @staticmethod
     async def get_order_by_number(db: AsyncSession, order_number: str) -> Optional[Order]:
         """Get order by order number."""
@@ -91,20 +197,95 @@ class OrderService:
         limit: int = 100,
         customer_id: Optional[int] = None,
         status: Optional[OrderStatus] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
     ) -> List[Order]:
-        """List orders with filters."""
-        query = select(Order).options(selectinload(Order.items))
+        """
+        List orders with filters.
+        Pass `cursor` (from a previous page) for keyset pagination instead of `skip`.
+        Pass `fields` to load only those columns; items are loaded only if
+        "items" is among them, and other attributes must not be accessed.
+        """
+        query = select(Order)
+        if fields is None or "items" in fields:
+            query = query.options(selectinload(Order.items))
+        if fields is not None:
+            # created_at and id are always needed for keyset paging
+            columns = [getattr(Order, name) for name in fields if name != "items"]
+            query = query.options(load_only(*columns, Order.created_at, Order.id))
         
         if customer_id:
             query = query.where(Order.customer_id == customer_id)
         if status:
             query = query.where(Order.status == status)
         
-        query = query.offset(skip).limit(limit).order_by(Order.created_at.desc())
+        # Keyset paging when a cursor is given, offset paging otherwise
+        if not cursor:
+            query = query.offset(skip)
+        query = apply_keyset(query, Order, cursor, limit)
         
         result = await db.execute(query)
         return list(result.scalars().all())
     
+    @staticmethod
+    async def list_customer_orders(
+        db: AsyncSession,
+        customer_id: int,
+        limit: int = 100,
+        status: Optional[OrderStatus] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Tuple[List[Order], int, Dict[str, Decimal]]:
+        """
+        One newest-first keyset page of a customer's orders, plus the number of
+        the customer's orders matching `status` and their lifetime spend per
+        currency (totals of all orders that were not cancelled).
+        The count comes from the page's statement: a one-row aggregate over the
+        customer's orders is outer-joined to the page, so it is returned even
+        when the page is empty. The spend is a second small GROUP BY currency,
+        read back through the Numeric column type; orders without a currency
+        count as the column default, USD. Both walk the (customer_id, ...) indexes.
+        """
+        counted = aliased(Order)
+        matches = counted.status == status if status else true()
+        aggregates = (
+            select(func.count(case((matches, 1))).label("order_count"))
+            .where(counted.customer_id == customer_id)
+            .subquery()
+        )
+        currency = func.coalesce(Order.currency, "USD")
+        spend_query = (
+            select(currency, func.sum(Order.total))
+            .where(Order.customer_id == customer_id, Order.status != OrderStatus.CANCELLED)
+            .group_by(currency)
+        )
+        
+        page = [Order.customer_id == customer_id]
+        if status:
+            page.append(Order.status == status)
+        if cursor:
+            created_at, row_id = decode_cursor(cursor)
+            page.append(tuple_(Order.created_at, Order.id) < tuple_(created_at, row_id))
+        
+        query = (
+            select(Order, aggregates.c.order_count)
+            .select_from(aggregates)
+            .outerjoin(Order, and_(*page))
+            .order_by(Order.created_at.desc(), Order.id.desc())
+            .limit(limit)
+        )
+        if fields is None or "items" in fields:
+            query = query.options(selectinload(Order.items))
+        if fields is not None:
+            columns = [getattr(Order, name) for name in fields if name != "items"]
+            query = query.options(load_only(*columns, Order.created_at, Order.id))
+        
+        rows = (await db.execute(query)).all()
+        orders = [order for order, _ in rows if order is not None]
+        order_count = rows[0].order_count
+        spend = dict((await db.execute(spend_query)).all())
+        return orders, order_count, spend
+    
     @staticmethod
     async def update_order(
         db: AsyncSession,
@@ -117,17 +298,16 @@ class OrderService:
         if order_update.meta_data is not None:
             order.meta_data = order_update.meta_data
         
-        await db.commit()
-        # Reload with relationships
-        return await OrderService.get_order(db, order.id)
+        await commit_versioned(db, order)
+        await entity_cache.invalidate("order", order.id)
+        return order
     
     @staticmethod
-    async def transition_order_state(
-        db: AsyncSession,
-        order: Order,
-        action: str,
-    ) -> Order:
-        """Transition order to a new state using state machine."""
+    def apply_transition(order: Order, action: str) -> str:
+        """
+        Validate and apply a state machine action to an order in memory.
+        Returns the normalized action; raises ValueError if it is not allowed.
+        """
         # Normalize action name (handle common mistakes)
         action = action.lower().strip()
         if action == "cancelled":
@@ -153,29 +333,105 @@ class OrderService:
         
         # Trigger state transition
         getattr(state_machine, action)()
+        return action
+    
+    @staticmethod
+    async def transition_order_state(
+        db: AsyncSession,
+        order: Order,
+        action: str,
+    ) -> Order:
+        """Transition order to a new state using state machine."""
+        with metrics.track_transition("order", action, OrderStateMachine):
+            # Work on the latest row (locked on PostgreSQL) so the checks are not stale
+            await lock_for_update(db, order)
+            action = OrderService.apply_transition(order, action)
+            
+            # Invoice generation is queued in the same transaction and published by the outbox relay
+            if action == "ship":
+                OutboxService.enqueue(db, "generate_order_invoice", order.id)
+            
+            await commit_versioned(db, order)
+        await entity_cache.invalidate("order", order.id)
+        
+        return order
+    
+    @staticmethod
+    async def transition_orders_bulk(
+        db: AsyncSession,
+        transitions: List[Tuple[int, str]],
+    ) -> List[Tuple[Optional[Order], Optional[str]]]:
+        """
+        Apply many (order_id, action) transitions in one transaction.
+        All orders are loaded with one query and validated in memory; transitions
+        that are not allowed are reported and skipped, the rest are committed
+        together. Repeated order IDs are applied in request order. Invoice
+        generation for shipped orders is queued through the outbox, one task
+        per INVOICE_TASK_CHUNK_SIZE orders.
+        Returns one (order, error) pair per input, in request order. When an
+        order is transitioned again later in the batch, its earlier entries hold
+        an OrderResponse snapshot of the state their own action produced.
+        """
+        order_ids = sorted({order_id for order_id, _ in transitions})
+        query = select(Order).options(selectinload(Order.items)).where(Order.id.in_(order_ids))
+        
+        row_locks = db.get_bind().dialect.name == "postgresql"
+        if row_locks:
+            # Orders held by a concurrent request are reported, not waited for
+            query = query.with_for_update(of=Order, skip_locked=True)
+        orders = {order.id: order for order in await db.scalars(query)}
         
-        await db.commit()
+        locked = set()
+        if row_locks and len(orders) < len(order_ids):
+            missing = [order_id for order_id in order_ids if order_id not in orders]
+            locked = set(await db.scalars(select(Order.id).where(Order.id.in_(missing))))
         
-        # Trigger invoice generation if order is shipped
-        if action == "ship":
+        results: List[Tuple[Optional[Any], Optional[str]]] = []
+        last_success: Dict[int, int] = {}
+        applied = []
+        shipped = []
+        for order_id, action in transitions:
+            order = orders.get(order_id)
+            if order is None:
+                if order_id in locked:
+                    results.append((None, f"Order {order_id} is being modified by a concurrent request"))
+                else:
+                    results.append((None, f"Order {order_id} not found"))
+                continue
+            # An earlier entry for this order must keep reporting the state its own action produced
+            previous = OrderResponse.model_validate(order) if order_id in last_success else None
             try:
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.info(f"Queuing invoice generation task for order {order.id} (order_number: {order.order_number})")
-                from app.tasks.invoice_tasks import generate_order_invoice
-                task_result = generate_order_invoice.delay(order.id)
-                logger.info(f"Invoice generation task queued with ID: {task_result.id}")
-            except Exception as e:
-                # Log error but don't fail the order state transition
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.error(
-                    f"Failed to queue invoice generation task for order {order.id}: {str(e)}. "
-                    f"Error type: {type(e).__name__}. Make sure Celery worker is running."
-                )
-                import traceback
-                logger.error(f"Traceback: {traceback.format_exc()}")
+                action = OrderService.apply_transition(order, action)
+            except ValueError as e:
+                metrics.record_transition("order", metrics.transition_label(action, OrderStateMachine), "rejected")
+                results.append((None, str(e)))
+                continue
+            if previous is not None:
+                results[last_success[order_id]] = (previous, None)
+            last_success[order_id] = len(results)
+            results.append((order, None))
+            applied.append(action)
+            if action == "ship":
+                shipped.append(order.id)
         
-        # Reload with relationships
-        return await OrderService.get_order(db, order.id)
-
+        changed = set(last_success)
+        if not changed:
+            await db.rollback()
+            return results
+        
+        # One outbox message (and so one Celery task) per chunk of shipped orders
+        chunk_size = max(1, settings.INVOICE_TASK_CHUNK_SIZE)
+        for start in range(0, len(shipped), chunk_size):
+            OutboxService.enqueue(db, "generate_order_invoices", shipped[start:start + chunk_size])
+        
+        # Applied transitions only count as successful once the batch is committed
+        try:
+            await commit_versioned(db)
+        except ConcurrentUpdateError:
+            for action in applied:
+                metrics.record_transition("order", action, "conflict")
+            raise
+        for action in applied:
+            metrics.record_transition("order", action, "success")
+        await entity_cache.invalidate_many("order", changed)
+        return results
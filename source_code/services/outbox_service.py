@@ -0,0 +1,84 @@
+from sqlalchemy import select, delete
+from sqlalchemy.orm import Session
+from typing import Any, Callable, List, Optional
+from datetime import datetime
+import logging
+
+from app.config import settings
+from app.models.outbox import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxService:
+    """
+    Transactional outbox for Celery task dispatch.
+    Task calls are written to outbox_messages in the same transaction as the
+    state change that triggers them, so they are committed (or rolled back)
+    together and the request never waits on the broker. The relay
+    (app.tasks.outbox_relay) publishes them afterwards. Delivery is
+    at-least-once: a relay that dies between publishing and marking a batch
+    will publish it again.
+    """
+    
+    @staticmethod
+    def enqueue(db, task_name: str, *args: Any) -> OutboxMessage:
+        """Record a task call in the caller's transaction (sync or async session); the caller commits."""
+        message = OutboxMessage(task_name=task_name, args=list(args))
+        db.add(message)
+        return message
+    
+    @staticmethod
+    def relay_batch(
+        db: Session,
+        publish: Callable[[str, List[Any]], None],
+        batch_size: Optional[int] = None,
+    ) -> int:
+        """
+        Publish up to batch_size pending messages, oldest first, and mark them dispatched.
+        Stops at the first publish failure (recording it on the message) so order is kept
+        and a broker outage is not hammered. Returns the number published.
+        """
+        query = (
+            select(OutboxMessage)
+            .where(OutboxMessage.dispatched_at.is_(None))
+            .order_by(OutboxMessage.id)
+            .limit(batch_size or settings.OUTBOX_RELAY_BATCH_SIZE)
+        )
+        if db.get_bind().dialect.name == "postgresql":
+            # Lets several relays share the outbox without publishing a message twice
+            query = query.with_for_update(skip_locked=True)
+        messages = db.scalars(query).all()
+        
+        published = 0
+        for message in messages:
+            message.attempts += 1
+            try:
+                publish(message.task_name, message.args)
+            except Exception as e:
+                message.last_error = str(e)
+                logger.warning(f"Failed to publish outbox message {message.id} ({message.task_name}): {e}")
+                break
+            message.dispatched_at = datetime.utcnow()
+            message.last_error = None
+            published += 1
+        
+        db.commit()
+        return published
+    
+    @staticmethod
+    def purge_dispatched(db: Session, before: datetime) -> int:
+        """Delete messages dispatched before the given time. Returns the number removed."""
+        result = db.execute(
+            delete(OutboxMessage).where(
+                OutboxMessage.dispatched_at.is_not(None),
+                OutboxMessage.dispatched_at < before,
+            )
+        )
+        db.commit()
+        return result.rowcount
+    
+    @staticmethod
+    def pending_count(db: Session) -> int:
+        """Number of messages waiting to be published (relay backlog)."""
+        return db.query(OutboxMessage).filter(OutboxMessage.dispatched_at.is_(None)).count()
@@ -0,0 +1,44 @@
+from sqlalchemy import tuple_
+from sqlalchemy.sql import Select
+from typing import Any, Optional, Tuple
+from datetime import datetime
+import base64
+import binascii
+import json
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode a (created_at, id) position into an opaque cursor string."""
+    payload = json.dumps({"c": created_at.isoformat(), "i": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode an opaque cursor string back into a (created_at, id) position."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["c"]), int(payload["i"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def next_cursor(rows: list, limit: int) -> Optional[str]:
+    """Return the cursor for the page after `rows`, or None if this was the last page."""
+    if len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(last.created_at, last.id)
+
+
+def apply_keyset(query: Select, model: Any, cursor: Optional[str], limit: int) -> Select:
+    """
+    Order a query newest-first by (created_at, id) and seek past `cursor`.
+
+    The row-value comparison lets the database walk the composite
+    (created_at, id) index directly, so every page costs the same.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+    return query.order_by(model.created_at.desc(), model.id.desc()).limit(limit)
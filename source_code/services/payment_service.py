@@ -1,13 +1,16 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 from decimal import Decimal
 import uuid
 
+from app.cache import entity_cache
 from app.models.payment import Payment, PaymentStatus, PaymentMethod
 from app.models.order import Order
-from app.schemas.payment import PaymentCreate, PaymentUpdate, RefundRequest
+from app.schemas.payment import PaymentCreate, PaymentUpdate, PaymentResponse, RefundRequest
+from app.services.concurrency import commit_versioned, flush_versioned, lock_for_update
+from app.services.pagination import apply_keyset
 
 
 class PaymentService:
@@ -19,8 +22,11 @@ class PaymentService:
         return f"PAY-{datetime.utcnow().strftime('%Y%m%d')}-{uuid.uuid4().hex[:8].upper()}"
     
     @staticmethod
-    async def create_payment(db: AsyncSession, payment_data: PaymentCreate) -> Payment:
-        """Create a new payment."""
+    async def create_payment(db: AsyncSession, payment_data: PaymentCreate, commit: bool = True) -> Payment:
+        """
+        Create a new payment.
+        With commit=False the payment is only flushed, for the caller to commit.
+        """
         # Verify order exists
         order_result = await db.execute(
             select(Order).where(Order.id == payment_data.order_id)
@@ -43,8 +49,10 @@ class PaymentService:
         )
         
         db.add(payment)
-        await db.commit()
-        await db.refresh(payment)
+        if commit:
+            await db.commit()
+        else:
+            await db.flush()
         return payment
     
     @staticmethod
@@ -55,6 +63,15 @@ class PaymentService:
         )
         return result.scalar_one_or_none()
     
+    @staticmethod
+    async def get_payment_response(db: AsyncSession, payment_id: int) -> Optional[Dict[str, Any]]:
+        """Get serialized payment by ID through the read-through entity cache."""
+        async def load():
+            payment = await PaymentService.get_payment(db, payment_id)
+            return PaymentResponse.model_validate(payment).model_dump(mode="json") if payment else None
+        
+        return await entity_cache.get_or_load("payment", payment_id, load)
+    
     @staticmethod
     async def list_payments(
         db: AsyncSession,
@@ -62,8 +79,12 @@ class PaymentService:
         limit: int = 100,
         order_id: Optional[int] = None,
         status: Optional[PaymentStatus] = None,
+        cursor: Optional[str] = None,
     ) -> List[Payment]:
-        """List payments with filters."""
+        """
+        List payments with filters.
+        Pass `cursor` (from a previous page) for keyset pagination instead of `skip`.
+        """
         query = select(Payment)
         
         if order_id:
@@ -71,7 +92,10 @@ class PaymentService:
         if status:
             query = query.where(Payment.status == status)
         
-        query = query.offset(skip).limit(limit).order_by(Payment.created_at.desc())
+        # Keyset paging when a cursor is given, offset paging otherwise
+        if not cursor:
+            query = query.offset(skip)
+        query = apply_keyset(query, Payment, cursor, limit)
         
         result = await db.execute(query)
         return list(result.scalars().all())
@@ -92,8 +116,8 @@ class PaymentService:
         if payment_update.meta_data is not None:
             payment.meta_data = payment_update.meta_data
         
-        await db.commit()
-        await db.refresh(payment)
+        await commit_versioned(db, payment)
+        await entity_cache.invalidate("payment", payment.id)
         return payment
     
     @staticmethod
@@ -108,8 +132,8 @@ class PaymentService:
         payment.completed_at = datetime.utcnow()
         payment.transaction_id = payment.transaction_id or f"TXN-{uuid.uuid4().hex[:16].upper()}"
         
-        await db.commit()
-        await db.refresh(payment)
+        await commit_versioned(db, payment)
+        await entity_cache.invalidate("payment", payment.id)
         return payment
     
     @staticmethod
@@ -117,8 +141,15 @@ class PaymentService:
         db: AsyncSession,
         payment: Payment,
         refund_request: RefundRequest,
+        commit: bool = True,
     ) -> Payment:
-        """Process refund."""
+        """
+        Process refund.
+        With commit=False the change is only flushed; the caller commits it and
+        invalidates the cached payment.
+        """
+        # Check the balance against the latest row (locked on PostgreSQL)
+        await lock_for_update(db, payment)
         if payment.status != PaymentStatus.COMPLETED:
             raise ValueError(f"Payment {payment.id} is not completed and cannot be refunded")
         
@@ -136,7 +167,10 @@ class PaymentService:
         
         payment.refunded_at = datetime.utcnow()
         
-        await db.commit()
-        await db.refresh(payment)
+        if not commit:
+            await flush_versioned(db, payment)
+            return payment
+        await commit_versioned(db, payment)
+        await entity_cache.invalidate("payment", payment.id)
         return payment
 
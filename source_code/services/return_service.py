@@ -1,16 +1,24 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
-from typing import List, Optional
+from sqlalchemy import select, func
+from sqlalchemy.orm import load_only, selectinload
+from typing import Any, Dict, List, Optional, Sequence
 from datetime import datetime
 from decimal import Decimal
 import uuid
 
+from app import metrics
+from app.cache import entity_cache
 from app.models.return_model import Return, ReturnItem, ReturnStatus
 from app.models.order import Order, OrderItem
-from app.schemas.return_schema import ReturnCreate, ReturnUpdate
+from app.schemas.return_schema import ReturnCreate, ReturnUpdate, ReturnResponse
+from app.services.concurrency import commit_versioned, lock_for_update
+from app.services.outbox_service import OutboxService
+from app.services.pagination import apply_keyset
 from app.state_machines.return_state import ReturnStateMachine
 
+# Returns in these states no longer claim their items' quantities
+INACTIVE_RETURN_STATUSES = (ReturnStatus.REJECTED, ReturnStatus.CANCELLED)
+
 
 class ReturnService:
     """Service for return business logic."""
@@ -35,16 +43,32 @@ class ReturnService:
         if order.status.value not in ["delivered", "returned"]:
             raise ValueError(f"Order {return_data.order_id} is not eligible for return")
         
+        # Load every referenced order item, and how much of each has already been
+        # returned, in one query each instead of one query per returned line
+        order_item_ids = {item_data.order_item_id for item_data in return_data.items}
+        order_items_result = await db.execute(
+            select(OrderItem).where(OrderItem.id.in_(order_item_ids))
+        )
+        order_items = {item.id: item for item in order_items_result.scalars()}
+        
+        returned_result = await db.execute(
+            select(ReturnItem.order_item_id, func.sum(ReturnItem.quantity))
+            .join(Return, ReturnItem.return_id == Return.id)
+            .where(
+                ReturnItem.order_item_id.in_(order_item_ids),
+                Return.status.notin_(INACTIVE_RETURN_STATUSES),
+            )
+            .group_by(ReturnItem.order_item_id)
+        )
+        returned_quantities = {order_item_id: quantity or 0 for order_item_id, quantity in returned_result}
+        
         # Calculate refund amount from order items
         refund_amount = Decimal("0.00")
         return_items = []
+        requested_quantities = {}
         
         for item_data in return_data.items:
-            # Get original order item
-            order_item_result = await db.execute(
-                select(OrderItem).where(OrderItem.id == item_data.order_item_id)
-            )
-            order_item = order_item_result.scalar_one_or_none()
+            order_item = order_items.get(item_data.order_item_id)
             
             if not order_item:
                 raise ValueError(f"Order item {item_data.order_item_id} not found")
@@ -52,6 +76,19 @@ class ReturnService:
             if order_item.order_id != order.id:
                 raise ValueError(f"Order item {item_data.order_item_id} does not belong to order {return_data.order_id}")
             
+            if item_data.quantity <= 0:
+                raise ValueError(f"Return quantity for order item {item_data.order_item_id} must be positive")
+            
+            # The same order item may appear on several lines of one request
+            requested = requested_quantities.get(order_item.id, 0) + item_data.quantity
+            requested_quantities[order_item.id] = requested
+            returnable = order_item.quantity - returned_quantities.get(order_item.id, 0)
+            if requested > returnable:
+                raise ValueError(
+                    f"Cannot return {requested} of order item {order_item.id}: "
+                    f"only {max(returnable, 0)} of {order_item.quantity} remaining"
+                )
+            
             # Calculate refund for this item
             item_refund = order_item.unit_price * item_data.quantity
             refund_amount += item_refund
@@ -67,7 +104,7 @@ class ReturnService:
                 "condition_notes": item_data.condition_notes,
             })
         
-        # Create return
+        # Create return with its items attached, so a single flush inserts both
         return_obj = Return(
             return_number=ReturnService.generate_return_number(),
             order_id=return_data.order_id,
@@ -79,29 +116,24 @@ class ReturnService:
             return_address=return_data.return_address,
             notes=return_data.notes,
             meta_data=return_data.meta_data,
+            items=[
+                ReturnItem(
+                    order_item_id=item_data["order_item_id"],
+                    product_id=item_data["product_id"],
+                    product_name=item_data["product_name"],
+                    product_sku=item_data["product_sku"],
+                    quantity=item_data["quantity"],
+                    refund_amount=item_data["refund_amount"],
+                    condition=item_data["condition"],
+                    condition_notes=item_data["condition_notes"],
+                )
+                for item_data in return_items
+            ],
         )
         
         db.add(return_obj)
-        await db.flush()  # Get return ID
-        
-        # Create return items
-        for item_data in return_items:
-            return_item = ReturnItem(
-                return_id=return_obj.id,
-                order_item_id=item_data["order_item_id"],
-                product_id=item_data["product_id"],
-                product_name=item_data["product_name"],
-                product_sku=item_data["product_sku"],
-                quantity=item_data["quantity"],
-                refund_amount=item_data["refund_amount"],
-                condition=item_data["condition"],
-                condition_notes=item_data["condition_notes"],
-            )
-            db.add(return_item)
-        
         await db.commit()
-        # Reload with relationships
-        return await ReturnService.get_return(db, return_obj.id)
+        return return_obj
     
     @staticmethod
     async def get_return(db: AsyncSession, return_id: int) -> Optional[Return]:
@@ -113,6 +145,15 @@ class ReturnService:
         )
         return result.scalar_one_or_none()
     
+    @staticmethod
+    async def get_return_response(db: AsyncSession, return_id: int) -> Optional[Dict[str, Any]]:
+        """Get serialized return by ID through the read-through entity cache."""
+        async def load():
+            return_obj = await ReturnService.get_return(db, return_id)
+            return ReturnResponse.model_validate(return_obj).model_dump(mode="json") if return_obj else None
+        
+        return await entity_cache.get_or_load("return", return_id, load)
+    
     @staticmethod
     async def list_returns(
         db: AsyncSession,
@@ -120,16 +161,32 @@ class ReturnService:
         limit: int = 100,
         order_id: Optional[int] = None,
         status: Optional[ReturnStatus] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
     ) -> List[Return]:
-        """List returns with filters."""
-        query = select(Return).options(selectinload(Return.items))
+        """
+        List returns with filters.
+        Pass `cursor` (from a previous page) for keyset pagination instead of `skip`.
+        Pass `fields` to load only those columns; items are loaded only if
+        "items" is among them, and other attributes must not be accessed.
+        """
+        query = select(Return)
+        if fields is None or "items" in fields:
+            query = query.options(selectinload(Return.items))
+        if fields is not None:
+            # created_at and id are always needed for keyset paging
+            columns = [getattr(Return, name) for name in fields if name != "items"]
+            query = query.options(load_only(*columns, Return.created_at, Return.id))
         
         if order_id:
             query = query.where(Return.order_id == order_id)
         if status:
             query = query.where(Return.status == status)
         
-        query = query.offset(skip).limit(limit).order_by(Return.created_at.desc())
+        # Keyset paging when a cursor is given, offset paging otherwise
+        if not cursor:
+            query = query.offset(skip)
+        query = apply_keyset(query, Return, cursor, limit)
         
         result = await db.execute(query)
         return list(result.scalars().all())
@@ -148,9 +205,9 @@ class ReturnService:
         if return_update.meta_data is not None:
             return_obj.meta_data = return_update.meta_data
         
-        await db.commit()
-        # Reload with relationships
-        return await ReturnService.get_return(db, return_obj.id)
+        await commit_versioned(db, return_obj)
+        await entity_cache.invalidate("return", return_obj.id)
+        return return_obj
     
     @staticmethod
     async def transition_return_state(
@@ -160,55 +217,42 @@ class ReturnService:
         reason: Optional[str] = None,
     ) -> Return:
         """Transition return to a new state using state machine."""
-        # Normalize action name
-        action = action.lower().strip()
-        
-        state_machine = ReturnStateMachine(return_obj)
-        
-        # Check if already in target state
-        if action == "approve" and return_obj.status == ReturnStatus.APPROVED:
-            raise ValueError("Return is already approved")
-        if action == "refund" and return_obj.status == ReturnStatus.REFUNDED:
-            raise ValueError("Return is already refunded")
-        if action == "reject" and return_obj.status == ReturnStatus.REJECTED:
-            raise ValueError("Return is already rejected")
-        
-        if not state_machine.can_transition(action):
-            available = state_machine.get_available_transitions()
-            current_state = return_obj.status.value if hasattr(return_obj.status, 'value') else str(return_obj.status)
-            raise ValueError(
-                f"Cannot perform action '{action}' from state '{current_state}'. "
-                f"Available actions: {available if available else 'None (return is in final state)'}"
-            )
-        
-        # Trigger state transition
-        if action == "reject" and reason:
-            state_machine.reject(reason=reason)
-        else:
-            getattr(state_machine, action)()
-        
-        await db.commit()
-        
-        # Trigger invoice generation if return is processed
-        if action == "process":
-            try:
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.info(f"Queuing credit memo generation task for return {return_obj.id} (return_number: {return_obj.return_number})")
-                from app.tasks.invoice_tasks import generate_return_invoice
-                task_result = generate_return_invoice.delay(return_obj.id)
-                logger.info(f"Credit memo generation task queued with ID: {task_result.id}")
-            except Exception as e:
-                # Log error but don't fail the return state transition
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.error(
-                    f"Failed to queue credit memo generation task for return {return_obj.id}: {str(e)}. "
-                    f"Error type: {type(e).__name__}. Make sure Celery worker is running."
+        with metrics.track_transition("return", action, ReturnStateMachine):
+            # Normalize action name
+            action = action.lower().strip()
+            
+            # Work on the latest row (locked on PostgreSQL) so the checks below are not stale
+            await lock_for_update(db, return_obj)
+            state_machine = ReturnStateMachine(return_obj)
+            
+            # Check if already in target state
+            if action == "approve" and return_obj.status == ReturnStatus.APPROVED:
+                raise ValueError("Return is already approved")
+            if action == "refund" and return_obj.status == ReturnStatus.REFUNDED:
+                raise ValueError("Return is already refunded")
+            if action == "reject" and return_obj.status == ReturnStatus.REJECTED:
+                raise ValueError("Return is already rejected")
+            
+            if not state_machine.can_transition(action):
+                available = state_machine.get_available_transitions()
+                current_state = return_obj.status.value if hasattr(return_obj.status, 'value') else str(return_obj.status)
+                raise ValueError(
+                    f"Cannot perform action '{action}' from state '{current_state}'. "
+                    f"Available actions: {available if available else 'None (return is in final state)'}"
                 )
-                import traceback
-                logger.error(f"Traceback: {traceback.format_exc()}")
+            
+            # Trigger state transition
+            if action == "reject" and reason:
+                state_machine.reject(reason=reason)
+            else:
+                getattr(state_machine, action)()
+            
+            # Credit memo generation is queued in the same transaction and published by the outbox relay
+            if action == "process":
+                OutboxService.enqueue(db, "generate_return_invoice", return_obj.id)
+            
+            await commit_versioned(db, return_obj)
+        await entity_cache.invalidate("return", return_obj.id)
         
-        # Reload with relationships
-        return await ReturnService.get_return(db, return_obj.id)
+        return return_obj
 
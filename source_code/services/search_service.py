@@ -0,0 +1,206 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, case, column, func, literal, literal_column, or_, select, table, union_all
+from sqlalchemy.sql.expression import ColumnElement
+from typing import List, Optional, Sequence
+from functools import reduce
+import operator
+
+from app.config import settings
+from app.models.order import Order, OrderItem
+from app.models.payment import Payment
+from app.models.return_model import Return
+from app.models.search import SEARCH_COLUMNS, fts_table
+
+# Trigram indexes cannot match anything shorter
+MIN_TERM_LENGTH = 3
+
+SEARCH_ENTITIES = ("order", "order_item", "return", "payment")
+
+
+class SearchService:
+    """Ranked substring search over orders, order items, returns and payments."""
+    
+    @staticmethod
+    def search_terms(q: str) -> List[str]:
+        """
+        The whitespace-separated terms of `q` that can be searched; every
+        term must match (as a substring of any indexed column) for a hit.
+        Raises ValueError if no term is long enough.
+        """
+        terms = [term for term in q.split() if len(term) >= MIN_TERM_LENGTH]
+        if not terms:
+            raise ValueError(f"Search terms must be at least {MIN_TERM_LENGTH} characters")
+        return terms
+    
+    @staticmethod
+    async def search(
+        db: AsyncSession,
+        q: str,
+        limit: int = 20,
+        entities: Optional[Sequence[str]] = None,
+    ) -> List[dict]:
+        """
+        The best `limit` hits for `q` across the requested entities (default all).
+        Each index first yields at most SEARCH_CANDIDATE_LIMIT matches, newest
+        first, and only those are scored, so a broad term ("ORD", "example.com")
+        costs about as much as a selective one however large the tables grow. When
+        more rows match, the hits are the best of the most recent candidates.
+        """
+        terms = SearchService.search_terms(q)
+        entities = entities or SEARCH_ENTITIES
+        candidates = max(limit, settings.SEARCH_CANDIDATE_LIMIT)
+        if db.get_bind().dialect.name == "postgresql":
+            members = SearchService._trigram_queries(q, terms, limit, candidates)
+        else:
+            members = SearchService._fts_queries(terms, limit, candidates)
+        
+        pages = [select(members[entity].subquery()) for entity in SEARCH_ENTITIES if entity in entities]
+        hits = union_all(*pages).subquery()
+        query = select(hits).order_by(hits.c.score.desc(), hits.c.id.desc()).limit(limit)
+        return [dict(row) for row in (await db.execute(query)).mappings()]
+    
+    @staticmethod
+    def _fts_queries(terms: List[str], limit: int, candidates: int) -> dict:
+        """
+        Per-entity FTS5 queries. Candidates are scored by how much of the best
+        matching column each term covers, so exact and prefix-length matches
+        rank first. bm25() is not used: its IDF counts every match in the
+        index, which would make broad terms cost O(matches) again.
+        """
+        # Each term is an FTS5 string (a trigram phrase), so operators in it are literal
+        match = " ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+        
+        def coverage(columns) -> ColumnElement:
+            def best(term: str) -> ColumnElement:
+                return func.max(*(
+                    case(
+                        (func.instr(func.lower(c), term.lower()) > 0, literal(float(len(term))) / func.length(c)),
+                        else_=0.0,
+                    )
+                    for c in columns
+                ))
+            return reduce(operator.add, (best(term) for term in terms))
+        
+        def fts(source: str):
+            # FTS5 returns matches in rowid order and stops at the LIMIT, so
+            # only the candidates are read and scored
+            name = fts_table(source)
+            index = table(name, column("rowid"), *(column(c) for c in SEARCH_COLUMNS[source]))
+            columns = [index.c[c] for c in SEARCH_COLUMNS[source]]
+            return select(
+                index.c.rowid,
+                *columns,
+                coverage(columns).label("score"),
+            ).where(
+                literal_column(name).op("MATCH")(match)
+            ).order_by(index.c.rowid.desc()).limit(candidates).subquery()
+        
+        orders = fts("orders")
+        order_query = select(
+            literal_column("'order'").label("entity"),
+            orders.c.rowid.label("id"),
+            orders.c.rowid.label("order_id"),
+            orders.c.order_number.label("reference"),
+            (orders.c.customer_name + " <" + orders.c.customer_email + ">").label("detail"),
+            orders.c.score,
+        )
+        
+        items = fts("order_items")
+        item_query = select(
+            literal_column("'order_item'").label("entity"),
+            OrderItem.id,
+            OrderItem.order_id,
+            items.c.product_sku.label("reference"),
+            items.c.product_name.label("detail"),
+            items.c.score,
+        ).join(OrderItem, OrderItem.id == items.c.rowid)
+        
+        returns = fts("returns")
+        return_query = select(
+            literal_column("'return'").label("entity"),
+            Return.id,
+            Return.order_id,
+            returns.c.return_number.label("reference"),
+            returns.c.tracking_number.label("detail"),
+            returns.c.score,
+        ).join(Return, Return.id == returns.c.rowid)
+        
+        payments = fts("payments")
+        payment_query = select(
+            literal_column("'payment'").label("entity"),
+            Payment.id,
+            Payment.order_id,
+            payments.c.payment_number.label("reference"),
+            payments.c.transaction_id.label("detail"),
+            payments.c.score,
+        ).join(Payment, Payment.id == payments.c.rowid)
+        
+        queries = (order_query, item_query, return_query, payment_query)
+        return {
+            entity: query.order_by(literal_column("score").desc()).limit(limit)
+            for entity, query in zip(SEARCH_ENTITIES, queries)
+        }
+    
+    @staticmethod
+    def _trigram_queries(q: str, terms: List[str], limit: int, candidates: int) -> dict:
+        """Per-entity ILIKE queries served by the pg_trgm GIN indexes, ranked by similarity()."""
+        
+        def matching(model, columns) -> tuple:
+            condition = and_(*(
+                or_(*(c.ilike(f"%{SearchService._escape_like(term)}%", escape="\\") for c in columns))
+                for term in terms
+            ))
+            # similarity() is only computed for the newest `candidates` matches
+            ids = select(model.id).where(condition).order_by(model.id.desc()).limit(candidates).subquery()
+            score = func.greatest(*(func.similarity(c, q) for c in columns)).label("score")
+            return ids, score
+        
+        ids, score = matching(Order, [Order.order_number, Order.customer_email, Order.customer_name])
+        order_query = select(
+            literal_column("'order'").label("entity"),
+            Order.id,
+            Order.id.label("order_id"),
+            Order.order_number.label("reference"),
+            (Order.customer_name + " <" + Order.customer_email + ">").label("detail"),
+            score,
+        ).join(ids, ids.c.id == Order.id)
+        
+        ids, score = matching(OrderItem, [OrderItem.product_sku, OrderItem.product_name])
+        item_query = select(
+            literal_column("'order_item'").label("entity"),
+            OrderItem.id,
+            OrderItem.order_id,
+            OrderItem.product_sku.label("reference"),
+            OrderItem.product_name.label("detail"),
+            score,
+        ).join(ids, ids.c.id == OrderItem.id)
+        
+        ids, score = matching(Return, [Return.return_number, Return.tracking_number])
+        return_query = select(
+            literal_column("'return'").label("entity"),
+            Return.id,
+            Return.order_id,
+            Return.return_number.label("reference"),
+            Return.tracking_number.label("detail"),
+            score,
+        ).join(ids, ids.c.id == Return.id)
+        
+        ids, score = matching(Payment, [Payment.payment_number, Payment.transaction_id])
+        payment_query = select(
+            literal_column("'payment'").label("entity"),
+            Payment.id,
+            Payment.order_id,
+            Payment.payment_number.label("reference"),
+            Payment.transaction_id.label("detail"),
+            score,
+        ).join(ids, ids.c.id == Payment.id)
+        
+        queries = (order_query, item_query, return_query, payment_query)
+        return {
+            entity: query.order_by(literal_column("score").desc()).limit(limit)
+            for entity, query in zip(SEARCH_ENTITIES, queries)
+        }
+    
+    @staticmethod
+    def _escape_like(term: str) -> str:
+        return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
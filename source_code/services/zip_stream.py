@@ -0,0 +1,150 @@
+"""
+Incremental ZIP writer for streamed responses.
+
+Entries are emitted as local header + data + data descriptor, so nothing
+needs to be known before an entry is written, and central directory records
+are spooled to a temporary file instead of being held in memory. Memory use
+is therefore constant in the number of entries. ZIP64 end records are added
+when the archive needs them (more than 65535 entries or over 4 GiB).
+"""
+from datetime import datetime
+from typing import Iterator, Optional
+import struct
+import tempfile
+import zlib
+
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_DATA_DESCRIPTOR = struct.Struct("<IIII")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_ZIP64_EXTRA_OFFSET = struct.Struct("<HHQ")
+_ZIP64_END = struct.Struct("<IQHHIIQQQQ")
+_ZIP64_LOCATOR = struct.Struct("<IIQI")
+_END = struct.Struct("<IHHHHIIH")
+
+_FLAG_DATA_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+_MAX_32 = 0xFFFFFFFF
+_MAX_16 = 0xFFFF
+
+STORED = 0
+DEFLATED = 8
+
+# Central directory records beyond this size are spilled to disk
+CENTRAL_DIRECTORY_SPOOL_BYTES = 1024 * 1024
+
+
+def _dos_datetime(moment: datetime):
+    moment = max(moment, datetime(1980, 1, 1))
+    dos_time = (moment.hour << 11) | (moment.minute << 5) | (moment.second // 2)
+    dos_date = ((moment.year - 1980) << 9) | (moment.month << 5) | moment.day
+    return dos_time, dos_date
+
+
+class ZipStreamWriter:
+    """
+    Build a ZIP archive piece by piece. Each method returns the bytes to send
+    next; write one entry at a time (start_entry, write..., end_entry), then
+    iterate close() for the central directory.
+    """
+
+    def __init__(self):
+        self.offset = 0
+        self.entries = 0
+        self._central = tempfile.SpooledTemporaryFile(max_size=CENTRAL_DIRECTORY_SPOOL_BYTES)
+        self._entry: Optional[dict] = None
+
+    def _emit(self, data: bytes) -> bytes:
+        self.offset += len(data)
+        return data
+
+    def start_entry(self, name: str, modified: Optional[datetime] = None, method: int = STORED) -> bytes:
+        """Begin a new entry; returns its local file header."""
+        if self._entry is not None:
+            raise ValueError("Previous ZIP entry was not ended")
+        encoded_name = name.encode("utf-8")
+        dos_time, dos_date = _dos_datetime(modified or datetime.now())
+        self._entry = {
+            "name": encoded_name,
+            "method": method,
+            "dos_time": dos_time,
+            "dos_date": dos_date,
+            "offset": self.offset,
+            "crc": 0,
+            "size": 0,
+            "compressed_size": 0,
+            "compressor": zlib.compressobj(6, zlib.DEFLATED, -15) if method == DEFLATED else None,
+        }
+        header = _LOCAL_HEADER.pack(
+            0x04034B50, 20, _FLAG_DATA_DESCRIPTOR | _FLAG_UTF8, method,
+            dos_time, dos_date, 0, 0, 0, len(encoded_name), 0,
+        )
+        return self._emit(header + encoded_name)
+
+    def write(self, data: bytes) -> bytes:
+        """Add data to the current entry; returns the (possibly compressed) bytes to send."""
+        entry = self._entry
+        entry["crc"] = zlib.crc32(data, entry["crc"])
+        entry["size"] += len(data)
+        if entry["compressor"] is not None:
+            data = entry["compressor"].compress(data)
+        entry["compressed_size"] += len(data)
+        return self._emit(data)
+
+    def end_entry(self) -> bytes:
+        """Finish the current entry; returns any remaining data and its data descriptor."""
+        entry = self._entry
+        tail = b""
+        if entry["compressor"] is not None:
+            tail = entry["compressor"].flush()
+            entry["compressed_size"] += len(tail)
+        if entry["size"] > _MAX_32 or entry["compressed_size"] > _MAX_32:
+            raise ValueError("ZIP entries larger than 4 GiB are not supported")
+
+        descriptor = _DATA_DESCRIPTOR.pack(0x08074B50, entry["crc"], entry["compressed_size"], entry["size"])
+        self._write_central_record(entry)
+        self._entry = None
+        self.entries += 1
+        return self._emit(tail + descriptor)
+
+    def _write_central_record(self, entry: dict) -> None:
+        extra = b""
+        offset = entry["offset"]
+        version = 20
+        if offset >= _MAX_32:
+            extra = _ZIP64_EXTRA_OFFSET.pack(0x0001, 8, offset)
+            offset = _MAX_32
+            version = 45
+        record = _CENTRAL_HEADER.pack(
+            0x02014B50, version, version, _FLAG_DATA_DESCRIPTOR | _FLAG_UTF8, entry["method"],
+            entry["dos_time"], entry["dos_date"], entry["crc"], entry["compressed_size"], entry["size"],
+            len(entry["name"]), len(extra), 0, 0, 0, 0o100644 << 16, offset,
+        )
+        self._central.write(record + entry["name"] + extra)
+
+    def close(self, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Yield the central directory and end records."""
+        if self._entry is not None:
+            raise ValueError("Last ZIP entry was not ended")
+        directory_offset = self.offset
+        directory_size = self._central.tell()
+        self._central.seek(0)
+        try:
+            for chunk in iter(lambda: self._central.read(chunk_size), b""):
+                yield self._emit(chunk)
+        finally:
+            self._central.close()
+
+        end = b""
+        if self.entries >= _MAX_16 or directory_offset >= _MAX_32 or directory_size >= _MAX_32:
+            zip64_end_offset = self.offset
+            end += _ZIP64_END.pack(
+                0x06064B50, _ZIP64_END.size - 12, 45, 45, 0, 0,
+                self.entries, self.entries, directory_size, directory_offset,
+            )
+            end += _ZIP64_LOCATOR.pack(0x07064B50, 0, zip64_end_offset, 1)
+        end += _END.pack(
+            0x06054B50, 0, 0,
+            min(self.entries, _MAX_16), min(self.entries, _MAX_16),
+            min(directory_size, _MAX_32), min(directory_offset, _MAX_32), 0,
+        )
+        yield self._emit(end)
@@ -0,0 +1,120 @@
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Tuple
+
+
+class CompiledTransition(NamedTuple):
+    """A single compiled edge: destination state plus callback names."""
+    dest: str
+    before: Tuple[str, ...]
+    after: Tuple[str, ...]
+
+
+def _as_tuple(callbacks: Any) -> Tuple[str, ...]:
+    if not callbacks:
+        return ()
+    if isinstance(callbacks, str):
+        return (callbacks,)
+    return tuple(callbacks)
+
+
+def compile_transitions(
+    states: List[str],
+    transitions: List[Dict[str, Any]],
+) -> Tuple[Dict[str, Dict[str, CompiledTransition]], Dict[str, List[str]]]:
+    """
+    Compile a `transitions`-style spec into a (state x trigger) lookup table.
+    Also returns the available triggers per state, ordered the way
+    `transitions.Machine.get_triggers` orders them (by first trigger definition).
+    """
+    trigger_order: List[str] = []
+    table: Dict[str, Dict[str, CompiledTransition]] = {state: {} for state in states}
+
+    for spec in transitions:
+        trigger = spec["trigger"]
+        if trigger not in trigger_order:
+            trigger_order.append(trigger)
+        sources = spec["source"] if isinstance(spec["source"], (list, tuple)) else [spec["source"]]
+        for source in sources:
+            # First matching definition wins, as in `transitions`
+            table[source].setdefault(trigger, CompiledTransition(
+                dest=spec["dest"],
+                before=_as_tuple(spec.get("before")),
+                after=_as_tuple(spec.get("after")),
+            ))
+
+    available = {
+        state: [trigger for trigger in trigger_order if trigger in table[state]]
+        for state in states
+    }
+    return table, available
+
+
+def _make_trigger(name: str):
+    def trigger(self, *args, **kwargs) -> bool:
+        return self.trigger(name, *args, **kwargs)
+    trigger.__name__ = name
+    trigger.__doc__ = f"Fire the '{name}' transition."
+    return trigger
+
+
+def _make_state_check(state: str):
+    def is_state(self) -> bool:
+        return self.state == state
+    is_state.__name__ = f"is_{state}"
+    return is_state
+
+
+class CompiledStateMachine:
+    """
+    Lightweight replacement for a per-instance `transitions.Machine`.
+
+    Subclasses declare STATES and TRANSITIONS once; the table is compiled at
+    class creation, so constructing a machine and firing a trigger are just
+    attribute and dict lookups. Semantics follow the `transitions` configuration
+    previously used here (auto_transitions=False, ignore_invalid_triggers=True):
+    an invalid trigger returns False and leaves the state unchanged, callbacks
+    receive the trigger's arguments, and a raising `before` callback aborts the
+    transition.
+    """
+
+    STATES: List[str] = []
+    TRANSITIONS: List[Dict[str, Any]] = []
+
+    # Every trigger name declared in TRANSITIONS
+    TRIGGERS: FrozenSet[str] = frozenset()
+
+    _table: Dict[str, Dict[str, CompiledTransition]] = {}
+    _available: Dict[str, List[str]] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._table, cls._available = compile_transitions(cls.STATES, cls.TRANSITIONS)
+        cls.TRIGGERS = frozenset(spec["trigger"] for spec in cls.TRANSITIONS)
+        for trigger in cls.TRIGGERS:
+            setattr(cls, trigger, _make_trigger(trigger))
+        for state in cls.STATES:
+            setattr(cls, f"is_{state}", _make_state_check(state))
+
+    def __init__(self, initial: str):
+        if initial not in self._table:
+            raise ValueError(f"State '{initial}' is not a registered state")
+        self.state = initial
+
+    def trigger(self, name: str, *args, **kwargs) -> bool:
+        """Fire a transition by trigger name."""
+        transition = self._table[self.state].get(name)
+        if transition is None:
+            return False
+        for callback in transition.before:
+            getattr(self, callback)(*args, **kwargs)
+        self.state = transition.dest
+        for callback in transition.after:
+            getattr(self, callback)(*args, **kwargs)
+        return True
+
+    def can_transition(self, trigger: str) -> bool:
+        """Check if a transition is possible."""
+        return trigger in self._table[self.state]
+
+    def get_available_transitions(self) -> list:
+        """Get list of available transitions from current state."""
+        return list(self._available[self.state])
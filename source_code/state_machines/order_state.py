@@ -1,10 +1,10 @@
-from transitions import Machine
 from typing import Optional, Dict, Any
 from datetime import datetime
+from app.state_machines.base import CompiledStateMachine
 from app.models.order import Order, OrderStatus
 
 
-class OrderStateMachine:
+class OrderStateMachine(CompiledStateMachine):
     """
     State machine for managing order state transitions.
     
@@ -18,85 +18,81 @@ class OrderStateMachine:
     - returned: Order returned by customer
     """
     
+    STATES = [
+        OrderStatus.PENDING.value,
+        OrderStatus.CONFIRMED.value,
+        OrderStatus.PROCESSING.value,
+        OrderStatus.SHIPPED.value,
+        OrderStatus.DELIVERED.value,
+        OrderStatus.CANCELLED.value,
+        OrderStatus.RETURNED.value,
+    ]
+    
+    TRANSITIONS = [
+        # From pending
+        {
+            "trigger": "confirm",
+            "source": OrderStatus.PENDING.value,
+            "dest": OrderStatus.CONFIRMED.value,
+            "before": "_before_confirm",
+            "after": "_after_confirm",
+        },
+        {
+            "trigger": "cancel",
+            "source": OrderStatus.PENDING.value,
+            "dest": OrderStatus.CANCELLED.value,
+            "before": "_before_cancel",
+            "after": "_after_cancel",
+        },
+        # From confirmed
+        {
+            "trigger": "start_processing",
+            "source": OrderStatus.CONFIRMED.value,
+            "dest": OrderStatus.PROCESSING.value,
+            "after": "_after_start_processing",
+        },
+        {
+            "trigger": "cancel",
+            "source": OrderStatus.CONFIRMED.value,
+            "dest": OrderStatus.CANCELLED.value,
+            "before": "_before_cancel",
+            "after": "_after_cancel",
+        },
+        # From processing
+        {
+            "trigger": "ship",
+            "source": OrderStatus.PROCESSING.value,
+            "dest": OrderStatus.SHIPPED.value,
+            "after": "_after_ship",
+        },
+        {
+            "trigger": "cancel",
+            "source": OrderStatus.PROCESSING.value,
+            "dest": OrderStatus.CANCELLED.value,
+            "before": "_before_cancel",
+            "after": "_after_cancel",
+        },
+        # From shipped
+        {
+            "trigger": "deliver",
+            "source": OrderStatus.SHIPPED.value,
+            "dest": OrderStatus.DELIVERED.value,
+            "after": "_after_deliver",
+        },
+        # From delivered
+        {
+            "trigger": "return_order",
+            "source": OrderStatus.DELIVERED.value,
+            "dest": OrderStatus.RETURNED.value,
+            "after": "_after_return",
+        },
+    ]
+    
     def __init__(self, order: Order):
         self.order = order
         # Get current state as string value
         current_state = order.status.value if order.status else OrderStatus.PENDING.value
-        
-        self.machine = Machine(
-            model=self,
-            states=[
-                OrderStatus.PENDING.value,
-                OrderStatus.CONFIRMED.value,
-                OrderStatus.PROCESSING.value,
-                OrderStatus.SHIPPED.value,
-                OrderStatus.DELIVERED.value,
-                OrderStatus.CANCELLED.value,
-                OrderStatus.RETURNED.value,
-            ],
-            initial=current_state,
-            transitions=[
-                # From pending
-                {
-                    "trigger": "confirm",
-                    "source": OrderStatus.PENDING.value,
-                    "dest": OrderStatus.CONFIRMED.value,
-                    "before": "_before_confirm",
-                    "after": "_after_confirm",
-                },
-                {
-                    "trigger": "cancel",
-                    "source": OrderStatus.PENDING.value,
-                    "dest": OrderStatus.CANCELLED.value,
-                    "before": "_before_cancel",
-                    "after": "_after_cancel",
-                },
-                # From confirmed
-                {
-                    "trigger": "start_processing",
-                    "source": OrderStatus.CONFIRMED.value,
-                    "dest": OrderStatus.PROCESSING.value,
-                    "after": "_after_start_processing",
-                },
-                {
-                    "trigger": "cancel",
-                    "source": OrderStatus.CONFIRMED.value,
-                    "dest": OrderStatus.CANCELLED.value,
-                    "before": "_before_cancel",
-                    "after": "_after_cancel",
-                },
-                # From processing
-                {
-                    "trigger": "ship",
-                    "source": OrderStatus.PROCESSING.value,
-                    "dest": OrderStatus.SHIPPED.value,
-                    "after": "_after_ship",
-                },
-                {
-                    "trigger": "cancel",
-                    "source": OrderStatus.PROCESSING.value,
-                    "dest": OrderStatus.CANCELLED.value,
-                    "before": "_before_cancel",
-                    "after": "_after_cancel",
-                },
-                # From shipped
-                {
-                    "trigger": "deliver",
-                    "source": OrderStatus.SHIPPED.value,
-                    "dest": OrderStatus.DELIVERED.value,
-                    "after": "_after_deliver",
-                },
-                # From delivered
-                {
-                    "trigger": "return_order",
-                    "source": OrderStatus.DELIVERED.value,
-                    "dest": OrderStatus.RETURNED.value,
-                    "after": "_after_return",
-                },
-            ],
-            auto_transitions=False,
-            ignore_invalid_triggers=True,
-        )
+        super().__init__(current_state)
     
     def _before_confirm(self):
         """Validate before confirming order."""
@@ -146,14 +142,6 @@ class OrderStateMachine:
         self.order.previous_status = self.order.status
         self.order.status = OrderStatus.RETURNED
     
-    def can_transition(self, trigger: str) -> bool:
-        """Check if a transition is possible."""
-        return self.machine.get_triggers(self.state).__contains__(trigger)
-    
-    def get_available_transitions(self) -> list:
-        """Get list of available transitions from current state."""
-        return self.machine.get_triggers(self.state)
-    
     def get_state(self) -> OrderStatus:
         """Get current state."""
         return OrderStatus(self.state)
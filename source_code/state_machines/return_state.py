@@ -1,10 +1,10 @@
-from transitions import Machine
 from typing import Optional, Dict, Any
 from datetime import datetime
+from app.state_machines.base import CompiledStateMachine
 from app.models.return_model import Return, ReturnStatus
 
 
-class ReturnStateMachine:
+class ReturnStateMachine(CompiledStateMachine):
     """
     State machine for managing return state transitions.
     
@@ -20,96 +20,92 @@ class ReturnStateMachine:
     - cancelled: Return cancelled
     """
     
+    STATES = [
+        ReturnStatus.INITIATED.value,
+        ReturnStatus.APPROVED.value,
+        ReturnStatus.REJECTED.value,
+        ReturnStatus.PICKUP_SCHEDULED.value,
+        ReturnStatus.IN_TRANSIT.value,
+        ReturnStatus.RECEIVED.value,
+        ReturnStatus.PROCESSED.value,
+        ReturnStatus.REFUNDED.value,
+        ReturnStatus.CANCELLED.value,
+    ]
+    
+    TRANSITIONS = [
+        # From initiated
+        {
+            "trigger": "approve",
+            "source": ReturnStatus.INITIATED.value,
+            "dest": ReturnStatus.APPROVED.value,
+            "after": "_after_approve",
+        },
+        {
+            "trigger": "reject",
+            "source": ReturnStatus.INITIATED.value,
+            "dest": ReturnStatus.REJECTED.value,
+            "after": "_after_reject",
+        },
+        {
+            "trigger": "cancel",
+            "source": ReturnStatus.INITIATED.value,
+            "dest": ReturnStatus.CANCELLED.value,
+            "after": "_after_cancel",
+        },
+        # From approved
+        {
+            "trigger": "schedule_pickup",
+            "source": ReturnStatus.APPROVED.value,
+            "dest": ReturnStatus.PICKUP_SCHEDULED.value,
+            "after": "_after_schedule_pickup",
+        },
+        {
+            "trigger": "reject",
+            "source": ReturnStatus.APPROVED.value,
+            "dest": ReturnStatus.REJECTED.value,
+            "after": "_after_reject",
+        },
+        {
+            "trigger": "cancel",
+            "source": ReturnStatus.APPROVED.value,
+            "dest": ReturnStatus.CANCELLED.value,
+            "after": "_after_cancel",
+        },
+        # From pickup_scheduled
+        {
+            "trigger": "start_transit",
+            "source": ReturnStatus.PICKUP_SCHEDULED.value,
+            "dest": ReturnStatus.IN_TRANSIT.value,
+            "after": "_after_start_transit",
+        },
+        # From in_transit
+        {
+            "trigger": "receive",
+            "source": ReturnStatus.IN_TRANSIT.value,
+            "dest": ReturnStatus.RECEIVED.value,
+            "after": "_after_receive",
+        },
+        # From received
+        {
+            "trigger": "process",
+            "source": ReturnStatus.RECEIVED.value,
+            "dest": ReturnStatus.PROCESSED.value,
+            "after": "_after_process",
+        },
+        # From processed
+        {
+            "trigger": "refund",
+            "source": ReturnStatus.PROCESSED.value,
+            "dest": ReturnStatus.REFUNDED.value,
+            "after": "_after_refund",
+        },
+    ]
+    
     def __init__(self, return_obj: Return):
         self.return_obj = return_obj
         # Get current state as string value
         current_state = return_obj.status.value if return_obj.status else ReturnStatus.INITIATED.value
-        
-        self.machine = Machine(
-            model=self,
-            states=[
-                ReturnStatus.INITIATED.value,
-                ReturnStatus.APPROVED.value,
-                ReturnStatus.REJECTED.value,
-                ReturnStatus.PICKUP_SCHEDULED.value,
-                ReturnStatus.IN_TRANSIT.value,
-                ReturnStatus.RECEIVED.value,
-                ReturnStatus.PROCESSED.value,
-                ReturnStatus.REFUNDED.value,
-                ReturnStatus.CANCELLED.value,
-            ],
-            initial=current_state,
-            transitions=[
-                # From initiated
-                {
-                    "trigger": "approve",
-                    "source": ReturnStatus.INITIATED.value,
-                    "dest": ReturnStatus.APPROVED.value,
-                    "after": "_after_approve",
-                },
-                {
-                    "trigger": "reject",
-                    "source": ReturnStatus.INITIATED.value,
-                    "dest": ReturnStatus.REJECTED.value,
-                    "after": "_after_reject",
-                },
-                {
-                    "trigger": "cancel",
-                    "source": ReturnStatus.INITIATED.value,
-                    "dest": ReturnStatus.CANCELLED.value,
-                    "after": "_after_cancel",
-                },
-                # From approved
-                {
-                    "trigger": "schedule_pickup",
-                    "source": ReturnStatus.APPROVED.value,
-                    "dest": ReturnStatus.PICKUP_SCHEDULED.value,
-                    "after": "_after_schedule_pickup",
-                },
-                {
-                    "trigger": "reject",
-                    "source": ReturnStatus.APPROVED.value,
-                    "dest": ReturnStatus.REJECTED.value,
-                    "after": "_after_reject",
-                },
-                {
-                    "trigger": "cancel",
-                    "source": ReturnStatus.APPROVED.value,
-                    "dest": ReturnStatus.CANCELLED.value,
-                    "after": "_after_cancel",
-                },
-                # From pickup_scheduled
-                {
-                    "trigger": "start_transit",
-                    "source": ReturnStatus.PICKUP_SCHEDULED.value,
-                    "dest": ReturnStatus.IN_TRANSIT.value,
-                    "after": "_after_start_transit",
-                },
-                # From in_transit
-                {
-                    "trigger": "receive",
-                    "source": ReturnStatus.IN_TRANSIT.value,
-                    "dest": ReturnStatus.RECEIVED.value,
-                    "after": "_after_receive",
-                },
-                # From received
-                {
-                    "trigger": "process",
-                    "source": ReturnStatus.RECEIVED.value,
-                    "dest": ReturnStatus.PROCESSED.value,
-                    "after": "_after_process",
-                },
-                # From processed
-                {
-                    "trigger": "refund",
-                    "source": ReturnStatus.PROCESSED.value,
-                    "dest": ReturnStatus.REFUNDED.value,
-                    "after": "_after_refund",
-                },
-            ],
-            auto_transitions=False,
-            ignore_invalid_triggers=True,
-        )
+        super().__init__(current_state)
     
     def _after_approve(self):
         """Actions after approving return."""
@@ -158,14 +154,6 @@ class ReturnStateMachine:
         self.return_obj.previous_status = self.return_obj.status
         self.return_obj.status = ReturnStatus.CANCELLED
     
-    def can_transition(self, trigger: str) -> bool:
-        """Check if a transition is possible."""
-        return self.machine.get_triggers(self.state).__contains__(trigger)
-    
-    def get_available_transitions(self) -> list:
-        """Get list of available transitions from current state."""
-        return self.machine.get_triggers(self.state)
-    
     def get_state(self) -> ReturnStatus:
         """Get current state."""
         return ReturnStatus(self.state)
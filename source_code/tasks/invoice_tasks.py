@@ -1,20 +1,17 @@
 from celery import shared_task
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
-from app.config import settings
+from app import metrics
+from app.tasks.worker_db import SessionLocal
 from app.models.order import Order
 from app.models.return_model import Return
 from app.models.invoice import InvoiceType
 from app.services.invoice_service import InvoiceService
 from app.services.invoice_storage_service import InvoiceStorageService
+from typing import List
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
-# Create synchronous database session for Celery tasks
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine)
-
 
 @shared_task(name="generate_order_invoice")
 def generate_order_invoice(order_id: int):
@@ -44,18 +41,20 @@ def generate_order_invoice(order_id: int):
         
         # Generate invoice
         logger.info(f"Generating invoice PDF for order {order.order_number}...")
-        invoice_path = InvoiceService.generate_order_invoice(order)
-        logger.info(f"Invoice PDF generated at: {invoice_path}")
-        filename = invoice_path.split("/")[-1] if "/" in invoice_path else invoice_path.split("\\")[-1]
+        render_start = time.perf_counter()
+        pdf = InvoiceService.render_order_invoice(order)
+        metrics.observe_invoice_render(InvoiceType.ORDER.value, time.perf_counter() - render_start, len(pdf))
+        filename = InvoiceService.order_invoice_file_name(order)
         
-        # Save invoice record to database (using sync method for Celery)
-        invoice = InvoiceStorageService.create_invoice_record_sync(
+        # Store the PDF by content hash and record it (using sync method for Celery)
+        invoice = InvoiceStorageService.store_invoice_sync(
             db_session=db,
             invoice_type=InvoiceType.ORDER,
-            file_path=invoice_path,
+            content=pdf,
             file_name=filename,
             order_id=order_id,
         )
+        invoice_path = invoice.file_path
         
         logger.info(f"Invoice generated for order {order.order_number}: {invoice_path} (Invoice #{invoice.invoice_number})")
         logger.info(f"=== Invoice generation completed successfully for order {order_id} ===")
@@ -81,6 +80,19 @@ def generate_order_invoice(order_id: int):
         logger.info(f"Database session closed for order {order_id}")
 
 
+@shared_task(name="generate_order_invoices")
+def generate_order_invoices(order_ids: List[int]):
+    """
+    Background task to generate invoices for a chunk of shipped orders
+    (queued by bulk state transitions, one task per chunk).
+    
+    Args:
+        order_ids: IDs of the orders to generate invoices for
+    """
+    logger.info(f"=== Generating invoices for {len(order_ids)} orders ===")
+    return [generate_order_invoice(order_id) for order_id in order_ids]
+
+
 @shared_task(name="generate_return_invoice")
 def generate_return_invoice(return_id: int):
     """
@@ -113,18 +125,20 @@ def generate_return_invoice(return_id: int):
         
         # Generate credit memo/invoice
         logger.info(f"Generating credit memo PDF for return {return_obj.return_number}...")
-        invoice_path = InvoiceService.generate_return_invoice(return_obj)
-        logger.info(f"Credit memo PDF generated at: {invoice_path}")
-        filename = invoice_path.split("/")[-1] if "/" in invoice_path else invoice_path.split("\\")[-1]
+        render_start = time.perf_counter()
+        pdf = InvoiceService.render_return_invoice(return_obj)
+        metrics.observe_invoice_render(InvoiceType.RETURN.value, time.perf_counter() - render_start, len(pdf))
+        filename = InvoiceService.return_invoice_file_name(return_obj)
         
-        # Save invoice record to database (using sync method for Celery)
-        invoice = InvoiceStorageService.create_invoice_record_sync(
+        # Store the PDF by content hash and record it (using sync method for Celery)
+        invoice = InvoiceStorageService.store_invoice_sync(
             db_session=db,
             invoice_type=InvoiceType.RETURN,
-            file_path=invoice_path,
+            content=pdf,
             file_name=filename,
             return_id=return_id,
         )
+        invoice_path = invoice.file_path
         
         logger.info(f"Credit memo generated for return {return_obj.return_number}: {invoice_path} (Invoice #{invoice.invoice_number})")
         logger.info(f"=== Credit memo generation completed successfully for return {return_id} ===")
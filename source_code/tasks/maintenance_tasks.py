@@ -0,0 +1,42 @@
+from celery import shared_task
+from datetime import datetime, timedelta
+from app.config import settings
+from app.tasks.worker_db import SessionLocal
+from app.services.idempotency_service import IdempotencyService
+from app.services.outbox_service import OutboxService
+
+
+@shared_task(name="purge_expired_idempotency_keys")
+def purge_expired_idempotency_keys():
+    """
+    Background task to delete expired Idempotency-Key records.
+    Runs periodically via Celery beat; expired keys are also ignored on lookup,
+    so this only keeps the table small.
+    """
+    db = SessionLocal()
+    try:
+        deleted = IdempotencyService.purge_expired(db)
+        return {"status": "success", "deleted": deleted}
+    except Exception as e:
+        print(f"Error purging idempotency keys: {str(e)}")
+        return {"status": "error", "error": str(e)}
+    finally:
+        db.close()
+
+
+@shared_task(name="purge_dispatched_outbox_messages")
+def purge_dispatched_outbox_messages():
+    """
+    Background task to delete outbox messages that were published longer
+    than OUTBOX_RETENTION_SECONDS ago. Pending messages are never removed.
+    """
+    db = SessionLocal()
+    try:
+        before = datetime.utcnow() - timedelta(seconds=settings.OUTBOX_RETENTION_SECONDS)
+        deleted = OutboxService.purge_dispatched(db, before)
+        return {"status": "success", "deleted": deleted}
+    except Exception as e:
+        print(f"Error purging outbox messages: {str(e)}")
+        return {"status": "error", "error": str(e)}
+    finally:
+        db.close()
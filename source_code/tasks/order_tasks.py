@@ -1,15 +1,9 @@
 from celery import shared_task
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
-from app.config import settings
+from app.tasks.worker_db import SessionLocal
 from app.models.order import Order, OrderStatus
 from app.services.order_service import OrderService
 from datetime import datetime
 
-# Create synchronous database session for Celery tasks
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine)
-
 
 @shared_task(name="process_order_confirmation")
 def process_order_confirmation(order_id: int):
@@ -0,0 +1,53 @@
+"""
+Outbox relay: publishes the Celery task calls recorded in outbox_messages.
+
+Run it next to the Celery workers (several instances may run on PostgreSQL):
+    python -m app.tasks.outbox_relay
+"""
+import logging
+import threading
+from typing import Optional
+
+from app.celery_app import celery_app
+from app.config import settings
+from app.services.outbox_service import OutboxService
+from app.tasks.worker_db import SessionLocal, dispose_worker_engine
+
+logger = logging.getLogger(__name__)
+
+
+def relay_once(batch_size: Optional[int] = None) -> int:
+    """Publish one batch of pending messages over a single broker connection."""
+    db = SessionLocal()
+    try:
+        with celery_app.producer_or_acquire() as producer:
+            def publish(task_name, args):
+                celery_app.send_task(task_name, args=args, producer=producer)
+            
+            return OutboxService.relay_batch(db, publish, batch_size)
+    finally:
+        db.close()
+
+
+def run(stop: Optional[threading.Event] = None) -> None:
+    """Relay until stopped; full batches are followed immediately by the next one."""
+    stop = stop or threading.Event()
+    batch_size = settings.OUTBOX_RELAY_BATCH_SIZE
+    logger.info(f"Outbox relay started (batch size {batch_size})")
+    while not stop.is_set():
+        try:
+            published = relay_once(batch_size)
+        except Exception as e:
+            logger.error(f"Outbox relay batch failed: {e}", exc_info=True)
+            published = 0
+        if published < batch_size:
+            stop.wait(settings.OUTBOX_RELAY_POLL_SECONDS)
+    dispose_worker_engine()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        run()
+    except KeyboardInterrupt:
+        pass
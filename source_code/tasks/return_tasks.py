@@ -1,15 +1,9 @@
 from celery import shared_task
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
-from app.config import settings
+from app.tasks.worker_db import SessionLocal
 from app.models.return_model import Return, ReturnStatus
 from app.services.return_service import ReturnService
 from datetime import datetime
 
-# Create synchronous database session for Celery tasks
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine)
-
 
 @shared_task(name="process_return_approval")
 def process_return_approval(return_id: int):
@@ -0,0 +1,93 @@
+"""
+Database engine shared by every task module in a Celery worker process.
+
+The engine is created on `worker_process_init` (i.e. after the prefork pool has
+forked) and disposed on shutdown, so each child owns exactly one pool sized by
+CELERY_DB_POOL_SIZE / CELERY_DB_MAX_OVERFLOW. Outside a worker (eager tasks,
+scripts, tests) it is created lazily on first use.
+"""
+from typing import Optional
+
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import settings
+from app.database import TimedQueuePool, _pool_options, apply_sqlite_pragmas
+from app.query_stats import instrument_engine
+
+_engine: Optional[Engine] = None
+_session_factory: Optional[sessionmaker] = None
+
+
+def init_worker_engine() -> Engine:
+    """Create this process's engine, replacing any inherited from a parent process."""
+    global _engine, _session_factory
+    if _engine is not None:
+        # Connections inherited across fork belong to the parent; drop them unclosed
+        _engine.dispose(close=False)
+
+    if settings.DATABASE_URL.startswith("sqlite"):
+        _engine = create_engine(
+            settings.DATABASE_URL,
+            connect_args={"check_same_thread": False},
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            echo=settings.DB_ECHO,
+        )
+        apply_sqlite_pragmas(_engine)
+    else:
+        _engine = create_engine(
+            settings.DATABASE_URL,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            echo=settings.DB_ECHO,
+            **_pool_options(
+                TimedQueuePool,
+                pool_size=settings.CELERY_DB_POOL_SIZE,
+                max_overflow=settings.CELERY_DB_MAX_OVERFLOW,
+            ),
+        )
+    # Logs slow statements; there is no request to attribute queries to here
+    instrument_engine(_engine)
+
+    _session_factory = sessionmaker(bind=_engine)
+    return _engine
+
+
+def dispose_worker_engine() -> None:
+    """Close every pooled connection held by this process."""
+    global _engine, _session_factory
+    if _engine is not None:
+        _engine.dispose()
+    _engine = None
+    _session_factory = None
+
+
+def get_worker_engine() -> Engine:
+    """Get the worker engine, creating it if this process has none yet."""
+    if _engine is None:
+        init_worker_engine()
+    return _engine
+
+
+def SessionLocal() -> Session:
+    """Open a session on the worker engine."""
+    if _session_factory is None:
+        init_worker_engine()
+    return _session_factory()
+
+
+@worker_process_init.connect
+def _on_worker_process_init(**kwargs):
+    init_worker_engine()
+
+
+@worker_process_shutdown.connect
+def _on_worker_process_shutdown(**kwargs):
+    dispose_worker_engine()
+
+
+@worker_shutdown.connect
+def _on_worker_shutdown(**kwargs):
+    # Covers the solo and thread pools, which never fire worker_process_* signals
+    dispose_worker_engine()